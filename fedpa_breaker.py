@@ -0,0 +1,363 @@
+"""
+Circuit breaker y load shedding por endpoint para las APIs de aseguradoras
+Cada endpoint (host + ruta) tiene su propio breaker:
+  - cerrado: las llamadas pasan con timeout; se guarda una ventana de las
+    últimas N con su resultado y su latencia.
+  - abierto: si en la ventana la tasa de errores o de llamadas lentas supera
+    el umbral, se rechaza de inmediato (BreakerOpen) durante open_seconds.
+  - semiabierto: pasado ese tiempo se dejan pasar pocas sondas; si responden
+    bien se cierra, si fallan se vuelve a abrir.
+Además cada endpoint tiene un límite de llamadas en vuelo que se adapta
+(AIMD): crece de a poco con respuestas rápidas y se reduce con fallas o
+lentitud. Lo que excede el límite se descarta (LoadShed) en vez de encolarse,
+así una aseguradora degradada no acapara los hilos de trabajo.
+
+Métricas: transiciones de estado y conteos de descartes por endpoint
+(BreakerRegistry.metrics(), print_metrics, write_metrics).
+
+Uso:
+  python fedpa_breaker.py demo     # prueba contra el stand-in local con fallas inyectadas
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from urllib.parse import urlsplit
+
+CLOSED = 'cerrado'
+OPEN = 'abierto'
+HALF_OPEN = 'semiabierto'
+
+# HTTP que indican un servidor con problemas (un 400 es culpa nuestra, no suya)
+FAILURE_STATUS = {429, 500, 502, 503, 504}
+
+
+class BreakerOpen(Exception):
+    """El endpoint está abierto: se rechaza sin llamar"""
+
+
+class LoadShed(Exception):
+    """El endpoint tiene el cupo de llamadas en vuelo lleno"""
+
+
+class BreakerConfig:
+    def __init__(self, timeout=20.0, window=20, min_calls=5, error_rate=0.5, slow_seconds=8.0, slow_rate=0.5,
+                 open_seconds=30.0, half_open_probes=2, max_in_flight=8, min_in_flight=1):
+        self.timeout = timeout
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        # Sondas exitosas necesarias (y concurrentes permitidas) en semiabierto
+        self.half_open_probes = half_open_probes
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+
+
+class CircuitBreaker:
+    """
+    Estado de un endpoint: token = acquire() antes de llamar y
+    release(token, ok, segundos) después. El token lleva la generación del
+    estado (cambia en cada transición) y si la llamada entró como sonda, así
+    una llamada que termina después de un cambio de estado no lo altera.
+    """
+
+    def __init__(self, name, config, on_transition=None, clock=time.monotonic):
+        self.name = name
+        self.config = config
+        self._on_transition = on_transition
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._window = deque(maxlen=config.window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.limit = float(config.max_in_flight)
+        self._generation = 0
+        self._probes = 0
+        self._probe_successes = 0
+        self.counts = {'llamadas': 0, 'exitos': 0, 'errores': 0, 'lentas': 0,
+                       'rechazadas_abierto': 0, 'descartadas_carga': 0}
+
+    def _transition(self, state):
+        previous, self.state = self.state, state
+        self._generation += 1
+        if state == OPEN:
+            self.opened_at = self._clock()
+        if state in (OPEN, CLOSED):
+            self._probes = 0
+            self._probe_successes = 0
+        if state == CLOSED:
+            self._window.clear()
+            self.limit = max(self.limit, self.config.max_in_flight / 2)
+        if self._on_transition:
+            self._on_transition(self.name, previous, state)
+
+    def acquire(self):
+        """Admite una llamada y devuelve su token (generación, es_sonda)"""
+        with self._lock:
+            if self.state == OPEN:
+                if self._clock() - self.opened_at < self.config.open_seconds:
+                    self.counts['rechazadas_abierto'] += 1
+                    raise BreakerOpen(f"{self.name}: abierto")
+                self._transition(HALF_OPEN)
+
+            probe = self.state == HALF_OPEN
+            if probe:
+                if self._probes >= self.config.half_open_probes:
+                    self.counts['rechazadas_abierto'] += 1
+                    raise BreakerOpen(f"{self.name}: semiabierto, sondas en curso")
+                self._probes += 1
+            elif self.in_flight >= int(self.limit):
+                self.counts['descartadas_carga'] += 1
+                raise LoadShed(f"{self.name}: {self.in_flight} llamadas en vuelo (límite {int(self.limit)})")
+
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.counts['llamadas'] += 1
+            return self._generation, probe
+
+    def release(self, token, ok, seconds):
+        generation, probe = token
+        slow = seconds >= self.config.slow_seconds
+        config = self.config
+        with self._lock:
+            self.in_flight -= 1
+            self.counts['exitos' if ok else 'errores'] += 1
+            if slow:
+                self.counts['lentas'] += 1
+
+            # AIMD sobre el cupo en vuelo: baja a la mitad con una falla o una llamada lenta
+            if slow or not ok:
+                self.limit = max(config.min_in_flight, self.limit / 2)
+            else:
+                self.limit = min(config.max_in_flight, self.limit + 1 / self.limit)
+
+            if generation != self._generation:
+                # Admitida antes del último cambio de estado: ya no decide nada
+                return
+
+            if probe:
+                self._probes -= 1
+                if not ok or slow:
+                    self._transition(OPEN)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= config.half_open_probes:
+                    self._transition(CLOSED)
+                return
+
+            self._window.append((ok, slow))
+            if len(self._window) >= config.min_calls:
+                calls = len(self._window)
+                errors = sum(1 for ok_, _ in self._window if not ok_)
+                slows = sum(1 for _, slow_ in self._window if slow_)
+                if errors / calls >= config.error_rate or slows / calls >= config.slow_rate:
+                    self._transition(OPEN)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'estado': self.state,
+                'en_vuelo': self.in_flight,
+                'pico_en_vuelo': self.peak_in_flight,
+                'limite_en_vuelo': round(self.limit, 2),
+                **self.counts,
+            }
+
+
+class BreakerRegistry:
+    """Un breaker por endpoint + llamadas HTTP con timeout"""
+
+    def __init__(self, config=None, log=print):
+        self.config = config or BreakerConfig()
+        self._log = log
+        self._lock = threading.Lock()
+        self._breakers = {}
+        self.transitions = []
+
+    def _record_transition(self, name, previous, state):
+        self.transitions.append({'ts': time.time(), 'endpoint': name, 'de': previous, 'a': state})
+        if self._log:
+            self._log(f"⚡ {name}: {previous} → {state}")
+
+    def breaker(self, url):
+        parts = urlsplit(url)
+        name = f"{parts.netloc}{parts.path}"
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name, self.config, self._record_transition)
+            return self._breakers[name]
+
+    def request(self, url, data=None, headers=None, method='POST'):
+        """
+        urlopen protegido: devuelve (status, bytes). Lanza BreakerOpen/LoadShed
+        sin llamar, HTTPError para 4xx/5xx y URLError/TimeoutError en fallas de red.
+        """
+        breaker = self.breaker(url)
+        token = breaker.acquire()
+        start = time.monotonic()
+        ok = False
+        try:
+            req = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+            with urllib.request.urlopen(req, timeout=self.config.timeout) as resp:
+                body = resp.read()
+                ok = True
+                return resp.status, body
+        except urllib.error.HTTPError as e:
+            ok = e.code not in FAILURE_STATUS
+            raise
+        finally:
+            breaker.release(token, ok, time.monotonic() - start)
+
+    def post_json(self, url, payload):
+        _, body = self.request(url, json.dumps(payload).encode(), {'Content-Type': 'application/json'})
+        return json.loads(body)
+
+    def metrics(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            'endpoints': {name: breaker.snapshot() for name, breaker in breakers.items()},
+            'transiciones': list(self.transitions),
+        }
+
+
+def print_metrics(metrics):
+    print(f"{'endpoint':<72} {'estado':<12} {'ok':>5} {'err':>5} {'lent':>5} {'abierto':>8} {'carga':>6}")
+    for name, m in metrics['endpoints'].items():
+        print(f"{name:<72} {m['estado']:<12} {m['exitos']:>5} {m['errores']:>5} {m['lentas']:>5} "
+              f"{m['rechazadas_abierto']:>8} {m['descartadas_carga']:>6}")
+    print(f"Transiciones: {len(metrics['transiciones'])}")
+
+
+def write_metrics(metrics, path):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _fire(registry, url, payload, n, workers, pause=0.0):
+    """n llamadas desde `workers` hilos (con `pause` entre llamadas); conteo por resultado"""
+    results = {}
+    lock = threading.Lock()
+    pending = iter(range(n))
+
+    def worker():
+        while True:
+            with lock:
+                if next(pending, None) is None:
+                    return
+            try:
+                registry.post_json(url, payload)
+                outcome = 'ok'
+            except BreakerOpen:
+                outcome = 'rechazada_abierto'
+            except LoadShed:
+                outcome = 'descartada_carga'
+            except urllib.error.HTTPError as e:
+                outcome = f'http_{e.code}'
+            except (urllib.error.URLError, TimeoutError, socket.timeout):
+                outcome = 'timeout'
+            with lock:
+                results[outcome] = results.get(outcome, 0) + 1
+            time.sleep(pause)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def demo():
+    """Fallas inyectadas en el stand-in: el breaker abre, descarta, sondea y cierra"""
+    from fedpa_standin import StandIn
+
+    config = BreakerConfig(timeout=0.5, window=10, min_calls=5, slow_seconds=0.3, open_seconds=0.5,
+                           half_open_probes=2, max_in_flight=4)
+    registry = BreakerRegistry(config)
+    creds = {'Usuario': 'SLIDERES', 'Clave': 'x'}
+    checks = []
+
+    def check(label, condition):
+        checks.append(condition)
+        print(f"   {'✅' if condition else '❌'} {label}")
+
+    with StandIn(seed=1) as standin:
+        cot = f"{standin.base_url}/Polizas/get_cotizacion"
+        nro = f"{standin.base_url}/Polizas/get_nropoliza"
+        cot_breaker, nro_breaker = registry.breaker(cot), registry.breaker(nro)
+
+        print("1) Sano")
+        print(f"   {_fire(registry, cot, creds, 20, 4)}")
+        check('get_cotizacion cerrado', cot_breaker.state == CLOSED)
+
+        print("2) get_cotizacion responde 503 siempre")
+        standin.inject('get_cotizacion', fail_rate=1.0)
+        before = standin.requests.get('get_cotizacion', 0)
+        results = _fire(registry, cot, creds, 50, 4)
+        print(f"   {results}")
+        check('get_cotizacion abierto', cot_breaker.state == OPEN)
+        check('la mayoría se rechaza sin llamar al servidor',
+              standin.requests['get_cotizacion'] - before < 15
+              and results.get('rechazada_abierto', 0) + results.get('descartada_carga', 0) > 30)
+        results = _fire(registry, nro, creds, 20, 4)
+        print(f"   get_nropoliza mientras tanto: {results}")
+        check('get_nropoliza no se ve afectado', results == {'ok': 20} and nro_breaker.state == CLOSED)
+
+        print("3) Sigue fallando: la sonda semiabierta vuelve a abrir")
+        time.sleep(config.open_seconds + 0.05)
+        _fire(registry, cot, creds, 1, 1)
+        check('semiabierto → abierto', cot_breaker.state == OPEN)
+
+        print("4) Latencia degradada (cuelga más que el timeout)")
+        standin.heal()
+        standin.inject('get_nropoliza', delay=1.0)
+        start = time.monotonic()
+        results = _fire(registry, nro, creds, 30, 4, pause=0.02)
+        elapsed = time.monotonic() - start
+        print(f"   {results} en {elapsed:.1f}s")
+        check('get_nropoliza abierto por timeouts', nro_breaker.state == OPEN)
+        check('falla rápido (no 30 × 1s)', elapsed < 5)
+
+        print("5) Carga: más hilos que el cupo en vuelo con respuestas lentas")
+        standin.heal()
+        standin.inject('get_cotizacion', delay=0.2)
+        time.sleep(config.open_seconds + 0.05)
+        _fire(registry, cot, creds, 2, 1)
+        check('get_cotizacion cerrado tras las sondas', cot_breaker.state == CLOSED)
+        results = _fire(registry, cot, creds, 60, 12, pause=0.02)
+        print(f"   {results}")
+        check('exceso descartado (LoadShed)', results.get('descartada_carga', 0) > 0)
+        check(f'nunca más de {config.max_in_flight} en vuelo', cot_breaker.peak_in_flight <= config.max_in_flight)
+
+        print("6) Recuperación")
+        standin.heal()
+        time.sleep(config.open_seconds + 0.05)
+        results = _fire(registry, nro, creds, 10, 2)
+        print(f"   {results}")
+        check('get_nropoliza cerrado de nuevo', nro_breaker.state == CLOSED)
+
+    print()
+    metrics = registry.metrics()
+    print_metrics(metrics)
+    return all(checks)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['demo']:
+        print("Uso: python fedpa_breaker.py demo")
+        sys.exit(1)
+    sys.exit(0 if demo() else 1)
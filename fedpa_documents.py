@@ -0,0 +1,351 @@
+"""
+Preprocesamiento de documentos para crear_poliza_auto_cc_externos (FEDPA)
+Reduce cédula, licencia y registro (File1/File2/File3) antes de subirlos:
+  - Imágenes: orientación EXIF, reducción al lado máximo y recompresión JPEG,
+    bajando la calidad hasta entrar en el presupuesto sin pasar del mínimo.
+  - PDF: compresión de streams, object streams y linealización.
+Cada documento se cachea por hash de contenido (memoria + disco), así nunca
+se procesa dos veces, y el trabajo corre en un pool de hilos mientras se
+cotiza. Pillow y pikepdf son opcionales: sin ellos el documento se sube tal
+cual (y no se guarda en la caché de disco). Nunca se sube una versión más
+pesada que el original.
+
+Uso:
+  python fedpa_documents.py public/IMG_4205.JPEG test_cedula.pdf [--sin-cache]
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'fedpa_documentos')
+
+CONTENT_TYPES = {
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'pdf': 'application/pdf',
+}
+
+# Notas de los documentos que se suben tal cual porque falta la dependencia:
+# no se guardan en disco, así al instalarla se procesan de verdad
+NO_PILLOW = 'sin Pillow'
+NO_PIKEPDF = 'sin pikepdf'
+MISSING_CODECS = (NO_PILLOW, NO_PIKEPDF)
+
+
+class DocumentBudget:
+    """Límites de tamaño y de calidad mínima para los adjuntos"""
+
+    def __init__(self, max_bytes=800_000, max_total_bytes=2_000_000, max_side=1600, quality=80, min_quality=55):
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+        # Lado mayor de las imágenes (px): suficiente para leer una cédula escaneada
+        self.max_side = max_side
+        self.quality = quality
+        self.min_quality = min_quality
+
+    def signature(self):
+        """Parte de la clave de caché: si cambia el presupuesto se reprocesa"""
+        return f"{self.max_bytes}-{self.max_side}-{self.quality}-{self.min_quality}"
+
+
+class ProcessedDocument:
+    def __init__(self, name, content_type, data, original_bytes, sha256, method, note='', seconds=0.0, cached=None):
+        self.name = name
+        self.content_type = content_type
+        self.data = data
+        self.original_bytes = original_bytes
+        self.sha256 = sha256
+        self.method = method      # 'imagen', 'pdf' u 'original'
+        self.note = note
+        self.seconds = seconds
+        self.cached = cached      # None, 'memoria' o 'disco'
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    def renamed(self, name, cached):
+        name = upload_name(name, self.content_type)
+        return ProcessedDocument(name, self.content_type, self.data, self.original_bytes, self.sha256,
+                                 self.method, self.note, 0.0, cached)
+
+    def meta(self):
+        return {
+            'content_type': self.content_type,
+            'original_bytes': self.original_bytes,
+            'sha256': self.sha256,
+            'method': self.method,
+            'note': self.note,
+        }
+
+
+def upload_name(name, content_type):
+    """Nombre del adjunto con la extensión del contenido (un PNG recomprimido va como .jpg)"""
+    base, extension = os.path.splitext(name)
+    if content_type == 'image/jpeg' and extension.lower() not in ('.jpg', '.jpeg'):
+        return base + '.jpg'
+    return name
+
+
+def sniff_type(data):
+    """Tipo por firma de bytes (no por extensión: los celulares mienten)"""
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data.lstrip()[:5] == b'%PDF-':
+        return 'pdf'
+    return None
+
+
+def process_image(data, budget):
+    """(bytes JPEG, nota) o (None, motivo) si Pillow no está instalado"""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None, NO_PILLOW
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        longest = max(image.size)
+        if longest > budget.max_side:
+            scale = budget.max_side / longest
+            image = image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+
+        quality = budget.quality
+        while True:
+            out = io.BytesIO()
+            image.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+            if out.tell() <= budget.max_bytes or quality <= budget.min_quality:
+                break
+            quality = max(budget.min_quality, quality - 10)
+        return out.getvalue(), f"{image.width}x{image.height} q{quality}"
+
+
+def process_pdf(data, budget):
+    """(bytes PDF, nota) o (None, motivo) si pikepdf no está instalado"""
+    try:
+        import pikepdf
+    except ImportError:
+        return None, NO_PIKEPDF
+
+    with pikepdf.open(io.BytesIO(data)) as pdf:
+        out = io.BytesIO()
+        pdf.save(
+            out,
+            compress_streams=True,
+            object_stream_mode=pikepdf.ObjectStreamMode.generate,
+            linearize=True,
+        )
+    return out.getvalue(), 'streams comprimidos, linealizado'
+
+
+class DocumentPreprocessor:
+    """
+    Pool de hilos + caché por hash de contenido.
+        with DocumentPreprocessor() as docs:
+            futures = docs.submit_many({'File1': 'cedula.pdf', ...})
+            ... cotizar ...
+            files = {field: f.result() for field, f in futures.items()}
+    """
+
+    def __init__(self, budget=None, cache_dir=DEFAULT_CACHE_DIR, max_workers=3):
+        self.budget = budget or DocumentBudget()
+        self.cache_dir = cache_dir
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fedpa-docs')
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._memory = {}
+        self.stats = {'procesados': 0, 'cache_memoria': 0, 'cache_disco': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def submit(self, source, name=None):
+        """source: ruta o bytes; devuelve un Future[ProcessedDocument]"""
+        return self._pool.submit(self._load_and_process, source, name)
+
+    def submit_many(self, files):
+        """{campo: ruta o bytes} → {campo: Future}"""
+        return {field: self.submit(source) for field, source in files.items()}
+
+    def _load_and_process(self, source, name):
+        if isinstance(source, (bytes, bytearray)):
+            return self.process(bytes(source), name or 'documento')
+        with open(source, 'rb') as f:
+            data = f.read()
+        return self.process(data, name or os.path.basename(source))
+
+    def _cache_paths(self, key):
+        return os.path.join(self.cache_dir, f"{key}.bin"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _cache_key(self, sha256):
+        return f"{sha256}-{hashlib.sha1(self.budget.signature().encode()).hexdigest()[:8]}"
+
+    def _read_disk(self, key, name):
+        if not self.cache_dir:
+            return None
+        data_path, meta_path = self._cache_paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(data_path, 'rb') as f:
+                data = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        if meta['note'] in MISSING_CODECS:
+            # Entrada de una versión anterior que guardaba el original sin procesar
+            return None
+        return ProcessedDocument(upload_name(name, meta['content_type']), meta['content_type'], data,
+                                 meta['original_bytes'], meta['sha256'], meta['method'], meta['note'],
+                                 cached='disco')
+
+    def _write_disk(self, key, doc):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, meta_path = self._cache_paths(key)
+        for path, payload, mode in ((data_path, doc.data, 'wb'),
+                                    (meta_path, json.dumps(doc.meta()).encode('utf-8'), 'wb')):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, mode) as f:
+                f.write(payload)
+            os.replace(tmp, path)
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def process(self, data, name='documento'):
+        """Procesa (o toma de la caché) un documento; seguro entre hilos"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        key = self._cache_key(sha256)
+
+        # Un lock por documento: dos pedidos simultáneos del mismo archivo lo procesan una vez
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key in self._memory:
+                self._count('cache_memoria')
+                return self._memory[key].renamed(name, 'memoria')
+            doc = self._read_disk(key, name)
+            if doc is not None:
+                self._count('cache_disco')
+                self._memory[key] = doc
+                return doc
+
+            doc = self._process(data, name, sha256)
+            self._count('procesados')
+            self._memory[key] = doc
+            if doc.note not in MISSING_CODECS:
+                self._write_disk(key, doc)
+            return doc
+
+    def _process(self, data, name, sha256):
+        start = time.perf_counter()
+        kind = sniff_type(data)
+        content_type = CONTENT_TYPES.get(kind, 'application/octet-stream')
+        processed, note = None, 'tipo no soportado'
+        if kind in ('jpeg', 'png'):
+            processed, note = process_image(data, self.budget)
+        elif kind == 'pdf':
+            processed, note = process_pdf(data, self.budget)
+
+        if processed is not None and len(processed) < len(data):
+            method = 'pdf' if kind == 'pdf' else 'imagen'
+            if method == 'imagen':
+                content_type = 'image/jpeg'
+            data_out = processed
+        else:
+            if processed is not None:
+                note = 'sin ganancia'
+            method, data_out = 'original', data
+        return ProcessedDocument(upload_name(name, content_type), content_type, data_out, len(data), sha256, method, note,
+                                 time.perf_counter() - start)
+
+
+def check_budget(documents, budget):
+    """Lista de incumplimientos del presupuesto (vacía si todo está OK)"""
+    problems = []
+    for field, doc in documents.items():
+        if doc.size > budget.max_bytes:
+            problems.append(f"{field} ({doc.name}): {doc.size:,} bytes > {budget.max_bytes:,} ({doc.note})")
+    total = sum(doc.size for doc in documents.values())
+    if total > budget.max_total_bytes:
+        problems.append(f"total: {total:,} bytes > {budget.max_total_bytes:,}")
+    return problems
+
+
+def build_multipart(fields, files):
+    """
+    Cuerpo multipart/form-data con campos de texto y adjuntos ProcessedDocument.
+    Devuelve (body, content_type).
+    """
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode('utf-8'))
+        body.write(value.encode('utf-8'))
+        body.write(b'\r\n')
+    for field, doc in files.items():
+        body.write(
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{doc.name}"\r\n'
+            f'Content-Type: {doc.content_type}\r\n\r\n'.encode('utf-8')
+        )
+        body.write(doc.data)
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode('utf-8'))
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def print_report(documents, budget, stats=None):
+    original = sum(doc.original_bytes for doc in documents.values())
+    final = sum(doc.size for doc in documents.values())
+    print(f"{'campo':<28} {'original':>11} {'final':>11}  método")
+    for field, doc in documents.items():
+        cached = f" [caché {doc.cached}]" if doc.cached else ''
+        print(f"{field:<28} {doc.original_bytes:>11,} {doc.size:>11,}  {doc.method} ({doc.note}){cached}")
+    saved = 1 - final / original if original else 0
+    print(f"{'TOTAL':<28} {original:>11,} {final:>11,}  -{saved:.0%}")
+    if stats:
+        print(f"Procesados: {stats['procesados']}, caché memoria: {stats['cache_memoria']}, caché disco: {stats['cache_disco']}")
+    problems = check_budget(documents, budget)
+    if problems:
+        print("Fuera de presupuesto:")
+        for problem in problems:
+            print(f"  - {problem}")
+    else:
+        print("Presupuesto OK")
+    return problems
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not args:
+        print("Uso: python fedpa_documents.py archivo [archivo...] [--sin-cache]")
+        sys.exit(1)
+
+    cache_dir = None if '--sin-cache' in sys.argv else DEFAULT_CACHE_DIR
+    start = time.perf_counter()
+    with DocumentPreprocessor(cache_dir=cache_dir, max_workers=min(len(args), os.cpu_count() or 1)) as docs:
+        futures = {path: docs.submit(path) for path in args}
+        documents = {path: future.result() for path, future in futures.items()}
+    print_report(documents, docs.budget, docs.stats)
+    print(f"Tiempo: {time.perf_counter() - start:.2f}s")
+    sys.exit(1 if check_budget(documents, docs.budget) else 0)
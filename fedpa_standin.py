@@ -0,0 +1,133 @@
+"""
+Stand-in local de EmisorFedpa.Api para probar el cliente sin tocar producción
+Responde get_cotizacion, get_nropoliza y crear_poliza_auto_cc_externos con
+datos fijos y permite inyectar fallas por endpoint:
+  - fail_rate: fracción de pedidos que responden HTTP 503
+  - delay: segundos de espera antes de responder (latencia degradada)
+Las fallas se cambian en caliente desde Python (StandIn.inject) o con
+POST /_control {"endpoint": "get_cotizacion", "fail_rate": 1.0, "delay": 0}.
+
+Uso:
+  python fedpa_standin.py [--puerto 8765]
+  FEDPA_BASE_URL=http://127.0.0.1:8765/EmisorFedpa.Api/api python test_emision.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PREFIX = '/EmisorFedpa.Api/api/Polizas/'
+
+RESPONSES = {
+    'get_cotizacion': [
+        {'COTIZACION': 900001, 'RAMO': '04', 'SUBRAMO': '04', 'PRIMA_IMPUESTO': 215.35},
+        {'COTIZACION': 900001, 'RAMO': '04', 'SUBRAMO': '04', 'PRIMA_IMPUESTO': 48.10},
+    ],
+    'get_nropoliza': [{'NUMPOL': '04-04-0900001-0'}],
+    'crear_poliza_auto_cc_externos': {'Exito': True, 'Mensaje': 'Poliza emitida (stand-in)'},
+}
+
+
+class StandIn:
+    """Servidor en un hilo; usar como context manager"""
+
+    def __init__(self, host='127.0.0.1', port=0, seed=None):
+        self._faults = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.requests = {}
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                standin._handle(self)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/EmisorFedpa.Api/api"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def inject(self, endpoint, fail_rate=0.0, delay=0.0):
+        """Configura las fallas de un endpoint (fail_rate=0 y delay=0 lo sanan)"""
+        with self._lock:
+            self._faults[endpoint] = (fail_rate, delay)
+
+    def heal(self):
+        with self._lock:
+            self._faults.clear()
+
+    def _handle(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length)
+
+        if handler.path == '/_control':
+            options = json.loads(body or b'{}')
+            self.inject(options['endpoint'], options.get('fail_rate', 0.0), options.get('delay', 0.0))
+            return self._reply(handler, 200, {'ok': True})
+
+        if not handler.path.startswith(API_PREFIX):
+            return self._reply(handler, 404, {'Mensaje': 'no encontrado'})
+        endpoint = handler.path[len(API_PREFIX):]
+        if endpoint not in RESPONSES:
+            return self._reply(handler, 404, {'Mensaje': 'no encontrado'})
+
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            fail_rate, delay = self._faults.get(endpoint, (0.0, 0.0))
+            failing = self._random.random() < fail_rate
+        if delay:
+            time.sleep(delay)
+        if failing:
+            return self._reply(handler, 503, {'Mensaje': 'falla inyectada'})
+        self._reply(handler, 200, RESPONSES[endpoint])
+
+    def _reply(self, handler, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        try:
+            handler.send_response(status)
+            handler.send_header('Content-Type', 'application/json')
+            handler.send_header('Content-Length', str(len(data)))
+            handler.end_headers()
+            handler.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente ya se fue por timeout
+            pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stand-in local de EmisorFedpa.Api')
+    parser.add_argument('--puerto', type=int, default=8765)
+    args = parser.parse_args()
+
+    with StandIn(port=args.puerto) as standin:
+        print(f"Stand-in FEDPA en {standin.base_url} (Ctrl+C para salir)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de los scripts de importación con datos sintéticos
+Mide throughput (filas/s), tiempo de pared/CPU y pico de memoria por script,
+tamaño y etapa, incluido cuánto crece el pico de RSS durante la corrida real
+(run_rss_mb); guarda los resultados en JSON y falla si se supera el umbral
+de regresión contra un baseline guardado.
+
+Uso:
+  python bench_import.py                                 # 10k filas, todos los scripts
+  python bench_import.py --tamanos 10000,100000,1000000
+  python bench_import.py --guardar-baseline              # guarda bench_baseline.json
+  python bench_import.py --baseline bench_baseline.json --umbral 0.25
+  python bench_import.py --etapas     # además mide cada etapa interna (leer, validar, ...)
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import bench_synthetic  # noqa: E402
+
+DEFAULT_SIZES = [10_000]
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_RESULTS = 'bench_results.json'
+DEFAULT_BASELINE = 'bench_baseline.json'
+
+# Métricas donde "más alto = peor" y entran en la comparación contra baseline
+REGRESSION_METRICS = ('wall_s', 'peak_mb', 'run_rss_mb')
+# La generación de datos sintéticos no es parte de los scripts medidos
+SYNTHETIC_STAGE = 'datos_sinteticos'
+UNTRACKED_STAGES = (SYNTHETIC_STAGE,)
+
+
+def _run_parse_bulk_data(workdir, input_file, profiler):
+    import parse_bulk_data
+    shutil.copy(input_file, os.path.join(workdir, 'DATOS_IMPORT_RAW.txt'))
+    parse_bulk_data.main(profiler)
+
+
+def _run_excel_to_bulk_import(workdir, input_file, profiler):
+    import excel_to_bulk_import
+    excel_to_bulk_import.process_excel(input_file, profiler)
+
+
+def _run_excel_all_sheets(workdir, input_file, profiler):
+    import excel_to_bulk_import
+    excel_to_bulk_import.process_excel(input_file, profiler, sheets=excel_to_bulk_import.ALL_SHEETS)
+
+
+def _run_fix_broker_names(workdir, input_file, profiler):
+    import fix_broker_names_to_emails
+    fix_broker_names_to_emails.fix_csv(input_file, os.path.join(workdir, 'brokers_fixed.csv'), profiler)
+
+
+def _run_generate_sql(workdir, input_file, profiler):
+    import generate_sql
+    os.makedirs(os.path.join(workdir, 'public'), exist_ok=True)
+    shutil.copy(input_file, os.path.join(workdir, 'public', 'TODA_FINAL_IMPORT_COMPACT.json'))
+    generate_sql.main(profiler)
+
+
+# nombre del caso → (generador, extensión de entrada, función que ejecuta el script)
+CASES = {
+    'parse_bulk_data': ('raw', 'txt', _run_parse_bulk_data),
+    'excel_to_bulk_import_csv': ('csv', 'csv', _run_excel_to_bulk_import),
+    'excel_to_bulk_import_xlsx': ('xlsx', 'xlsx', _run_excel_to_bulk_import),
+    'excel_to_bulk_import_xlsx_hojas': ('xlsx_hojas', 'xlsx', _run_excel_all_sheets),
+    'fix_broker_names_to_emails': ('brokers', 'csv', _run_fix_broker_names),
+    'generate_sql': ('json', 'json', _run_generate_sql),
+}
+
+
+def _peak_memory_mb():
+    """Pico de RSS del proceso actual (MB); None si no está disponible"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_child(case, workdir, input_file, by_stage=False):
+    """
+    Ejecuta un caso en este proceso (llamado desde el subproceso aislado).
+    Con by_stage el script corre con StageProfiler activo: las etapas internas
+    quedan medidas con tracemalloc, lo que agrega overhead al tiempo total.
+    """
+    from import_profiling import StageProfiler
+
+    _, _, runner = CASES[case]
+    os.chdir(workdir)
+    profiler = StageProfiler(enabled=by_stage)
+
+    use_tracemalloc = not by_stage and _peak_memory_mb() is None
+    if use_tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
+
+    # RSS del proceso antes de correr el script (intérprete + bench), para
+    # medir cuánto crece el pico durante la importación real
+    rss_start = _peak_memory_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        runner(workdir, input_file, profiler)
+    result = {
+        'wall_s': time.perf_counter() - wall_start,
+        'cpu_s': time.process_time() - cpu_start,
+        'stages': profiler.report()['stages'] if by_stage else [],
+    }
+    if rss_start is not None:
+        result['run_rss_mb'] = _peak_memory_mb() - rss_start
+
+    if use_tracemalloc:
+        result['peak_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        result['memory_source'] = 'tracemalloc'
+    else:
+        result['peak_mb'] = _peak_memory_mb()
+        result['memory_source'] = 'rss'
+
+    print(json.dumps(result))
+
+
+def run_case(case, rows, seed, workdir, by_stage=False):
+    """Genera la entrada y ejecuta el caso en un subproceso limpio"""
+    generator, extension, _ = CASES[case]
+    input_file = os.path.join(workdir, f'input_{rows}.{extension}')
+    stages = []
+
+    gen_start = time.perf_counter()
+    try:
+        bench_synthetic.GENERATORS[generator](input_file, rows, seed)
+    except ImportError as e:
+        return {'status': 'omitido', 'motivo': f'dependencia faltante: {e.name}', 'stages': stages}
+    stages.append({'stage': SYNTHETIC_STAGE, 'wall_s': time.perf_counter() - gen_start})
+
+    child_args = [sys.executable, os.path.abspath(__file__), '--_child', case, workdir, input_file]
+    if by_stage:
+        child_args.append('--etapas')
+    proc = subprocess.run(
+        child_args,
+        capture_output=True, text=True, encoding='utf-8',
+    )
+    if proc.returncode != 0:
+        last_line = (proc.stderr.strip().splitlines() or [''])[-1]
+        status = 'omitido' if 'ModuleNotFoundError' in last_line else 'error'
+        return {'status': status, 'motivo': last_line, 'stages': stages}
+
+    measured = json.loads(proc.stdout.strip().splitlines()[-1])
+    script_stages = measured.pop('stages')
+    measured['stage'] = 'ejecutar'
+    measured['rows_per_s'] = rows / measured['wall_s'] if measured['wall_s'] else None
+    stages.append(measured)
+    stages.extend(script_stages)
+    return {'status': 'ok', 'stages': stages}
+
+
+def run_suite(cases, sizes, seed, by_stage=False):
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'runs': [],
+    }
+
+    for rows in sizes:
+        for case in cases:
+            workdir = tempfile.mkdtemp(prefix=f'bench_{case}_')
+            try:
+                print(f"⏱️  {case} ({rows:,} filas)...", end=' ', flush=True)
+                outcome = run_case(case, rows, seed, workdir, by_stage)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+            results['runs'].append({'case': case, 'rows': rows, **outcome})
+            if outcome['status'] != 'ok':
+                print(f"{outcome['status'].upper()} ({outcome['motivo']})")
+                continue
+            run = next(stage for stage in outcome['stages'] if stage['stage'] == 'ejecutar')
+            rss = f", RSS +{run['run_rss_mb']:.1f} MB" if run.get('run_rss_mb') is not None else ''
+            print(f"{run['wall_s']:.2f}s, {run['rows_per_s']:,.0f} filas/s, {run['peak_mb']:.1f} MB{rss}")
+            for stage in outcome['stages']:
+                if stage['stage'] not in ('ejecutar', SYNTHETIC_STAGE):
+                    print(f"      · {stage['stage']}: {stage['wall_s']:.3f}s, pico {stage['peak_mb']:.1f} MB")
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Lista de regresiones [(caso, filas, etapa, métrica, baseline, actual)]"""
+    previous = {
+        (run['case'], run['rows'], stage['stage']): stage
+        for run in baseline.get('runs', []) if run.get('status') == 'ok'
+        for stage in run['stages']
+    }
+    regressions = []
+    for run in results['runs']:
+        if run['status'] != 'ok':
+            continue
+        for stage in run['stages']:
+            if stage['stage'] in UNTRACKED_STAGES:
+                continue
+            before = previous.get((run['case'], run['rows'], stage['stage']))
+            if not before:
+                continue
+            for metric in REGRESSION_METRICS:
+                old, new = before.get(metric), stage.get(metric)
+                if old and new and new > old * (1 + threshold):
+                    regressions.append((run['case'], run['rows'], stage['stage'], metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de los scripts de importación')
+    parser.add_argument('--tamanos', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Cantidades de filas separadas por coma (ej: 10000,100000,1000000)')
+    parser.add_argument('--casos', default=','.join(CASES), help='Casos a ejecutar, separados por coma')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', default=DEFAULT_RESULTS, help='Archivo JSON de resultados')
+    parser.add_argument('--baseline', help='JSON de baseline contra el cual comparar')
+    parser.add_argument('--umbral', type=float, default=DEFAULT_THRESHOLD,
+                        help='Regresión tolerada (0.20 = 20%% más lento o más memoria)')
+    parser.add_argument('--etapas', action='store_true',
+                        help='Medir también las etapas internas de cada script (agrega overhead de tracemalloc)')
+    parser.add_argument('--guardar-baseline', action='store_true',
+                        help=f'Guardar los resultados también como {DEFAULT_BASELINE}')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.tamanos.split(',') if s]
+    cases = [c for c in args.casos.split(',') if c]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        print(f"❌ ERROR: Casos desconocidos: {unknown}. Disponibles: {list(CASES)}")
+        sys.exit(1)
+
+    results = run_suite(cases, sizes, args.semilla, args.etapas)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados: {args.salida}")
+
+    if args.guardar_baseline:
+        with open(DEFAULT_BASELINE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 Baseline: {DEFAULT_BASELINE}")
+
+    if any(run['status'] == 'error' for run in results['runs']):
+        print("\n❌ Hubo casos con error")
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.umbral)
+        if regressions:
+            print(f"\n❌ Regresiones (umbral {args.umbral:.0%}):")
+            for case, rows, stage, metric, old, new in regressions:
+                print(f"   - {case} [{rows:,} filas, {stage}] {metric}: {old:.2f} → {new:.2f} (+{new / old - 1:.0%})")
+            sys.exit(1)
+        print(f"\n✅ Sin regresiones contra {args.baseline} (umbral {args.umbral:.0%})")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 5 and sys.argv[1] == '--_child':
+        run_child(sys.argv[2], sys.argv[3], sys.argv[4], '--etapas' in sys.argv[5:])
+    else:
+        main()
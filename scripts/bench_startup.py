@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío del CLI de importación (import_cli.py)
+Ejecuta cada subcomando con una entrada sintética chica en un proceso nuevo,
+mide el tiempo de pared (mediana de N repeticiones) y desglosa el costo de
+imports con `python -X importtime`: total, módulos más pesados y si se cargó
+pandas. El caso convert_csv_pandas fuerza el lector pandas como referencia
+del arranque anterior.
+
+Uso:
+  python bench_startup.py
+  python bench_startup.py --repeticiones 10 --filas 500 --salida bench_startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import bench_synthetic  # noqa: E402
+
+CLI = os.path.join(SCRIPTS_DIR, 'import_cli.py')
+DEFAULT_RESULTS = 'bench_startup.json'
+TOP_IMPORTS = 5
+
+# nombre → (generador de entrada o None, argumentos; {entrada} se reemplaza)
+SCENARIOS = {
+    'interprete': (None, None),
+    'ayuda': (None, ['--help']),
+    'parse_raw': ('raw', ['parse-raw', '--entrada', '{entrada}', '--salida', 'salida']),
+    'convert_csv': ('csv', ['convert', '{entrada}']),
+    'convert_csv_pandas': ('csv', ['convert', '{entrada}', '--lector', 'pandas']),
+    'fix_brokers': ('brokers', ['fix-brokers', '{entrada}', 'salida.csv']),
+    'generate_sql': ('json', ['generate-sql', '--entrada', '{entrada}', '--salida', 'salida.sql']),
+}
+
+EXTENSIONS = {'raw': 'txt', 'csv': 'csv', 'brokers': 'csv', 'json': 'json'}
+
+
+def _command(args, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    if args is None:
+        # Referencia: arranque del intérprete sin importar nada
+        return cmd + ['-c', 'pass']
+    return cmd + [CLI] + args
+
+
+def parse_importtime(stderr):
+    """
+    Interpreta la salida de -X importtime.
+    Devuelve (total_ms, [(módulo, acumulado_ms)] de nivel superior, módulos cargados)
+    """
+    top_level = []
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        # "import time:   self |   acumulado | <sangría por nivel>módulo"
+        _, cumulative_us, name = line.split(':', 1)[1].split('|')
+        modules.add(name.strip())
+        if not name[1:].startswith(' '):
+            top_level.append((name.strip(), int(cumulative_us) / 1000))
+    total_ms = sum(ms for _, ms in top_level)
+    return total_ms, sorted(top_level, key=lambda x: x[1], reverse=True), modules
+
+
+def run_scenario(name, rows, seed, repeats, workdir):
+    generator, args = SCENARIOS[name]
+    if generator:
+        input_file = os.path.join(workdir, f'entrada_{generator}.{EXTENSIONS[generator]}')
+        if not os.path.exists(input_file):
+            bench_synthetic.GENERATORS[generator](input_file, rows, seed)
+        args = [a.replace('{entrada}', input_file) for a in args]
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        proc = subprocess.run(_command(args), cwd=workdir, capture_output=True, text=True, encoding='utf-8')
+        timings.append((time.perf_counter() - start) * 1000)
+        if proc.returncode != 0:
+            last_line = (proc.stderr.strip().splitlines() or [''])[-1]
+            status = 'omitido' if 'ModuleNotFoundError' in proc.stderr else 'error'
+            return {'status': status, 'motivo': last_line}
+
+    proc = subprocess.run(_command(args, importtime=True), cwd=workdir,
+                          capture_output=True, text=True, encoding='utf-8')
+    import_ms, top_level, modules = parse_importtime(proc.stderr)
+    return {
+        'status': 'ok',
+        'wall_ms_median': round(statistics.median(timings), 1),
+        'wall_ms_min': round(min(timings), 1),
+        'import_ms': round(import_ms, 1),
+        'top_imports': [{'module': m, 'cumulative_ms': round(ms, 1)} for m, ms in top_level[:TOP_IMPORTS]],
+        'pandas_loaded': 'pandas' in modules,
+        'modules_loaded': len(modules),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Arranque en frío del CLI de importación')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--filas', type=int, default=200, help='Filas de la entrada sintética')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--casos', default=','.join(SCENARIOS), help='Casos a ejecutar, separados por coma')
+    parser.add_argument('--salida', default=DEFAULT_RESULTS, help='Archivo JSON de resultados')
+    args = parser.parse_args()
+
+    cases = [c for c in args.casos.split(',') if c]
+    unknown = [c for c in cases if c not in SCENARIOS]
+    if unknown:
+        print(f"❌ ERROR: Casos desconocidos: {unknown}. Disponibles: {list(SCENARIOS)}")
+        sys.exit(1)
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rows': args.filas,
+        'repeats': args.repeticiones,
+        'runs': [],
+    }
+
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    try:
+        for case in cases:
+            print(f"⏱️  {case}...", end=' ', flush=True)
+            outcome = run_scenario(case, args.filas, args.semilla, args.repeticiones, workdir)
+            results['runs'].append({'case': case, **outcome})
+            if outcome['status'] != 'ok':
+                print(f"{outcome['status'].upper()} ({outcome['motivo']})")
+                continue
+            heavy = ', '.join(f"{i['module']} {i['cumulative_ms']:.0f}ms" for i in outcome['top_imports'][:3])
+            pandas = ' [pandas]' if outcome['pandas_loaded'] else ''
+            print(f"{outcome['wall_ms_median']:.0f} ms (imports {outcome['import_ms']:.0f} ms: {heavy}){pandas}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados: {args.salida}")
+
+    if any(run['status'] == 'error' for run in results['runs']):
+        print("\n❌ Hubo casos con error")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
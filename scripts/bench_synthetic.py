@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos (con semilla) para los benchmarks de importación
+Produce volcados de texto crudo, CSV/XLSX de aseguradoras, CSV con nombres de
+brokers y el JSON compacto que consume generate_sql.py, con fechas desordenadas,
+acentos y errores de tipeo como en los archivos reales.
+"""
+
+import csv
+import json
+import random
+import sys
+from datetime import date, timedelta
+
+from broker_directory import DEFAULT_ROSTER, read_roster
+
+FIRST_NAMES = [
+    'JUAN', 'MARÍA', 'JOSÉ', 'ANA', 'LUIS', 'CARMEN', 'ÁNGEL', 'NOÉ', 'ROSA', 'JESÚS',
+    'CARLOS', 'YANITZA', 'DÍDIMO', 'LUCÍA', 'RAÚL', 'INÉS', 'MOISÉS', 'BELÉN', 'IVÁN', 'SOFÍA',
+]
+LAST_NAMES = [
+    'PÉREZ', 'GONZÁLEZ', 'RODRÍGUEZ', 'SAMUDIO', 'CEDEÑO', 'SALDAÑA', 'MUÑOZ', 'CASTILLO',
+    'QUIRÓS', 'HERNÁNDEZ', 'VALDÉS', 'MONTAÑEZ', 'JIMÉNEZ', 'ARCIA', 'BOSQUEZ', 'DE GRACIA',
+]
+ADDRESSES = ['CALLE 50, PANAMA', 'VIA ESPAÑA, SAN MIGUELITO', 'COSTA DEL ESTE', 'DAVID, CHIRIQUÍ']
+RAMOS = ['AUTO', 'VIDA', 'SALUD', 'INCENDIO', 'RESPONSABILIDAD CIVIL', 'VIAJE']
+
+# (aseguradora, función que genera el número de póliza en su formato)
+INSURERS = [
+    ('ASSA', lambda r: f"{r.randint(1, 30):02d}{r.choice(['A', 'B', 'BR', 'G'])}{r.randint(0, 99999):05d}"),
+    ('FEDPA', lambda r: f"{r.randint(1, 9):02d}-{r.randint(1, 9):02d}-{r.randint(0, 999999):06d}-{r.randint(0, 9)}"),
+    ('ANCON', lambda r: f"{r.randint(100, 999):04d}-{r.randint(0, 99999):05d}-{r.randint(0, 9):02d}"),
+    ('INTERNACIONAL', lambda r: f"1-30-{r.randint(1, 999999)}"),
+    ('ASSISTCARD', lambda r: f"{r.randint(100000000, 999999999)}"),
+    ('MAPFRE', lambda r: f"{r.randint(10**11, 10**12 - 1):012d}"),
+]
+
+_ROSTER = read_roster(DEFAULT_ROSTER)
+BROKER_NAMES = sorted(name for row in _ROSTER for name in [row['name'], *row['aliases']])
+BROKER_EMAILS = sorted({row['email'] for row in _ROSTER})
+
+ACCENTS = str.maketrans('ÁÉÍÓÚÑ', 'AEIOUN')
+
+
+def _typo(rnd, text):
+    """Introduce un error de tipeo (letra duplicada, omitida o intercambiada)"""
+    if len(text) < 4:
+        return text
+    i = rnd.randint(1, len(text) - 2)
+    kind = rnd.randint(0, 2)
+    if kind == 0:
+        return text[:i] + text[i] + text[i:]
+    if kind == 1:
+        return text[:i] + text[i + 1:]
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def _messy(rnd, text, typo_rate=0.02, unaccent_rate=0.3):
+    """Variantes reales: sin acentos, minúsculas, espacios extra, errores de tipeo"""
+    if rnd.random() < unaccent_rate:
+        text = text.translate(ACCENTS)
+    if rnd.random() < typo_rate:
+        text = _typo(rnd, text)
+    if rnd.random() < 0.05:
+        text = text.lower()
+    if rnd.random() < 0.05:
+        text = f" {text}  "
+    return text
+
+
+def _messy_date(rnd, value, formats):
+    """Fecha en un formato al azar, ocasionalmente vacía o inválida"""
+    roll = rnd.random()
+    if roll < 0.02:
+        return ''
+    if roll < 0.03:
+        return '31/02/24'
+    fmt = rnd.choice(formats)
+    text = value.strftime(fmt)
+    if fmt.startswith('%d/%m') and rnd.random() < 0.3:
+        # 02/06/25 → 2/6/25
+        day, month, year = text.split('/')
+        text = f"{int(day)}/{int(month)}/{year}"
+    return text
+
+
+def synthetic_policy(rnd, i):
+    """Una póliza sintética con valores ya limpios"""
+    insurer, policy_fn = rnd.choice(INSURERS)
+    start = date(2019, 1, 1) + timedelta(days=rnd.randint(0, 6 * 365))
+    return {
+        'client_name': f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {rnd.choice(LAST_NAMES)}",
+        'national_id': f"{rnd.randint(1, 9)}-{rnd.randint(1, 999)}-{rnd.randint(1, 9999)}",
+        'email': f"cliente{i}@correo.com" if rnd.random() < 0.6 else None,
+        'phone': f"6{rnd.randint(0, 9999999):07d}" if rnd.random() < 0.7 else None,
+        'address': rnd.choice(ADDRESSES) if rnd.random() < 0.5 else None,
+        'policy_number': policy_fn(rnd),
+        'insurer_name': insurer,
+        'ramo': rnd.choice(RAMOS),
+        'start_date': start,
+        'renewal_date': start + timedelta(days=365),
+        'broker_email': rnd.choice(BROKER_EMAILS),
+        'broker_name': rnd.choice(BROKER_NAMES),
+        'percent_override': rnd.choice([0.94, 1.0, 0.8, 0.5]),
+    }
+
+
+def write_raw_dump(path, rows, seed=42):
+    """Volcado de texto con columnas separadas por 2+ espacios (parse_bulk_data.py)"""
+    rnd = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('client_name  national_id  email  phone  address  policy_number  insurer_name  ramo  '
+                'start_date  renewal_date  status  broker_email  percent_override\n')
+        for i in range(rows):
+            p = synthetic_policy(rnd, i)
+            fields = [_messy(rnd, p['client_name']), p['national_id']]
+            if p['email']:
+                fields.append(p['email'])
+            if p['phone']:
+                fields.append(p['phone'])
+            if p['address']:
+                fields.append(p['address'])
+            fields += [
+                p['policy_number'],
+                p['insurer_name'],
+                p['ramo'],
+                _messy_date(rnd, p['start_date'], ['%d/%m/%y']),
+                _messy_date(rnd, p['renewal_date'], ['%d/%m/%y']),
+                '1',
+                p['broker_email'] if rnd.random() > 0.005 else 'SIN CORREO',
+                str(p['percent_override']).replace('.', ',') if rnd.random() < 0.2 else str(p['percent_override']),
+            ]
+            f.write('  '.join(fields) + '\n')
+
+
+INSURER_FILE_HEADERS = [
+    'Nombre_Cliente', 'Cédula', 'Correo', 'Teléfono', 'Póliza', 'Aseguradora',
+    'Tipo', 'Fecha_Inicio', 'Fecha_Renovacion', 'Broker', 'Comisión',
+]
+
+
+def _insurer_file_rows(rows, seed):
+    rnd = random.Random(seed)
+    formats = ['%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d']
+    for i in range(rows):
+        p = synthetic_policy(rnd, i)
+        yield [
+            _messy(rnd, p['client_name']),
+            p['national_id'],
+            p['email'] or '',
+            p['phone'] or '',
+            p['policy_number'] if rnd.random() > 0.01 else '',
+            _messy(rnd, p['insurer_name'], typo_rate=0, unaccent_rate=0),
+            p['ramo'],
+            _messy_date(rnd, p['start_date'], formats),
+            _messy_date(rnd, p['renewal_date'], formats),
+            p['broker_email'],
+            str(p['percent_override']),
+        ]
+
+
+def write_insurer_csv(path, rows, seed=42):
+    """CSV de aseguradora con encabezados en español (excel_to_bulk_import.py)"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(INSURER_FILE_HEADERS)
+        writer.writerows(_insurer_file_rows(rows, seed))
+
+
+def write_insurer_xlsx(path, rows, seed=42):
+    """Mismo contenido que write_insurer_csv en XLSX (requiere openpyxl)"""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Cartera')
+    ws.append(INSURER_FILE_HEADERS)
+    for row in _insurer_file_rows(rows, seed):
+        ws.append(row)
+    wb.save(path)
+
+
+def write_insurer_workbook(path, rows, seed=42, sheets=4):
+    """Libro con una hoja por mes, `rows` filas repartidas entre las hojas (requiere openpyxl)"""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    per_sheet = -(-rows // sheets)
+    for n in range(sheets):
+        ws = wb.create_sheet(f'Mes{n + 1:02d}')
+        ws.append(INSURER_FILE_HEADERS)
+        count = min(per_sheet, rows - n * per_sheet)
+        for row in _insurer_file_rows(max(count, 0), seed + n):
+            ws.append(row)
+    wb.save(path)
+
+
+def write_broker_names_csv(path, rows, seed=42):
+    """CSV con nombres de broker en broker_email (fix_broker_names_to_emails.py)"""
+    rnd = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['client_name', 'policy_number', 'insurer_name', 'broker_email'])
+        for i in range(rows):
+            p = synthetic_policy(rnd, i)
+            broker = p['broker_email'] if rnd.random() < 0.1 else _messy(rnd, p['broker_name'])
+            writer.writerow([p['client_name'], p['policy_number'], p['insurer_name'], broker])
+
+
+def write_compact_json(path, rows, seed=42):
+    """JSON compacto ya limpio, como el *_IMPORT_COMPACT.json (generate_sql.py)"""
+    rnd = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for i in range(rows):
+            p = synthetic_policy(rnd, i)
+            record = {
+                'client_name': p['client_name'],
+                'national_id': p['national_id'],
+                'email': p['email'],
+                'phone': p['phone'],
+                'policy_number': p['policy_number'],
+                'insurer_name': p['insurer_name'],
+                'ramo': p['ramo'],
+                'start_date': p['start_date'].isoformat(),
+                'renewal_date': p['renewal_date'].isoformat(),
+                'broker_email': p['broker_email'],
+                'percent_override': p['percent_override'],
+            }
+            if i:
+                f.write(',')
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        f.write(']')
+
+
+GENERATORS = {
+    'raw': write_raw_dump,
+    'csv': write_insurer_csv,
+    'xlsx': write_insurer_xlsx,
+    'xlsx_hojas': write_insurer_workbook,
+    'brokers': write_broker_names_csv,
+    'json': write_compact_json,
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 4 or sys.argv[1] not in GENERATORS:
+        print(f"Uso: python bench_synthetic.py <{'|'.join(GENERATORS)}> <filas> <salida> [semilla]")
+        sys.exit(1)
+
+    kind, rows, output = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 42
+    GENERATORS[kind](output, rows, seed)
+    print(f"💾 {rows:,} filas sintéticas ({kind}) guardadas en: {output}")
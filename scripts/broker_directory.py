@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Directorio de brokers (nombre / alias → email) con índice precalculado
+Lee el roster desde un archivo de datos (CSV name,email,aliases o JSON) o un
+export de la tabla brokers, y calcula para cada nombre y alias una clave
+normalizada: sin acentos, espacios colapsados y palabras ordenadas
+('NUÑEZ ELENA' y 'Elena  Nunez' → 'ELENA NUNEZ'). El índice se guarda en una
+caché binaria junto al roster y solo se reconstruye cuando el archivo cambia,
+así buscar un nombre es una sola consulta al dict aunque el roster crezca.
+
+Uso:
+  python broker_directory.py info [--roster brokers_directorio.csv]
+  python broker_directory.py buscar "ELENA NUNEZ" "cedeno edwin" [--roster ...]
+  python broker_directory.py reconstruir [--roster ...]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+from name_keys import name_key
+
+DEFAULT_ROSTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'brokers_directorio.csv')
+# Subir si cambia name_key (name_keys.py) o el formato de la caché
+CACHE_VERSION = 1
+ALIAS_SEPARATOR = '|'
+
+NAME_FIELDS = ('name', 'nombre', 'broker', 'broker_name')
+EMAIL_FIELDS = ('email', 'correo', 'broker_email')
+ALIAS_FIELDS = ('aliases', 'alias')
+
+
+def _first(row, fields):
+    for field in fields:
+        value = row.get(field)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def read_roster(path):
+    """Filas {name, email, aliases[]} de un CSV, un JSON (lista u objeto nombre→email)"""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [{'name': name, 'email': email} for name, email in data.items()]
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            data = list(csv.DictReader(f))
+
+    rows = []
+    for row in data:
+        aliases = _first(row, ALIAS_FIELDS) or []
+        if isinstance(aliases, str):
+            aliases = [alias for alias in aliases.split(ALIAS_SEPARATOR) if alias.strip()]
+        rows.append({'name': _first(row, NAME_FIELDS), 'email': _first(row, EMAIL_FIELDS), 'aliases': aliases})
+    return rows
+
+
+def build_index(rows):
+    """({clave: email}, conflictos): una clave con dos emails distintos conserva el primero"""
+    index = {}
+    conflicts = []
+    for row in rows:
+        email = (row['email'] or '').strip()
+        if not email:
+            continue
+        for name in [row['name'], *row['aliases']]:
+            key = name_key(name)
+            if key is None:
+                continue
+            current = index.setdefault(key, email)
+            if current != email:
+                conflicts.append((name, current, email))
+    return index, conflicts
+
+
+def default_cache_path(roster):
+    roster = os.path.abspath(roster)
+    return os.path.join(os.path.dirname(roster), '.cache', os.path.basename(roster) + '.pickle')
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+        return None
+    return cache
+
+
+def _write_cache(cache_path, cache):
+    # Sin permisos de escritura se sigue sin caché
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp = f"{cache_path}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
+
+
+class BrokerDirectory:
+    """Índice clave normalizada → email"""
+
+    def __init__(self, index, conflicts=(), source=None, sha256=None, cached=False):
+        self.index = index
+        self.conflicts = list(conflicts)
+        self.source = source
+        self.sha256 = sha256
+        # True si el índice salió de la caché sin releer el roster
+        self.cached = cached
+
+    def __len__(self):
+        return len(self.index)
+
+    def lookup(self, name):
+        """Email del broker o None"""
+        return self.index.get(name_key(name))
+
+    @property
+    def emails(self):
+        return set(self.index.values())
+
+    @classmethod
+    def load(cls, roster=DEFAULT_ROSTER, cache_path=None, rebuild=False):
+        """
+        Carga el índice desde la caché si el roster no cambió (tamaño + mtime,
+        o el mismo SHA-256 si solo cambió el mtime); si no, lo reconstruye.
+        """
+        cache_path = cache_path or default_cache_path(roster)
+        stat = os.stat(roster)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+
+        cache = None if rebuild else _read_cache(cache_path)
+        if cache is not None and cache['stamp'] == stamp:
+            return cls(cache['index'], cache['conflicts'], roster, cache['sha256'], cached=True)
+
+        sha256 = _file_sha256(roster)
+        if cache is not None and cache['sha256'] == sha256:
+            cache['stamp'] = stamp
+            _write_cache(cache_path, cache)
+            return cls(cache['index'], cache['conflicts'], roster, sha256, cached=True)
+
+        index, conflicts = build_index(read_roster(roster))
+        _write_cache(cache_path, {
+            'version': CACHE_VERSION,
+            'stamp': stamp,
+            'sha256': sha256,
+            'index': index,
+            'conflicts': conflicts,
+        })
+        return cls(index, conflicts, roster, sha256)
+
+    def print_summary(self):
+        origin = 'caché' if self.cached else 'roster'
+        print(f"📇 Directorio de brokers: {len(self.emails)} brokers, {len(self.index)} claves ({origin})")
+        print(f"   Roster: {self.source} (sha256 {self.sha256[:12]})")
+        if self.conflicts:
+            print(f"   ⚠️  {len(self.conflicts)} nombres con más de un email (se usa el primero):")
+            for name, kept, ignored in self.conflicts:
+                print(f"      - {name}: {kept} (ignorado: {ignored})")
+
+
+_loaded = {}
+
+
+def get_directory(roster=DEFAULT_ROSTER):
+    """
+    Directorio compartido por el proceso (p. ej. el worker caliente): se
+    reutiliza entre llamadas y se recarga solo si cambió el tamaño o el mtime del roster.
+    """
+    path = os.path.abspath(roster)
+    stat = os.stat(path)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    entry = _loaded.get(path)
+    if entry is None or entry[0] != stamp:
+        entry = _loaded[path] = (stamp, BrokerDirectory.load(path))
+    return entry[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Directorio de brokers con índice normalizado')
+    parser.add_argument('--roster', default=DEFAULT_ROSTER, help='CSV name,email,aliases o JSON')
+    sub = parser.add_subparsers(dest='accion', required=True)
+    sub.add_parser('info', help='Resumen del directorio')
+    p = sub.add_parser('buscar', help='Buscar emails por nombre')
+    p.add_argument('nombres', nargs='+')
+    sub.add_parser('reconstruir', help='Ignorar la caché y reconstruir el índice')
+    args = parser.parse_args()
+
+    directory = BrokerDirectory.load(args.roster, rebuild=args.accion == 'reconstruir')
+    if args.accion != 'buscar':
+        directory.print_summary()
+        return
+
+    missing = 0
+    for name in args.nombres:
+        email = directory.lookup(name)
+        missing += email is None
+        print(f"{name!r} → {email or '❌ no encontrado'}  [{name_key(name)}]")
+    sys.exit(1 if missing else 0)
+
+
+if __name__ == '__main__':
+    main()
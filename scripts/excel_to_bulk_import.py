@@ -1,24 +1,37 @@
 #!/usr/bin/env python3
 """
 Script para convertir Excel/CSV a formato JSON para bulk import
-Requiere: pip install pandas openpyxl
+Requiere: pip install pandas openpyxl (solo para Excel y CSV grandes;
+los CSV chicos se leen con el módulo csv y no cargan pandas)
 """
 
-import pandas as pd
-import json
+import csv
+import os
 import sys
 from datetime import datetime
 import re
 
+from import_profiling import StageProfiler, profiler_from_argv
+from import_shards import SHARD_KEYS, print_shards_summary, write_shards
+from import_sources import TABLE_EXTENSIONS, is_archive, iter_sources
+from import_validation import IMPORT_RULES, validate
+from policy_keys import clean_policy_number
+from reference_snapshot import DEFAULT_SNAPSHOT, load_references
+from record_store import CATEGORY_FIELDS, RecordStore
+
+def is_missing(value):
+    """None, NaN o NaT (equivalente a pd.isna para celdas sueltas)"""
+    return value is None or value != value
+
 def clean_field(value):
     """Limpia un campo eliminando espacios y valores vacíos"""
-    if pd.isna(value) or value == '' or str(value).strip() == '':
+    if is_missing(value) or value == '' or str(value).strip() == '':
         return None
     return str(value).strip()
 
 def parse_date(value):
     """Convierte fecha a formato YYYY-MM-DD"""
-    if pd.isna(value):
+    if is_missing(value):
         return None
     
     # Si ya es datetime
@@ -49,12 +62,11 @@ def parse_date(value):
         except ValueError:
             continue
     
-    print(f"⚠️  No se pudo parsear fecha: {value_str}")
     return None
 
 def parse_commission(value):
     """Convierte comisión a float"""
-    if pd.isna(value) or value == '':
+    if is_missing(value) or value == '':
         return None
     
     try:
@@ -62,172 +74,488 @@ def parse_commission(value):
         value_str = str(value).replace(',', '.')
         return float(value_str)
     except:
-        print(f"⚠️  No se pudo parsear comisión: {value}")
         return None
 
-def process_excel(file_path):
-    """Procesa archivo Excel/CSV y genera JSON"""
-    print(f"📖 Leyendo archivo: {file_path}")
+# Mapeo de columnas (ajusta según tus nombres de columnas)
+COLUMN_MAPPING = {
+    # Nombres posibles → nombre estándar
+    'client_name': 'client_name',
+    'nombre_cliente': 'client_name',
+    'nombre': 'client_name',
+    'client': 'client_name',
     
-    # Detectar tipo de archivo y leer
-    if file_path.endswith('.csv'):
-        df = pd.read_csv(file_path, encoding='utf-8')
+    'national_id': 'national_id',
+    'cedula': 'national_id',
+    'cédula': 'national_id',
+    'ruc': 'national_id',
+    'id': 'national_id',
+    
+    'email': 'email',
+    'correo': 'email',
+    'email_cliente': 'email',
+    
+    'phone': 'phone',
+    'telefono': 'phone',
+    'teléfono': 'phone',
+    'cel': 'phone',
+    'celular': 'phone',
+    
+    'policy_number': 'policy_number',
+    'numero_poliza': 'policy_number',
+    'número_póliza': 'policy_number',
+    'poliza': 'policy_number',
+    'póliza': 'policy_number',
+    'no_poliza': 'policy_number',
+    
+    'insurer_name': 'insurer_name',
+    'aseguradora': 'insurer_name',
+    'insurer': 'insurer_name',
+    'compañia': 'insurer_name',
+    
+    'ramo': 'ramo',
+    'tipo_poliza': 'ramo',
+    'tipo_póliza': 'ramo',
+    'tipo': 'ramo',
+    
+    'start_date': 'start_date',
+    'fecha_inicio': 'start_date',
+    'inicio': 'start_date',
+    
+    'renewal_date': 'renewal_date',
+    'fecha_renovacion': 'renewal_date',
+    'renovacion': 'renewal_date',
+    'renovación': 'renewal_date',
+    
+    'broker_email': 'broker_email',
+    'email_broker': 'broker_email',
+    'correo_broker': 'broker_email',
+    'broker': 'broker_email',
+    
+    'percent_override': 'percent_override',
+    'comision': 'percent_override',
+    'comisión': 'percent_override',
+    'porcentaje': 'percent_override',
+    'commission': 'percent_override',
+}
+
+# Campos del JSON final (orden de bulk_import_clients_policies)
+RECORD_FIELDS = [
+    'client_name', 'national_id', 'email', 'phone', 'policy_number',
+    'insurer_name', 'ramo', 'start_date', 'renewal_date', 'broker_email',
+    'percent_override',
+]
+
+# Columnas identificadoras: se leen como texto para que Excel/pandas no
+# conviertan números de póliza o cédulas a float / notación científica
+IDENTIFIER_COLUMNS = {'policy_number', 'national_id', 'phone'}
+
+def identifier_dtypes(columns):
+    """Devuelve {columna_original: str} para las columnas identificadoras"""
+    dtypes = {}
+    for col in columns:
+        normalized = str(col).strip().lower()
+        if COLUMN_MAPPING.get(normalized) in IDENTIFIER_COLUMNS:
+            dtypes[col] = str
+    return dtypes
+
+# CSV hasta este tamaño se leen con el módulo csv: sin importar pandas el
+# script arranca en milisegundos; los más grandes (y Excel) usan pandas
+FAST_PATH_MAX_BYTES = 20 * 1024 * 1024
+
+# Libros con una hoja por ramo o por mes: --hojas todas | --hojas Enero,Febrero
+ALL_SHEETS = 'todas'
+SHEET_FIELD = 'source_sheet'
+
+REQUIRED_COLUMNS = ['client_name', 'policy_number', 'insurer_name', 'broker_email', 'start_date', 'renewal_date']
+
+class MissingColumnsError(Exception):
+    """
+    A la fuente (o a alguna de sus hojas) le faltan columnas obligatorias.
+    records: los registros de las hojas que sí se procesaron (None si ninguna).
+    """
+    
+    def __init__(self, missing, records=None):
+        super().__init__(f"Faltan columnas obligatorias: {missing}")
+        self.missing = missing
+        self.records = records
+
+def choose_reader(source, reader='auto'):
+    """Decide el lector: 'csv' (stdlib) o 'pandas'"""
+    if reader != 'auto':
+        return reader
+    if source.extension == '.csv' and source.size is not None and source.size <= FAST_PATH_MAX_BYTES:
+        return 'csv'
+    return 'pandas'
+
+def read_csv_rows(source):
+    """
+    Lee CSV con el módulo csv: todas las celdas quedan como texto.
+    Las filas se devuelven como generador: se leen a medida que se transforman
+    y nunca están todas en memoria junto con el RecordStore.
+    """
+    f = source.open_text(encoding='utf-8-sig', newline='')
+    reader = csv.reader(f)
+    columns = next(reader, [])
+    
+    def rows():
+        with f:
+            # pandas también omite las líneas en blanco
+            for row in reader:
+                if row:
+                    yield row
+    
+    return columns, rows()
+
+def read_pandas_rows(source):
+    """Lee Excel/CSV con pandas, con las columnas identificadoras como texto"""
+    import pandas as pd
+    
+    if source.extension == '.csv':
+        with source.open_binary() as f:
+            header = pd.read_csv(f, encoding='utf-8', nrows=0)
+        with source.open_binary() as f:
+            df = pd.read_csv(f, encoding='utf-8', dtype=identifier_dtypes(header.columns))
     else:
-        df = pd.read_excel(file_path)
-    
-    print(f"📊 Filas leídas: {len(df)}")
-    print(f"📋 Columnas: {list(df.columns)}")
-    
-    # Mapeo de columnas (ajusta según tus nombres de columnas)
-    column_mapping = {
-        # Nombres posibles → nombre estándar
-        'client_name': 'client_name',
-        'nombre_cliente': 'client_name',
-        'nombre': 'client_name',
-        'client': 'client_name',
-        
-        'national_id': 'national_id',
-        'cedula': 'national_id',
-        'cédula': 'national_id',
-        'ruc': 'national_id',
-        'id': 'national_id',
-        
-        'email': 'email',
-        'correo': 'email',
-        'email_cliente': 'email',
-        
-        'phone': 'phone',
-        'telefono': 'phone',
-        'teléfono': 'phone',
-        'cel': 'phone',
-        'celular': 'phone',
-        
-        'policy_number': 'policy_number',
-        'numero_poliza': 'policy_number',
-        'número_póliza': 'policy_number',
-        'poliza': 'policy_number',
-        'póliza': 'policy_number',
-        'no_poliza': 'policy_number',
-        
-        'insurer_name': 'insurer_name',
-        'aseguradora': 'insurer_name',
-        'insurer': 'insurer_name',
-        'compañia': 'insurer_name',
-        
-        'ramo': 'ramo',
-        'tipo_poliza': 'ramo',
-        'tipo_póliza': 'ramo',
-        'tipo': 'ramo',
-        
-        'start_date': 'start_date',
-        'fecha_inicio': 'start_date',
-        'inicio': 'start_date',
-        
-        'renewal_date': 'renewal_date',
-        'fecha_renovacion': 'renewal_date',
-        'renovacion': 'renewal_date',
-        'renovación': 'renewal_date',
-        
-        'broker_email': 'broker_email',
-        'email_broker': 'broker_email',
-        'correo_broker': 'broker_email',
-        'broker': 'broker_email',
+        # XLSX necesita acceso aleatorio: ruta directa o buffer en memoria
+        return read_sheet(source.seekable_buffer(), 0)
+    # Generador sobre el DataFrame: sin una copia de las filas como tuplas
+    return list(df.columns), df.itertuples(index=False, name=None)
+
+def read_sheet(data, sheet):
+    """Lee una hoja de Excel (nombre o posición) como (columnas, filas)"""
+    import pandas as pd
+    
+    header = pd.read_excel(data, sheet_name=sheet, nrows=0)
+    if hasattr(data, 'seek'):
+        data.seek(0)
+    df = pd.read_excel(data, sheet_name=sheet, dtype=identifier_dtypes(header.columns))
+    return list(df.columns), list(df.itertuples(index=False, name=None))
+
+def read_table(source, reader='auto'):
+    """
+    Devuelve (columnas, filas) con cada fila como tupla/lista de celdas.
+    Las filas son una lista (Excel) o un generador (CSV) que se consume una vez.
+    """
+    if choose_reader(source, reader) == 'csv':
+        return read_csv_rows(source)
+    return read_pandas_rows(source)
+
+def resolve_columns(columns):
+    """
+    Normaliza los encabezados y los resuelve con COLUMN_MAPPING.
+    Devuelve (encabezados normalizados, {campo estándar: posición}).
+    Si dos columnas mapean al mismo campo gana el primer alias del mapeo.
+    """
+    normalized = [str(col).strip().lower() for col in columns]
+    first_position = {}
+    for i, name in enumerate(normalized):
+        first_position.setdefault(name, i)
+    
+    positions = {}
+    for old_name, new_name in COLUMN_MAPPING.items():
+        if old_name in first_position and new_name not in positions:
+            positions[new_name] = first_position[old_name]
+    return [COLUMN_MAPPING.get(name, name) for name in normalized], positions
+
+def transform_rows(rows, positions, first_row=2):
+    """
+    Convierte filas crudas a registros (sin validar: la validación corre por columnas).
+    Devuelve (RecordStore, columnas con valores crudos no parseables, números de fila).
+    """
+    def cell(row, field):
+        i = positions.get(field)
+        return row[i] if i is not None and i < len(row) else None
+    
+    store = RecordStore(RECORD_FIELDS)
+    raw_columns = {'start_date_raw': [], 'renewal_date_raw': [], 'percent_override_raw': []}
+    row_numbers = []
+    
+    for idx, row in enumerate(rows):
+        client_name = clean_field(cell(row, 'client_name'))
+        insurer_name = clean_field(cell(row, 'insurer_name'))
+        broker_email = clean_field(cell(row, 'broker_email'))
+        email = clean_field(cell(row, 'email'))
+        ramo = clean_field(cell(row, 'ramo'))
+        start_date = parse_date(cell(row, 'start_date'))
+        renewal_date = parse_date(cell(row, 'renewal_date'))
+        percent_override = parse_commission(cell(row, 'percent_override'))
         
-        'percent_override': 'percent_override',
-        'comision': 'percent_override',
-        'comisión': 'percent_override',
-        'porcentaje': 'percent_override',
-        'commission': 'percent_override',
+        store.append({
+            'client_name': client_name.upper() if client_name else None,
+            'national_id': clean_field(cell(row, 'national_id')),
+            'email': email.lower() if email and '@' in email else None,
+            'phone': clean_field(cell(row, 'phone')),
+            'policy_number': clean_policy_number(clean_field(cell(row, 'policy_number'))),
+            'insurer_name': insurer_name.upper() if insurer_name else None,
+            'ramo': ramo.upper() if ramo else None,
+            'start_date': start_date,
+            'renewal_date': renewal_date,
+            'broker_email': broker_email.lower() if broker_email else None,
+            'percent_override': percent_override,
+        })
+        # Valor crudo solo cuando no se pudo parsear (para el reporte)
+        raw_columns['start_date_raw'].append(None if start_date else clean_field(cell(row, 'start_date')))
+        raw_columns['renewal_date_raw'].append(None if renewal_date else clean_field(cell(row, 'renewal_date')))
+        raw_columns['percent_override_raw'].append(None if percent_override is not None else clean_field(cell(row, 'percent_override')))
+        row_numbers.append(idx + first_row)
+    
+    return store, raw_columns, row_numbers
+
+def parse_sheet_option(value):
+    """'todas' → ALL_SHEETS, 'Enero,Febrero' → ['Enero', 'Febrero'], None → None (primera hoja)"""
+    if not value:
+        return None
+    if value.strip().lower() == ALL_SHEETS:
+        return ALL_SHEETS
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+def transform_sheet(data, sheet):
+    """
+    Lee una hoja, resuelve sus encabezados y transforma sus filas.
+    Corre en un proceso del pool: `data` es la ruta del libro o sus bytes.
+    """
+    import io
+    import time
+    
+    start = time.perf_counter()
+    if isinstance(data, bytes):
+        data = io.BytesIO(data)
+    columns, rows = read_sheet(data, sheet)
+    normalized, positions = resolve_columns(columns)
+    result = {
+        'sheet': sheet,
+        'rows': len(rows),
+        'columns': normalized,
+        'missing': [col for col in REQUIRED_COLUMNS if col not in positions],
+        'store': None,
     }
+    if not result['missing']:
+        store, raw_columns, row_numbers = transform_rows(rows, positions)
+        result.update({
+            'store': store,
+            'raw_columns': raw_columns,
+            # Fila con su hoja para que el reporte de errores sea inequívoco
+            'row_numbers': [f"{sheet}!{n}" for n in row_numbers],
+        })
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def process_excel(file_path, profiler=None, reader='auto', sheets=None, workers=None, shard_by=None,
+                  references=None):
+    """
+    Procesa archivo Excel/CSV (también .gz/.bz2/.xz o un .zip con varios) y genera JSON.
+    reader: 'auto', 'csv' o 'pandas'.
+    sheets: None (primera hoja), ALL_SHEETS o lista de nombres; con varias hojas
+    cada una se lee y transforma en un proceso aparte y la salida se une con
+    la columna source_sheet.
+    shard_by: 'broker' o 'aseguradora' para escribir además un JSON por valor
+    en <base>_SHARDS/ con su index.json.
+    references: ReferenceData (reference_snapshot) para validar/remapear
+    broker_email, insurer_name y ramo contra el snapshot local.
+    Devuelve los registros; para un ZIP, {miembro: registros} con una salida por miembro.
+    Un miembro sin las columnas obligatorias se omite y los demás se procesan
+    igual; al final se sale con código 1.
+    """
+    if profiler is None:
+        profiler = StageProfiler()
+    
+    if not is_archive(file_path):
+        source = next(iter_sources(file_path))
+        try:
+            return process_source(source, profiler, reader, sheets, workers, shard_by, references)
+        except MissingColumnsError:
+            sys.exit(1)
     
-    # Normalizar nombres de columnas
-    df.columns = df.columns.str.strip().str.lower()
-    
-    # Renombrar columnas según mapeo
-    for old_name, new_name in column_mapping.items():
-        if old_name in df.columns:
-            df = df.rename(columns={old_name: new_name})
-    
-    print(f"\n📋 Columnas después de normalizar: {list(df.columns)}")
-    
-    # Verificar columnas obligatorias
-    required_cols = ['client_name', 'policy_number', 'insurer_name', 'broker_email', 'start_date', 'renewal_date']
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    
-    if missing_cols:
-        print(f"\n❌ ERROR: Faltan columnas obligatorias: {missing_cols}")
-        print(f"\n💡 TIP: Asegúrate de que tu archivo tenga estas columnas:")
-        print(f"   - client_name (nombre del cliente)")
-        print(f"   - policy_number (número de póliza)")
-        print(f"   - insurer_name (aseguradora)")
-        print(f"   - broker_email (email del broker)")
-        print(f"   - start_date (fecha inicio)")
-        print(f"   - renewal_date (fecha renovación)")
+    results = {}
+    skipped = []
+    for i, source in enumerate(iter_sources(file_path, TABLE_EXTENSIONS)):
+        # Un perfil por miembro (cada uno escribe su propio _PERFIL.json)
+        member_profiler = profiler if i == 0 else StageProfiler(profiler.enabled, profiler.use_cprofile)
+        print(f"\n{'=' * 60}\n📦 {source.name}\n{'=' * 60}")
+        try:
+            results[source.name] = process_source(source, member_profiler, reader, sheets, workers, shard_by,
+                                                   references)
+        except MissingColumnsError as e:
+            if e.records is not None:
+                results[source.name] = e.records
+            print(f"\n⚠️  {source.name} {'incompleto' if e.records is not None else 'omitido'}: faltan {e.missing}")
+            skipped.append(source.name)
+    
+    if not results and not skipped:
+        print(f"❌ ERROR: El archivo {file_path} no contiene CSV ni Excel")
+        sys.exit(1)
+    if skipped:
+        print(f"\n❌ ERROR: {len(skipped)} archivos con columnas faltantes (omitidos o con hojas omitidas): {skipped}")
         sys.exit(1)
+    return results
+
+def print_missing_columns(missing_cols):
+    print(f"\n❌ ERROR: Faltan columnas obligatorias: {missing_cols}")
+    print(f"\n💡 TIP: Asegúrate de que tu archivo tenga estas columnas:")
+    print(f"   - client_name (nombre del cliente)")
+    print(f"   - policy_number (número de póliza)")
+    print(f"   - insurer_name (aseguradora)")
+    print(f"   - broker_email (email del broker)")
+    print(f"   - start_date (fecha inicio)")
+    print(f"   - renewal_date (fecha renovación)")
+
+def process_source(source, profiler, reader='auto', sheets=None, workers=None, shard_by=None, references=None):
+    """Procesa una fuente (archivo plano, comprimido o miembro de ZIP)"""
+    profiler.output_base = source.output_base
+    
+    if sheets and source.extension != '.csv':
+        return process_workbook(source, profiler, sheets, workers, shard_by, references)
+    if sheets:
+        print(f"⚠️  --hojas no aplica a CSV ({source.name} no tiene hojas): se procesa el archivo completo")
+    
+    print(f"📖 Leyendo archivo: {source.name}")
+    
+    # Detectar tipo de archivo y leer
+    with profiler.stage('leer') as stage:
+        columns, rows = read_table(source, reader)
+        # Los CSV se leen en streaming dentro de 'normalizar'
+        stage.rows = len(rows) if isinstance(rows, list) else None
+    
+    print(f"📋 Columnas: {columns}")
     
-    # Procesar cada fila
-    records = []
-    skipped = 0
-    
-    for idx, row in df.iterrows():
-        # Campos obligatorios
-        client_name = clean_field(row.get('client_name'))
-        policy_number = clean_field(row.get('policy_number'))
-        insurer_name = clean_field(row.get('insurer_name'))
-        broker_email = clean_field(row.get('broker_email'))
-        start_date = parse_date(row.get('start_date'))
-        renewal_date = parse_date(row.get('renewal_date'))
+    with profiler.stage('normalizar') as stage:
+        # Normalizar nombres de columnas y renombrar según mapeo
+        normalized, positions = resolve_columns(columns)
         
-        # Validar campos obligatorios
-        if not all([client_name, policy_number, insurer_name, broker_email]):
-            print(f"⚠️  Fila {idx + 2}: Faltan campos obligatorios - OMITIDA")
-            skipped += 1
-            continue
+        print(f"\n📋 Columnas después de normalizar: {normalized}")
         
-        if not broker_email or '@' not in broker_email:
-            print(f"⚠️  Fila {idx + 2}: Email de broker inválido '{broker_email}' - OMITIDA")
-            skipped += 1
-            continue
+        # Verificar columnas obligatorias
+        missing_cols = [col for col in REQUIRED_COLUMNS if col not in positions]
         
-        # Campos opcionales
-        national_id = clean_field(row.get('national_id'))
-        email = clean_field(row.get('email'))
-        phone = clean_field(row.get('phone'))
-        ramo = clean_field(row.get('ramo'))
-        percent_override = parse_commission(row.get('percent_override'))
+        if missing_cols:
+            print_missing_columns(missing_cols)
+            raise MissingColumnsError(missing_cols)
         
-        record = {
-            'client_name': client_name.upper(),
-            'national_id': national_id,
-            'email': email.lower() if email and '@' in email else None,
-            'phone': phone,
-            'policy_number': policy_number,
-            'insurer_name': insurer_name.upper(),
-            'ramo': ramo.upper() if ramo else None,
-            'start_date': start_date,
-            'renewal_date': renewal_date,
-            'broker_email': broker_email.lower(),
-            'percent_override': percent_override,
-        }
+        # Procesar cada fila
+        store, raw_columns, row_numbers = transform_rows(rows, positions)
+        del rows
+        stage.rows = len(store)
+    
+    print(f"📊 Filas leídas: {len(store)}")
+    
+    return finish_import(source.output_base, store, raw_columns, row_numbers, profiler,
+                         shard_by=shard_by, references=references)
+
+def process_workbook(source, profiler, sheets, workers=None, shard_by=None, references=None):
+    """Procesa varias hojas de un libro en paralelo y las une en una sola salida"""
+    import json
+    from concurrent.futures import ProcessPoolExecutor
+    
+    import pandas as pd
+    
+    print(f"📖 Leyendo libro: {source.name}")
+    
+    data = source.seekable_buffer()
+    # Los procesos reciben la ruta o los bytes del libro (no un buffer abierto)
+    payload = data if isinstance(data, str) else data.getvalue()
+    with pd.ExcelFile(data) as book:
+        available = book.sheet_names
+    selected = available if sheets == ALL_SHEETS else sheets
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        print(f"❌ ERROR: Hojas no encontradas: {unknown}. Disponibles: {available}")
+        sys.exit(1)
+    
+    workers = min(len(selected), workers or os.cpu_count() or 1)
+    print(f"📑 Hojas: {selected} ({workers} procesos)")
+    
+    with profiler.stage('leer_normalizar') as stage:
+        if workers == 1:
+            results = [transform_sheet(payload, sheet) for sheet in selected]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(transform_sheet, [payload] * len(selected), selected))
         
-        records.append(record)
+        # Unir las hojas en un solo store con la columna source_sheet (columna por columna)
+        store = RecordStore(RECORD_FIELDS + [SHEET_FIELD], category_fields=CATEGORY_FIELDS + (SHEET_FIELD,))
+        raw_columns = {'start_date_raw': [], 'renewal_date_raw': [], 'percent_override_raw': []}
+        row_numbers = []
+        for result in results:
+            if result['store'] is None:
+                continue
+            store.append_store(result['store'], fill={SHEET_FIELD: result['sheet']})
+            for field, values in result['raw_columns'].items():
+                raw_columns[field].extend(values)
+            row_numbers.extend(result['row_numbers'])
+        stage.rows = len(store)
+    
+    skipped_sheets = [r for r in results if r['store'] is None]
+    for result in skipped_sheets:
+        print(f"\n⚠️  Hoja '{result['sheet']}' omitida")
+        print_missing_columns(result['missing'])
+    if len(skipped_sheets) == len(results):
+        raise MissingColumnsError(sorted({col for r in skipped_sheets for col in r['missing']}))
+    
+    records = finish_import(source.output_base, store, raw_columns, row_numbers, profiler,
+                            write_profile=False, shard_by=shard_by, references=references)
+    
+    # Estadísticas por hoja
+    accepted = records.counts(SHEET_FIELD)
+    sheet_stats = [{
+        'sheet': r['sheet'],
+        'rows': r['rows'],
+        'records': accepted.get(r['sheet'], 0),
+        'rejected': r['rows'] - accepted.get(r['sheet'], 0) if r['store'] is not None else r['rows'],
+        'missing_columns': r['missing'],
+        'seconds': round(r['seconds'], 3),
+    } for r in results]
+    
+    print(f"\n📑 POR HOJA:")
+    for st in sheet_stats:
+        status = f"omitida (faltan {st['missing_columns']})" if st['missing_columns'] else \
+            f"{st['records']} registros, {st['rejected']} rechazados"
+        print(f"   - {st['sheet']}: {st['rows']} filas → {status} ({st['seconds']:.2f}s)")
+    
+    stats_file = source.output_base + '_HOJAS.json'
+    with open(stats_file, 'w', encoding='utf-8') as f:
+        json.dump(sheet_stats, f, indent=2, ensure_ascii=False)
+    print(f"💾 Estadísticas por hoja: {stats_file}")
+    
+    profiler.write()
+    
+    if skipped_sheets:
+        # Las demás hojas ya quedaron escritas; el llamador sale con código 1
+        raise MissingColumnsError(sorted({col for r in skipped_sheets for col in r['missing']}), records)
+    return records
+
+def finish_import(output_base, store, raw_columns, row_numbers, profiler, write_profile=True, shard_by=None,
+                  references=None):
+    """Valida, resume y escribe los JSON de salida; devuelve los registros aceptados"""
+    with profiler.stage('validar') as stage:
+        # Validar por columnas
+        rules = IMPORT_RULES
+        if references is not None:
+            # Remapear variantes conocidas y rechazar referencias inexistentes
+            references.apply(store)
+            rules = IMPORT_RULES + references.rules()
+        # Cada regla decodifica solo sus columnas (no todo el store a la vez)
+        columns = store.column_view(raw_columns)
+        report = validate(columns, row_numbers, rules)
+        del columns, raw_columns
+        records = store.drop(report.rejected)
+        skipped = len(report.rejected)
+        stage.rows = len(store)
+    
+    report.print_summary()
+    if report.errors:
+        errors_file = report.write(output_base + '_ERRORES.csv')
+        print(f"💾 Detalle de observaciones: {errors_file}")
     
     print(f"\n✅ Registros procesados: {len(records)}")
     print(f"⚠️  Registros omitidos: {skipped}")
     
-    # Estadísticas
-    by_broker = {}
-    by_insurer = {}
-    by_ramo = {}
-    
-    for r in records:
-        # Por broker
-        by_broker[r['broker_email']] = by_broker.get(r['broker_email'], 0) + 1
-        # Por aseguradora
-        by_insurer[r['insurer_name']] = by_insurer.get(r['insurer_name'], 0) + 1
-        # Por ramo
-        if r['ramo']:
-            by_ramo[r['ramo']] = by_ramo.get(r['ramo'], 0) + 1
+    with profiler.stage('agregar') as stage:
+        # Estadísticas (conteo directo sobre las columnas codificadas)
+        by_broker = records.counts('broker_email')
+        by_insurer = records.counts('insurer_name')
+        by_ramo = records.counts('ramo')
+        by_ramo.pop(None, None)
+        stage.rows = len(records)
     
     print(f"\n👥 Brokers únicos: {len(by_broker)}")
     for email, count in sorted(by_broker.items(), key=lambda x: x[1], reverse=True):
@@ -242,19 +570,26 @@ def process_excel(file_path):
         for ramo, count in sorted(by_ramo.items(), key=lambda x: x[1], reverse=True):
             print(f"   - {ramo}: {count} pólizas")
     
-    # Guardar JSON
-    output_file = file_path.rsplit('.', 1)[0] + '_IMPORT.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(records, f, indent=2, ensure_ascii=False)
-    
-    print(f"\n💾 JSON guardado: {output_file}")
-    
-    # Guardar también una versión compacta (para copiar/pegar en SQL)
-    output_file_compact = file_path.rsplit('.', 1)[0] + '_IMPORT_COMPACT.json'
-    with open(output_file_compact, 'w', encoding='utf-8') as f:
-        json.dump(records, f, ensure_ascii=False, separators=(',', ':'))
-    
-    print(f"💾 JSON compacto: {output_file_compact}")
+    with profiler.stage('escribir') as stage:
+        # Guardar JSON
+        output_file = output_base + '_IMPORT.json'
+        with open(output_file, 'w', encoding='utf-8') as f:
+            records.write_json(f, indent=2)
+        
+        print(f"\n💾 JSON guardado: {output_file}")
+        
+        # Guardar también una versión compacta (para copiar/pegar en SQL)
+        output_file_compact = output_base + '_IMPORT_COMPACT.json'
+        with open(output_file_compact, 'w', encoding='utf-8') as f:
+            records.write_json(f)
+        
+        print(f"💾 JSON compacto: {output_file_compact}")
+        
+        # Un JSON por broker/aseguradora para cargas en paralelo
+        if shard_by:
+            index_file = write_shards(records, output_base + '_SHARDS', shard_by, source=output_file)
+            print_shards_summary(index_file)
+        stage.rows = len(records)
     
     # Validaciones finales
     print(f"\n📊 ESTADÍSTICAS FINALES:")
@@ -270,14 +605,46 @@ def process_excel(file_path):
     print(f"   3. Ejecutar en Supabase SQL Editor:")
     print(f"      SELECT * FROM bulk_import_clients_policies('[PEGA AQUÍ]'::jsonb);")
     
+    if write_profile:
+        profiler.write()
+    
     return records
 
 if __name__ == '__main__':
+    profiler = profiler_from_argv(sys.argv)
+    
+    sheets = None
+    if '--hojas' in sys.argv:
+        i = sys.argv.index('--hojas')
+        sheets = parse_sheet_option(sys.argv[i + 1] if i + 1 < len(sys.argv) else None)
+        del sys.argv[i:i + 2]
+    
+    references = None
+    if '--referencias' in sys.argv:
+        i = sys.argv.index('--referencias')
+        references = load_references(sys.argv[i + 1] if i + 1 < len(sys.argv) else DEFAULT_SNAPSHOT)
+        del sys.argv[i:i + 2]
+    
+    shard_by = None
+    if '--particionar' in sys.argv:
+        i = sys.argv.index('--particionar')
+        shard_by = sys.argv[i + 1] if i + 1 < len(sys.argv) else 'broker'
+        del sys.argv[i:i + 2]
+        # Validar antes de procesar: no al final, después de escribir los JSON
+        if shard_by not in SHARD_KEYS:
+            print(f"❌ ERROR: Partición desconocida: {shard_by}. Disponibles: {list(SHARD_KEYS)}")
+            sys.exit(1)
+    
     if len(sys.argv) < 2:
         print("❌ ERROR: Debes especificar el archivo a procesar")
         print("\n📖 USO:")
         print("   python excel_to_bulk_import.py archivo.xlsx")
         print("   python excel_to_bulk_import.py archivo.csv")
+        print("   python excel_to_bulk_import.py reportes.zip   (cada CSV/XLSX del ZIP; también .gz, .bz2, .xz)")
+        print("   python excel_to_bulk_import.py archivo.csv --perfil   (reporte de tiempos por etapa)")
+        print("   python excel_to_bulk_import.py libro.xlsx --hojas todas   (o --hojas Enero,Febrero; una sola salida con source_sheet)")
+        print("   python excel_to_bulk_import.py archivo.csv --particionar broker   (o aseguradora; un JSON por valor + index.json)")
+        print("   python excel_to_bulk_import.py archivo.csv --referencias referencias.sqlite   (valida brokers/aseguradoras/ramos)")
         print("\n💡 COLUMNAS REQUERIDAS EN TU ARCHIVO:")
         print("   - client_name (nombre del cliente)")
         print("   - policy_number (número de póliza)")
@@ -296,7 +663,7 @@ if __name__ == '__main__':
     file_path = sys.argv[1]
     
     try:
-        process_excel(file_path)
+        process_excel(file_path, profiler, sheets=sheets, shard_by=shard_by, references=references)
     except FileNotFoundError:
         print(f"❌ ERROR: Archivo no encontrado: {file_path}")
         sys.exit(1)
@@ -4,13 +4,68 @@ Script para generar el archivo SQL completo con el JSON embebido
 """
 
 import json
+import sys
 
-# Leer el JSON compacto
-with open('public/TODA_FINAL_IMPORT_COMPACT.json', 'r', encoding='utf-8') as f:
-    json_data = f.read()
+from import_profiling import StageProfiler, profiler_from_argv
+from import_validation import ERROR, to_columns, validate
 
-# Crear el SQL usando dollar-quoted strings para evitar problemas con comillas
-sql_content = f"""-- ========================================
+def check_references(json_data, references):
+    """
+    Remapea variantes conocidas y aborta si quedan referencias inexistentes.
+    Devuelve el JSON a embeber (el original si no hubo remapeos).
+    """
+    records = json.loads(json_data)
+    fields = ['broker_email', 'insurer_name', 'ramo']
+    columns = to_columns(records, fields)
+    remapped = references.remap(columns)
+    report = validate(columns, list(range(1, len(records) + 1)), references.rules())
+
+    if report.errors:
+        report.print_summary()
+        rejected = [e for e in report.errors if e[4] == ERROR]
+        for row, rule, field, value, severity in rejected[:20]:
+            print(f"   - registro {row}: {field} = {value!r}")
+    if report.rejected:
+        print("\n❌ ERROR: Hay referencias que no existen en el snapshot; no se generó el SQL")
+        print("💡 Corrige el JSON (o actualiza el snapshot) y vuelve a ejecutar")
+        sys.exit(1)
+
+    if not remapped:
+        return json_data
+    for field in remapped:
+        for record, value in zip(records, columns[field]):
+            record[field] = value
+    print("🔁 Remapeos con el snapshot de referencias:")
+    for field, count in remapped.items():
+        print(f"   - {field}: {count}")
+    return json.dumps(records, ensure_ascii=False)
+
+def main(profiler=None, input_file='public/TODA_FINAL_IMPORT_COMPACT.json', output_file='EJECUTAR_IMPORT.sql',
+         references=None):
+    if profiler is None:
+        profiler = StageProfiler()
+    profiler.output_base = output_file.rsplit('.', 1)[0]
+
+    # Leer el JSON compacto
+    with profiler.stage('leer'):
+        with open(input_file, 'r', encoding='utf-8') as f:
+            json_data = f.read()
+
+    # Verificar brokers/aseguradoras/ramos contra el snapshot antes de generar SQL
+    if references is not None:
+        with profiler.stage('verificar_referencias'):
+            json_data = check_references(json_data, references)
+
+    if references is not None:
+        references_step = (f"-- 2. Brokers, aseguradoras y ramos ya verificados contra el snapshot "
+                           f"{references.meta['version']}")
+    else:
+        references_step = ("-- 2. Verifica que los brokers existen en la tabla brokers\n"
+                           "--    (o genera este SQL con --referencias para verificarlo antes)")
+
+    # Crear el SQL usando dollar-quoted strings para evitar problemas con comillas
+    with profiler.stage('generar'):
+        sql_content = f"""-- ========================================
 -- BULK IMPORT DE CLIENTES Y PÓLIZAS
 -- ========================================
 -- 
@@ -20,7 +75,7 @@ sql_content = f"""-- ========================================
 --
 -- INSTRUCCIONES:
 -- 1. Verifica que la función bulk_import_clients_policies existe
--- 2. Verifica que los brokers existen en la tabla brokers
+{references_step}
 -- 3. Ejecuta este SQL completo en Supabase SQL Editor
 -- 4. Revisa los resultados (success/warning/error)
 --
@@ -33,14 +88,20 @@ SELECT * FROM bulk_import_clients_policies($$
 $$::jsonb);
 """
 
-# Guardar el SQL
-with open('EJECUTAR_IMPORT.sql', 'w', encoding='utf-8') as f:
-    f.write(sql_content)
-
-print("✅ Archivo SQL generado: EJECUTAR_IMPORT.sql")
-print(f"📊 Tamaño del archivo: {len(sql_content):,} bytes")
-print("\n🚀 LISTO PARA EJECUTAR:")
-print("   1. Abre: EJECUTAR_IMPORT.sql")
-print("   2. Copia TODO el contenido")
-print("   3. Pega en Supabase SQL Editor")
-print("   4. Click en 'Run' (F5)")
+    # Guardar el SQL
+    with profiler.stage('escribir'):
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(sql_content)
+
+    print(f"✅ Archivo SQL generado: {output_file}")
+    print(f"📊 Tamaño del archivo: {len(sql_content):,} bytes")
+    print("\n🚀 LISTO PARA EJECUTAR:")
+    print(f"   1. Abre: {output_file}")
+    print("   2. Copia TODO el contenido")
+    print("   3. Pega en Supabase SQL Editor")
+    print("   4. Click en 'Run' (F5)")
+
+    profiler.write()
+
+if __name__ == '__main__':
+    main(profiler_from_argv(sys.argv))
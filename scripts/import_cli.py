@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+CLI unificado para los scripts de importación
+Un solo punto de entrada con subcomandos. Cada subcomando importa solo el
+módulo que necesita y pandas se carga únicamente al leer Excel o CSV grandes,
+así los trabajos chicos arrancan en decenas de milisegundos.
+
+Uso:
+  python import_cli.py parse-raw [--entrada DATOS_IMPORT_RAW.txt] [--salida DATOS_IMPORT]
+  python import_cli.py convert archivo.csv [--lector auto|csv|pandas]
+  python import_cli.py convert libro.xlsx --hojas todas [--procesos 4]
+  python import_cli.py convert archivo.csv --particionar broker|aseguradora
+  python import_cli.py fix-brokers entrada.csv salida.csv [--directorio brokers_directorio.csv]
+  python import_cli.py generate-sql [--entrada public/TODA_FINAL_IMPORT_COMPACT.json] [--salida EJECUTAR_IMPORT.sql]
+
+Todos los subcomandos aceptan --perfil / --perfil-cprofile; parse-raw, convert y
+generate-sql aceptan --referencias referencias.sqlite (reference_snapshot.py).
+"""
+
+import argparse
+import sys
+
+
+def _profiler(args):
+    from import_profiling import StageProfiler
+    use_cprofile = args.perfil_cprofile
+    return StageProfiler(enabled=args.perfil or use_cprofile, use_cprofile=use_cprofile)
+
+
+def _references(args):
+    if not args.referencias:
+        return None
+    from reference_snapshot import load_references
+    return load_references(args.referencias)
+
+
+def cmd_parse_raw(args):
+    import parse_bulk_data
+    parse_bulk_data.main(_profiler(args), args.entrada, args.salida, args.particionar, _references(args))
+
+
+def cmd_convert(args):
+    import excel_to_bulk_import
+    try:
+        excel_to_bulk_import.process_excel(
+            args.archivo, _profiler(args), args.lector,
+            sheets=excel_to_bulk_import.parse_sheet_option(args.hojas), workers=args.procesos,
+            shard_by=args.particionar, references=_references(args),
+        )
+    except FileNotFoundError:
+        print(f"❌ ERROR: Archivo no encontrado: {args.archivo}")
+        sys.exit(1)
+
+
+def cmd_fix_brokers(args):
+    import fix_broker_names_to_emails
+    fix_broker_names_to_emails.fix_csv(args.entrada, args.salida, _profiler(args),
+                                        args.directorio or fix_broker_names_to_emails.DEFAULT_ROSTER)
+
+
+def cmd_generate_sql(args):
+    import generate_sql
+    generate_sql.main(_profiler(args), args.entrada, args.salida, _references(args))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='import_cli.py',
+        description='Scripts de importación de clientes y pólizas',
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--perfil', action='store_true', help='Reporte de tiempo/memoria por etapa')
+    common.add_argument('--perfil-cprofile', action='store_true', help='Además guarda un .prof (cProfile) por etapa')
+    references = argparse.ArgumentParser(add_help=False)
+    references.add_argument('--referencias', metavar='SNAPSHOT',
+                            help='Validar/remapear broker_email, insurer_name y ramo contra un snapshot (reference_snapshot.py)')
+    shards = argparse.ArgumentParser(add_help=False)
+    shards.add_argument('--particionar', choices=['broker', 'aseguradora'],
+                        help='Escribir además un JSON por broker/aseguradora con index.json (tamaños y checksums)')
+
+    sub = parser.add_subparsers(dest='comando', metavar='comando', required=True)
+
+    p = sub.add_parser('parse-raw', parents=[common, shards, references], help='Volcado de texto crudo → JSON (parse_bulk_data)')
+    p.add_argument('--entrada', default='DATOS_IMPORT_RAW.txt')
+    p.add_argument('--salida', default='DATOS_IMPORT', help='Prefijo de salida (<salida>.json, <salida>_ERRORES.csv)')
+    p.set_defaults(func=cmd_parse_raw)
+
+    p = sub.add_parser('convert', parents=[common, shards, references], help='Excel/CSV de aseguradora → JSON (excel_to_bulk_import)')
+    p.add_argument('archivo')
+    p.add_argument('--lector', choices=['auto', 'csv', 'pandas'], default='auto',
+                   help='auto: módulo csv para CSV chicos, pandas para Excel y CSV grandes')
+    p.add_argument('--hojas', help="Hojas de Excel a procesar: 'todas' o nombres separados por coma (default: la primera)")
+    p.add_argument('--procesos', type=int, help='Procesos para leer las hojas en paralelo (default: núcleos)')
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser('fix-brokers', parents=[common], help='Nombres de broker → emails en un CSV')
+    p.add_argument('entrada')
+    p.add_argument('salida')
+    p.add_argument('--directorio', metavar='ROSTER', default=None,
+                   help='Roster de brokers (CSV name,email,aliases o JSON; default: brokers_directorio.csv)')
+    p.set_defaults(func=cmd_fix_brokers)
+
+    p = sub.add_parser('generate-sql', parents=[common, references], help='JSON compacto → SQL de bulk import')
+    p.add_argument('--entrada', default='public/TODA_FINAL_IMPORT_COMPACT.json')
+    p.add_argument('--salida', default='EJECUTAR_IMPORT.sql')
+    p.set_defaults(func=cmd_generate_sql)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
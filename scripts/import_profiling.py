@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Perfilado por etapas para los scripts de importación
+Se activa con --perfil (y opcionalmente --perfil-cprofile) en cualquier script:
+registra tiempo de pared, tiempo de CPU, filas procesadas y pico de memoria
+(tracemalloc) por etapa con nombre, y guarda un reporte JSON junto a la salida.
+Desactivado no mide nada y no agrega costo.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+PROFILE_FLAG = '--perfil'
+CPROFILE_FLAG = '--perfil-cprofile'
+
+
+class StageStats:
+    """Métricas de una etapa; `rows` lo completa el script dentro del bloque"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_mb = None
+        self.cprofile_file = None
+
+    def to_dict(self):
+        data = {
+            'stage': self.name,
+            'rows': self.rows,
+            'wall_s': round(self.wall_s, 6),
+            'cpu_s': round(self.cpu_s, 6),
+            'peak_mb': round(self.peak_mb, 3) if self.peak_mb is not None else None,
+        }
+        if self.rows and self.wall_s:
+            data['rows_per_s'] = round(self.rows / self.wall_s, 1)
+        if self.cprofile_file:
+            data['cprofile'] = self.cprofile_file
+        return data
+
+
+class StageProfiler:
+    """Registra métricas por etapa: `with profiler.stage('leer') as st: ...`"""
+
+    def __init__(self, enabled=False, use_cprofile=False, output_base='import'):
+        self.enabled = enabled
+        self.use_cprofile = use_cprofile
+        # Prefijo de los archivos generados (<base>_PERFIL.json, <base>_<etapa>.prof)
+        self.output_base = output_base
+        self.stages = []
+        self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name):
+        stats = StageStats(name)
+        if not self.enabled:
+            yield stats
+            return
+
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+
+        profile = None
+        if self.use_cprofile:
+            import cProfile
+            profile = cProfile.Profile()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profile:
+            profile.enable()
+        try:
+            yield stats
+        finally:
+            if profile:
+                profile.disable()
+            stats.wall_s = time.perf_counter() - wall_start
+            stats.cpu_s = time.process_time() - cpu_start
+            stats.peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            if profile:
+                stats.cprofile_file = f"{self.output_base}_{name}.prof"
+                profile.dump_stats(stats.cprofile_file)
+            self.stages.append(stats)
+
+    def report(self):
+        return {
+            'stages': [s.to_dict() for s in self.stages],
+            'total_wall_s': round(sum(s.wall_s for s in self.stages), 6),
+            'total_cpu_s': round(sum(s.cpu_s for s in self.stages), 6),
+        }
+
+    def print_summary(self):
+        if not self.enabled or not self.stages:
+            return
+        print("\n⏱️  PERFIL POR ETAPA:")
+        for s in self.stages:
+            rows = f"{s.rows:,} filas" if s.rows is not None else '-'
+            print(f"   - {s.name}: {s.wall_s:.3f}s pared, {s.cpu_s:.3f}s CPU, {rows}, pico {s.peak_mb:.1f} MB")
+
+    def write(self):
+        """Guarda <output_base>_PERFIL.json (solo si el perfilado está activo)"""
+        if not self.enabled:
+            return None
+        output_file = f"{self.output_base}_PERFIL.json"
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        self.print_summary()
+        print(f"💾 Perfil por etapa: {output_file}")
+        self.stop()
+        return output_file
+
+    def stop(self):
+        if self._started_tracemalloc:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+
+def profiler_from_argv(argv):
+    """Quita --perfil / --perfil-cprofile de argv (in-place) y devuelve el profiler"""
+    use_cprofile = CPROFILE_FLAG in argv
+    enabled = use_cprofile or PROFILE_FLAG in argv
+    argv[:] = [a for a in argv if a not in (PROFILE_FLAG, CPROFILE_FLAG)]
+    return StageProfiler(enabled=enabled, use_cprofile=use_cprofile)
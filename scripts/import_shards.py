@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Salida particionada por broker (o por aseguradora) para la carga en paralelo
+Escribe un JSON por broker_email / insurer_name más un index.json con la
+cantidad de registros, el tamaño y el SHA-256 de cada shard. Las cargas, los
+estados de comisión y los correos pueden correr en paralelo y reintentarse
+por shard: un error en los datos de un broker no bloquea a los demás.
+
+Uso:
+  python import_shards.py dividir archivo_IMPORT.json [--por broker|aseguradora] [--salida DIR]
+  python import_shards.py verificar DIR
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+from record_store import RecordStore
+
+# opción → campo del registro
+SHARD_KEYS = {
+    'broker': 'broker_email',
+    'aseguradora': 'insurer_name',
+}
+
+INDEX_FILE = 'index.json'
+NO_VALUE = '_sin_valor'
+
+
+def shard_filename(value, used):
+    """Nombre de archivo seguro y único para el valor de la clave"""
+    if value is None:
+        base = NO_VALUE
+    else:
+        base = re.sub(r'[^A-Za-z0-9._@-]+', '_', str(value).strip().lower()).strip('._') or NO_VALUE
+    name, n = base, 2
+    while name in used:
+        name = f"{base}_{n}"
+        n += 1
+    used.add(name)
+    return f"{name}.json"
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_shards(records, output_dir, shard_by='broker', source=None):
+    """
+    Escribe un shard por valor de la clave y el índice (al final, para que un
+    índice presente implique shards completos). Al reescribir un directorio
+    existente primero se borra el índice viejo y al terminar se eliminan los
+    shards que ese índice listaba y el nuevo ya no (nunca otros archivos del
+    directorio). Devuelve la ruta del índice.
+    """
+    if shard_by not in SHARD_KEYS:
+        raise ValueError(f"Partición desconocida: {shard_by}. Disponibles: {list(SHARD_KEYS)}")
+    field = SHARD_KEYS[shard_by]
+    os.makedirs(output_dir, exist_ok=True)
+    index_path = os.path.join(output_dir, INDEX_FILE)
+    previous = listed_shards(output_dir)
+    # Mientras se reescribe no queda un índice que valide una mezcla de shards
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(index_path)
+
+    positions = {}
+    for i, value in enumerate(records.column(field)):
+        positions.setdefault(value, []).append(i)
+
+    # Un valor 'index' no puede pisar index.json
+    used = {os.path.splitext(INDEX_FILE)[0]}
+    shards = []
+    for value in sorted(positions, key=lambda v: (v is None, v or '')):
+        buffer = io.StringIO()
+        records.select(positions[value]).write_json(buffer)
+        data = buffer.getvalue().encode('utf-8')
+        filename = shard_filename(value, used)
+        _write_atomic(os.path.join(output_dir, filename), data)
+        shards.append({
+            'key': value,
+            'file': filename,
+            'records': len(positions[value]),
+            'bytes': len(data),
+            'sha256': hashlib.sha256(data).hexdigest(),
+        })
+
+    remove_stale_shards(output_dir, previous - {shard['file'] for shard in shards})
+
+    index = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'source': source,
+        'shard_by': field,
+        'total_records': len(records),
+        'shards': shards,
+    }
+    _write_atomic(index_path, json.dumps(index, indent=2, ensure_ascii=False).encode('utf-8'))
+    return index_path
+
+
+def listed_shards(output_dir):
+    """Archivos que lista el index.json existente (vacío si no hay índice legible)"""
+    try:
+        with open(os.path.join(output_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        files = {shard['file'] for shard in index['shards']}
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        return set()
+    # Solo nombres sueltos dentro del directorio: un índice editado no borra afuera
+    return {name for name in files if isinstance(name, str) and name == os.path.basename(name)
+            and name != INDEX_FILE}
+
+
+def remove_stale_shards(output_dir, stale):
+    """Borra los shards de una partición anterior (solo los listados en `stale`)"""
+    removed = []
+    for name in sorted(stale):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(output_dir, name))
+            removed.append(name)
+    return removed
+
+
+def verify_shards(output_dir):
+    """Lista de (archivo, problema) de los shards que no coinciden con el índice"""
+    with open(os.path.join(output_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    problems = []
+    for shard in index['shards']:
+        path = os.path.join(output_dir, shard['file'])
+        if not os.path.exists(path):
+            problems.append((shard['file'], 'no existe'))
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) != shard['bytes']:
+            problems.append((shard['file'], f"tamaño {len(data)} ≠ {shard['bytes']}"))
+        elif hashlib.sha256(data).hexdigest() != shard['sha256']:
+            problems.append((shard['file'], 'checksum distinto'))
+    return problems
+
+
+def print_shards_summary(index_path):
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    print(f"\n🧩 Shards por {index['shard_by']}: {len(index['shards'])} ({index['total_records']} registros)")
+    print(f"💾 Índice: {index_path}")
+
+
+def split_file(json_file, shard_by='broker', output_dir=None):
+    """Particiona un *_IMPORT.json ya generado"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    fields = list(data[0]) if data else list(SHARD_KEYS.values())
+    records = RecordStore(fields)
+    records.extend(data)
+    output_dir = output_dir or json_file.rsplit('.', 1)[0] + '_SHARDS'
+    return write_shards(records, output_dir, shard_by, source=json_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Salida particionada por broker o aseguradora')
+    sub = parser.add_subparsers(dest='accion', required=True)
+
+    p = sub.add_parser('dividir', help='Particionar un JSON de importación')
+    p.add_argument('archivo')
+    p.add_argument('--por', choices=list(SHARD_KEYS), default='broker')
+    p.add_argument('--salida', help='Directorio de salida (default: <archivo>_SHARDS)')
+
+    p = sub.add_parser('verificar', help='Verificar tamaños y checksums contra el índice')
+    p.add_argument('directorio')
+
+    args = parser.parse_args()
+
+    if args.accion == 'dividir':
+        index_path = split_file(args.archivo, args.por, args.salida)
+        print_shards_summary(index_path)
+        return
+
+    problems = verify_shards(args.directorio)
+    if problems:
+        print(f"❌ Shards con problemas: {len(problems)}")
+        for filename, problem in problems:
+            print(f"   - {filename}: {problem}")
+        sys.exit(1)
+    print("✅ Todos los shards coinciden con el índice")
+
+
+if __name__ == '__main__':
+    main()
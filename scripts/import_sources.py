@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Entradas comprimidas y archivadas para los scripts de importación
+Abre .gz / .bz2 / .xz y los miembros de un .zip directamente como streams
+(sin extraer a disco), y recorre todos los CSV/XLSX/TXT dentro de un ZIP.
+Un archivo plano se trata como una fuente única.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zipfile
+
+COMPRESSORS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+TABLE_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+RAW_EXTENSIONS = ('.txt',)
+
+
+def _extension(name):
+    return os.path.splitext(name)[1].lower()
+
+
+class Source:
+    """
+    Una entrada legible: archivo plano, archivo comprimido o miembro de un ZIP.
+    `name` es el nombre lógico (sin sufijo de compresión) y define el formato;
+    `size` es el tamaño en disco (comprimido si aplica) o el del miembro del ZIP.
+    """
+
+    def __init__(self, name, opener, size=None, output_base=None, plain_path=None):
+        self.name = name
+        self._opener = opener
+        self.size = size
+        self.output_base = output_base or name.rsplit('.', 1)[0]
+        # Ruta real cuando la fuente es un archivo sin comprimir
+        self.plain_path = plain_path
+
+    @property
+    def extension(self):
+        return _extension(self.name)
+
+    def open_binary(self):
+        return self._opener()
+
+    def open_text(self, encoding='utf-8', newline=None):
+        return io.TextIOWrapper(self.open_binary(), encoding=encoding, newline=newline)
+
+    def seekable_buffer(self):
+        """
+        Ruta o buffer en memoria con acceso aleatorio (lo que necesitan los
+        lectores de XLSX); nunca escribe una copia extraída a disco.
+        """
+        if self.plain_path:
+            return self.plain_path
+        with self.open_binary() as f:
+            return io.BytesIO(f.read())
+
+    def __repr__(self):
+        return f"Source({self.name!r})"
+
+
+def is_archive(path):
+    return _extension(path) == '.zip'
+
+
+def _zip_member_wanted(info, extensions):
+    if info.is_dir():
+        return False
+    base = os.path.basename(info.filename)
+    # Metadatos de macOS y archivos temporales de Excel (~$libro.xlsx)
+    if info.filename.startswith('__MACOSX/') or base.startswith(('.', '~$')):
+        return False
+    return extensions is None or _extension(base) in extensions
+
+
+def iter_sources(path, extensions=None):
+    """
+    Recorre las fuentes de `path`: cada miembro que coincida con `extensions`
+    si es un ZIP, o una única fuente si es un archivo plano o comprimido.
+    Los miembros del ZIP solo son legibles mientras dura la iteración.
+    """
+    ext = _extension(path)
+
+    if ext == '.zip':
+        archive_base = path.rsplit('.', 1)[0]
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not _zip_member_wanted(info, extensions):
+                    continue
+                stem = os.path.splitext(os.path.basename(info.filename))[0]
+                yield Source(
+                    f"{path}:{info.filename}",
+                    lambda info=info: zf.open(info),
+                    size=info.file_size,
+                    output_base=f"{archive_base}_{stem}",
+                )
+        return
+
+    if ext in COMPRESSORS:
+        name = path[:-len(ext)]
+        yield Source(
+            name,
+            lambda: COMPRESSORS[ext](path, 'rb'),
+            size=os.path.getsize(path),
+        )
+        return
+
+    yield Source(path, lambda: open(path, 'rb'), size=os.path.getsize(path), plain_path=path)
+
+
+def list_sources(path, extensions=None):
+    """Nombres de las fuentes de `path` (para mensajes y validaciones previas)"""
+    return [source.name for source in iter_sources(path, extensions)]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Validación declarativa por columnas para los scripts de importación
+Las violaciones se acumulan en una tabla compacta (fila, regla, campo, valor)
+en lugar de imprimir una línea por cada fila rechazada
+"""
+
+import csv
+import re
+from collections import Counter
+from datetime import date
+
+ERROR = 'error'      # La fila se omite del import
+WARNING = 'warning'  # La fila se importa pero queda reportada
+
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+MIN_DATE = '1950-01-01'
+MAX_DATE = '2100-12-31'
+
+
+class Rule:
+    """Regla declarativa evaluada sobre columnas completas"""
+
+    def __init__(self, name, fields, check, severity=ERROR):
+        self.name = name
+        self.fields = fields
+        self.check = check
+        self.severity = severity
+
+    def evaluate(self, columns, size):
+        """Retorna [(índice, campo, valor)] de las filas que violan la regla"""
+        return self.check(columns, size)
+
+
+def _column(columns, field, size):
+    return columns.get(field) or [None] * size
+
+
+def required(*fields):
+    """Campos obligatorios (no vacíos)"""
+    def check(columns, size):
+        violations = []
+        for field in fields:
+            values = _column(columns, field, size)
+            violations.extend((i, field, v) for i, v in enumerate(values) if v is None or v == '')
+        return violations
+    return Rule('requerido', fields, check, ERROR)
+
+
+def email(field, severity=ERROR):
+    """Formato de email (solo valores presentes)"""
+    def check(columns, size):
+        values = _column(columns, field, size)
+        match = EMAIL_RE.match
+        return [(i, field, v) for i, v in enumerate(values) if v and not match(v)]
+    return Rule('email_invalido', (field,), check, severity)
+
+
+def parsed(field, raw_field, severity=WARNING):
+    """Valor crudo presente que no se pudo convertir"""
+    def check(columns, size):
+        values = _column(columns, field, size)
+        raws = _column(columns, raw_field, size)
+        return [(i, field, raw) for i, (v, raw) in enumerate(zip(values, raws)) if v is None and raw not in (None, '')]
+    return Rule('no_parseable', (field,), check, severity)
+
+
+def _is_iso_date(value):
+    try:
+        date.fromisoformat(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def iso_date(field, severity=WARNING):
+    """Fecha con formato YYYY-MM-DD y día/mes existentes"""
+    def check(columns, size):
+        values = _column(columns, field, size)
+        return [(i, field, v) for i, v in enumerate(values) if v and not _is_iso_date(v)]
+    return Rule('fecha_invalida', (field,), check, severity)
+
+
+def date_range(field, min_date=MIN_DATE, max_date=MAX_DATE, severity=WARNING):
+    """Fecha ISO (YYYY-MM-DD) dentro del rango"""
+    def check(columns, size):
+        values = _column(columns, field, size)
+        return [(i, field, v) for i, v in enumerate(values) if v and not (min_date <= v <= max_date)]
+    return Rule('fecha_fuera_de_rango', (field,), check, severity)
+
+
+def number_range(field, minimum, maximum, severity=WARNING):
+    """Número dentro de [minimum, maximum]"""
+    def check(columns, size):
+        values = _column(columns, field, size)
+        return [(i, field, v) for i, v in enumerate(values) if v is not None and not (minimum <= v <= maximum)]
+    return Rule('fuera_de_rango', (field,), check, severity)
+
+
+def after(field, other, severity=WARNING):
+    """field debe ser posterior a other (fechas ISO)"""
+    def check(columns, size):
+        values = _column(columns, field, size)
+        others = _column(columns, other, size)
+        return [(i, field, v) for i, (v, o) in enumerate(zip(values, others)) if v and o and v <= o]
+    return Rule(f'{field}_antes_de_{other}', (field, other), check, severity)
+
+
+# Reglas estándar del bulk import de clientes y pólizas
+IMPORT_RULES = [
+    required('client_name', 'policy_number', 'insurer_name', 'broker_email'),
+    email('broker_email'),
+    parsed('start_date', 'start_date_raw'),
+    parsed('renewal_date', 'renewal_date_raw'),
+    parsed('percent_override', 'percent_override_raw'),
+    iso_date('start_date'),
+    iso_date('renewal_date'),
+    date_range('start_date'),
+    date_range('renewal_date'),
+    number_range('percent_override', 0, 1),
+    after('renewal_date', 'start_date'),
+]
+
+
+def to_columns(records, fields=None):
+    """Convierte una lista de dicts a {campo: [valores]}"""
+    if fields is None:
+        fields = list(records[0].keys()) if records else []
+    return {field: [r.get(field) for r in records] for field in fields}
+
+
+def row_sort_key(row_number):
+    """Orden natural de la columna fila: 'Hoja!10' va después de 'Hoja!2'"""
+    if isinstance(row_number, str):
+        sheet, _, n = row_number.rpartition('!')
+        if n.isdigit():
+            return (sheet, int(n))
+    return ('', row_number)
+
+
+class ValidationReport:
+    """
+    Resultado de la validación:
+      errors   = [(fila, regla, campo, valor, severidad)]
+      rejected = posiciones (base 0) de las filas con severidad 'error'
+    """
+
+    FIELDS = ['fila', 'regla', 'campo', 'valor', 'severidad']
+
+    def __init__(self):
+        self.errors = []
+        self.rejected = set()
+
+    def __len__(self):
+        return len(self.errors)
+
+    def add(self, row_number, rule, field, value):
+        self.errors.append((row_number, rule.name, field, value, rule.severity))
+
+    def add_error(self, row_number, rule_name, field, value, severity=ERROR):
+        """Registra una observación detectada fuera de las reglas (ej: al parsear)"""
+        self.errors.append((row_number, rule_name, field, value, severity))
+
+    def counts(self):
+        """Cantidad de violaciones por (regla, campo)"""
+        return Counter((rule, field) for _, rule, field, _, _ in self.errors)
+
+    def print_summary(self):
+        if not self.errors:
+            print("✅ Validación sin observaciones")
+            return
+        rejected_rows = {row for row, _, _, _, severity in self.errors if severity == ERROR}
+        print(f"\n🔎 Validación: {len(self.errors)} observaciones, {len(rejected_rows)} filas rechazadas")
+        for (rule, field), count in sorted(self.counts().items(), key=lambda x: x[1], reverse=True):
+            print(f"   - {rule} ({field}): {count}")
+
+    def write(self, output_file):
+        """Guarda la tabla de errores en CSV o Parquet (según extensión)"""
+        rows = sorted(self.errors, key=lambda e: row_sort_key(e[0]))
+        if output_file.endswith('.parquet'):
+            # Parquet requiere pandas + pyarrow
+            import pandas as pd
+            df = pd.DataFrame(rows, columns=self.FIELDS)
+            df['valor'] = df['valor'].astype(str)
+            df.to_parquet(output_file, index=False)
+            return output_file
+
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.FIELDS)
+            writer.writerows(rows)
+        return output_file
+
+
+def validate(columns, row_numbers, rules=IMPORT_RULES):
+    """
+    Ejecuta las reglas sobre las columnas.
+    row_numbers: número de fila/línea original de cada posición (para el reporte)
+    """
+    report = ValidationReport()
+    size = len(row_numbers)
+    for rule in rules:
+        for i, field, value in rule.evaluate(columns, size):
+            report.add(row_numbers[i], rule, field, value)
+            if rule.severity == ERROR:
+                report.rejected.add(i)
+    return report
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Worker de importación con cola local (directorio spool)
+Mantiene un solo proceso caliente con pandas, el directorio de brokers y
+COLUMN_MAPPING ya cargados y procesa trabajos convert / fix-brokers /
+generate-sql / parse-raw encolados como archivos JSON. Para archivos chicos la
+latencia por trabajo queda en el tiempo de procesamiento puro.
+
+Estructura del spool:
+  pendientes/<id>.json   trabajos en espera (se escriben con rename atómico)
+  en_proceso/<id>.json   trabajo tomado por un worker (que le actualiza el mtime
+                         mientras corre; si deja de hacerlo se devuelve a la cola)
+  terminados/<id>.json   trabajo + estado final (ok / error)
+  logs/<id>.log          salida de consola del trabajo
+
+Uso:
+  python import_worker.py trabajar [--spool import_spool] [--una-vez] [--abandonado-tras 60]
+  python import_worker.py enviar [--spool import_spool] convert archivo.csv
+  python import_worker.py enviar fix-brokers entrada.csv salida.csv
+  python import_worker.py estado <id> [--spool import_spool]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from import_cli import build_parser
+
+DEFAULT_SPOOL = 'import_spool'
+POLL_INTERVAL = 0.2
+# Un worker vivo toca el archivo de su trabajo cada HEARTBEAT_INTERVAL segundos;
+# un trabajo en proceso sin tocar por STALE_AFTER segundos quedó huérfano
+HEARTBEAT_INTERVAL = 5.0
+STALE_AFTER = 60.0
+
+PENDING = 'pendientes'
+RUNNING = 'en_proceso'
+DONE = 'terminados'
+LOGS = 'logs'
+
+# Comandos que acepta el worker (subcomandos de import_cli.py)
+JOB_COMMANDS = ('parse-raw', 'convert', 'fix-brokers', 'generate-sql')
+
+
+def _spool_dirs(spool):
+    dirs = {name: os.path.join(spool, name) for name in (PENDING, RUNNING, DONE, LOGS)}
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+    return dirs
+
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _now():
+    return datetime.now().isoformat(timespec='milliseconds')
+
+
+def submit(spool, argv, cwd=None):
+    """Encola un trabajo (argv de import_cli.py) y devuelve su id"""
+    if not argv or argv[0] not in JOB_COMMANDS:
+        raise ValueError(f"Comando no soportado: {argv[:1]}. Disponibles: {list(JOB_COMMANDS)}")
+    # Valida los argumentos ahora y no cuando lo tome el worker
+    build_parser().parse_args(argv)
+
+    dirs = _spool_dirs(spool)
+    job_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+    job = {
+        'id': job_id,
+        'argv': argv,
+        'cwd': os.path.abspath(cwd or os.getcwd()),
+        'estado': 'pendiente',
+        'encolado': _now(),
+    }
+    _write_json_atomic(os.path.join(dirs[PENDING], f"{job_id}.json"), job)
+    return job_id
+
+
+def job_status(spool, job_id):
+    """Devuelve el trabajo con su estado, buscando en todas las carpetas"""
+    for folder in (DONE, RUNNING, PENDING):
+        path = os.path.join(spool, folder, f"{job_id}.json")
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    return None
+
+
+def warm_up():
+    """Carga los módulos de importación, el directorio de brokers (y pandas si está instalado) una sola vez"""
+    start = time.perf_counter()
+    import excel_to_bulk_import  # noqa: F401  COLUMN_MAPPING
+    import fix_broker_names_to_emails
+    import generate_sql  # noqa: F401
+    import parse_bulk_data  # noqa: F401
+    try:
+        import pandas  # noqa: F401
+        pandas_loaded = True
+    except ImportError:
+        pandas_loaded = False
+    # fix-brokers reutiliza este directorio en cada trabajo mientras el roster no cambie
+    from broker_directory import get_directory
+    get_directory(fix_broker_names_to_emails.DEFAULT_ROSTER)
+    return time.perf_counter() - start, pandas_loaded
+
+
+def run_job(job, log_file):
+    """Ejecuta un trabajo en este proceso; devuelve (ok, error)"""
+    parser = build_parser()
+    previous_cwd = os.getcwd()
+    with open(log_file, 'w', encoding='utf-8') as log, \
+         contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            os.chdir(job['cwd'])
+            args = parser.parse_args(job['argv'])
+            args.func(args)
+            return True, None
+        except SystemExit as e:
+            # Los scripts usan sys.exit(1) para errores de entrada
+            if e.code in (0, None):
+                return True, None
+            return False, f"sys.exit({e.code})"
+        except Exception as e:
+            traceback.print_exc()
+            return False, f"{type(e).__name__}: {e}"
+        finally:
+            os.chdir(previous_cwd)
+
+
+def claim_next(dirs):
+    """Toma el trabajo pendiente más antiguo (rename atómico: seguro con varios workers)"""
+    for name in sorted(os.listdir(dirs[PENDING])):
+        if not name.endswith('.json'):
+            continue
+        pending_path = os.path.join(dirs[PENDING], name)
+        running_path = os.path.join(dirs[RUNNING], name)
+        try:
+            # mtime fresco antes del rename: en en_proceso nunca aparece como abandonado
+            os.utime(pending_path)
+            os.rename(pending_path, running_path)
+        except FileNotFoundError:
+            continue
+        with open(running_path, 'r', encoding='utf-8') as f:
+            return running_path, json.load(f)
+    return None, None
+
+
+def requeue_interrupted(dirs, stale_after=STALE_AFTER):
+    """
+    Devuelve a pendientes los trabajos en proceso cuyo worker dejó de dar
+    señales (mtime más viejo que stale_after); los de workers vivos no se tocan.
+    """
+    requeued = 0
+    now = time.time()
+    for name in os.listdir(dirs[RUNNING]):
+        if not name.endswith('.json'):
+            continue
+        running_path = os.path.join(dirs[RUNNING], name)
+        try:
+            if now - os.path.getmtime(running_path) < stale_after:
+                continue
+            os.rename(running_path, os.path.join(dirs[PENDING], name))
+        except FileNotFoundError:
+            # Terminó o lo devolvió otro worker
+            continue
+        requeued += 1
+    return requeued
+
+
+@contextlib.contextmanager
+def heartbeat(path, interval=HEARTBEAT_INTERVAL):
+    """Toca el archivo del trabajo cada `interval` segundos mientras corre"""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            with contextlib.suppress(FileNotFoundError):
+                os.utime(path)
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def work(spool, once=False, poll_interval=POLL_INTERVAL, stale_after=STALE_AFTER):
+    """Procesa trabajos hasta Ctrl+C (o hasta vaciar la cola con once=True)"""
+    dirs = _spool_dirs(spool)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    warm_s, pandas_loaded = warm_up()
+    print(f"🔥 Worker listo en {warm_s * 1000:.0f} ms (pandas {'cargado' if pandas_loaded else 'no instalado'})")
+    print(f"📂 Spool: {os.path.abspath(spool)}")
+
+    processed = 0
+    last_requeue = None
+    try:
+        while True:
+            # Al arrancar y cada stale_after: recuperar trabajos de workers caídos
+            if last_requeue is None or time.monotonic() - last_requeue >= stale_after:
+                requeued = requeue_interrupted(dirs, stale_after)
+                if requeued:
+                    print(f"⚠️  {requeued} trabajos abandonados devueltos a la cola")
+                last_requeue = time.monotonic()
+
+            running_path, job = claim_next(dirs)
+            if job is None:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            job['estado'] = 'en_proceso'
+            job['inicio'] = _now()
+            job['worker'] = worker_id
+            _write_json_atomic(running_path, job)
+
+            log_file = os.path.join(dirs[LOGS], f"{job['id']}.log")
+            start = time.perf_counter()
+            with heartbeat(running_path, min(HEARTBEAT_INTERVAL, stale_after / 4)):
+                ok, error = run_job(job, log_file)
+            job['duracion_s'] = round(time.perf_counter() - start, 4)
+            job['fin'] = _now()
+            job['estado'] = 'ok' if ok else 'error'
+            job['error'] = error
+            job['log'] = os.path.abspath(log_file)
+
+            _write_json_atomic(os.path.join(dirs[DONE], f"{job['id']}.json"), job)
+            os.remove(running_path)
+            processed += 1
+
+            icon = '✅' if ok else '❌'
+            print(f"{icon} {job['id']} {' '.join(job['argv'])}: {job['duracion_s'] * 1000:.0f} ms"
+                  + (f" ({error})" if error else ''))
+    except KeyboardInterrupt:
+        print("\n🛑 Worker detenido")
+
+    print(f"📊 Trabajos procesados: {processed}")
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker de importación con cola local')
+    sub = parser.add_subparsers(dest='accion', required=True)
+
+    p = sub.add_parser('trabajar', help='Procesar trabajos de la cola')
+    p.add_argument('--spool', default=DEFAULT_SPOOL)
+    p.add_argument('--una-vez', action='store_true', help='Salir cuando la cola quede vacía')
+    p.add_argument('--intervalo', type=float, default=POLL_INTERVAL, help='Segundos entre sondeos de la cola')
+    p.add_argument('--abandonado-tras', type=float, default=STALE_AFTER,
+                   help='Segundos sin señales de su worker para devolver un trabajo en proceso a la cola')
+
+    p = sub.add_parser('enviar', help='Encolar un trabajo (argumentos de import_cli.py)')
+    p.add_argument('--spool', default=DEFAULT_SPOOL)
+    p.add_argument('argv', nargs=argparse.REMAINDER)
+
+    p = sub.add_parser('estado', help='Ver el estado de un trabajo')
+    p.add_argument('id')
+    p.add_argument('--spool', default=DEFAULT_SPOOL)
+
+    args = parser.parse_args()
+
+    if args.accion == 'trabajar':
+        work(args.spool, args.una_vez, args.intervalo, args.abandonado_tras)
+    elif args.accion == 'enviar':
+        try:
+            job_id = submit(args.spool, args.argv)
+        except ValueError as e:
+            print(f"❌ ERROR: {e}")
+            sys.exit(1)
+        print(f"📋 Trabajo encolado: {job_id}")
+    else:
+        job = job_status(args.spool, args.id)
+        if job is None:
+            print(f"❌ ERROR: Trabajo no encontrado: {args.id}")
+            sys.exit(1)
+        print(json.dumps(job, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
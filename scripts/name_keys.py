@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Claves normalizadas de nombres para cruzar referencias
+Un solo normalizador para el directorio de brokers (broker_directory) y el
+snapshot de referencias (reference_snapshot): un nombre que uno reconoce lo
+reconoce también el otro.
+"""
+
+import re
+import unicodedata
+
+
+def fold_key(value):
+    """Clave de comparación: sin acentos, mayúsculas y espacios colapsados"""
+    if value is None:
+        return None
+    text = unicodedata.normalize('NFKD', str(value))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'\s+', ' ', text).strip().upper() or None
+
+
+def name_key(value):
+    """fold_key con las palabras ordenadas (apellido primero o al final da igual)"""
+    folded = fold_key(value)
+    if folded is None:
+        return None
+    return ' '.join(sorted(folded.split(' ')))
@@ -2,12 +2,34 @@
 """
 Script para parsear el bulk import de clientes y pólizas
 Procesa el archivo de texto con formato de columnas y genera JSON
+
+Uso:
+  python parse_bulk_data.py [DATOS_IMPORT_RAW.txt] [prefijo_salida]
+  python parse_bulk_data.py volcado.txt.gz   (también .bz2, .xz o un .zip con varios .txt)
+  python parse_bulk_data.py volcado.txt --particionar broker   (o aseguradora)
+  python parse_bulk_data.py volcado.txt --referencias referencias.sqlite
+  python parse_bulk_data.py --perfil   (reporte de tiempos por etapa)
 """
 
-import json
 import re
+import sys
 from datetime import datetime
-from collections import defaultdict
+
+from import_profiling import StageProfiler, profiler_from_argv
+from import_shards import SHARD_KEYS, print_shards_summary, write_shards
+from import_sources import RAW_EXTENSIONS, iter_sources
+from import_validation import IMPORT_RULES, ValidationReport, validate
+from record_store import RecordStore
+
+# Campos del JSON final (orden de bulk_import_clients_policies)
+RECORD_FIELDS = [
+    'client_name', 'national_id', 'email', 'phone', 'policy_number',
+    'insurer_name', 'ramo', 'start_date', 'renewal_date', 'broker_email',
+    'percent_override',
+]
+
+# Valores crudos que solo se usan para reportar lo que no se pudo parsear
+RAW_FIELDS = ['start_date_raw', 'renewal_date_raw', 'percent_override_raw']
 
 def parse_date(date_str):
     """Convierte DD/MM/YY a YYYY-MM-DD"""
@@ -30,7 +52,6 @@ def parse_date(date_str):
         
         return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
     except:
-        print(f"⚠️  Error parseando fecha: {date_str}")
         return None
 
 def clean_field(field):
@@ -40,13 +61,20 @@ def clean_field(field):
     field = field.strip()
     return field if field != '' else None
 
-def parse_line(line, line_num):
-    """Parsea una línea de datos"""
+def parse_line(line, line_num, report=None):
+    """
+    Parsea una línea de datos.
+    Los problemas de estructura se registran en report (ValidationReport) si se pasa;
+    la validación de campos obligatorios corre después, por columnas.
+    """
     # Dividir por múltiples espacios (2 o más)
     parts = [p.strip() for p in re.split(r'\s{2,}', line.strip()) if p.strip()]
     
     if len(parts) < 10:
-        print(f"⚠️  Línea {line_num}: Pocos campos ({len(parts)})")
+        if report is not None:
+            report.add_error(line_num, 'pocos_campos', 'linea', len(parts))
+        else:
+            print(f"⚠️  Línea {line_num}: Pocos campos ({len(parts)})")
         return None
     
     # Extraer campos en orden esperado
@@ -74,11 +102,6 @@ def parse_line(line, line_num):
         broker_email = parts[-2] if len(parts) >= 2 else ''
         commission = parts[-1] if len(parts) >= 1 else ''
         
-        # Validar campos obligatorios
-        if not client_name or not policy_number or not insurer_name or not broker_email or '@' not in broker_email:
-            print(f"⚠️  Línea {line_num}: Faltan campos obligatorios")
-            return None
-        
         # Parsear commission
         percent_override = None
         try:
@@ -99,64 +122,119 @@ def parse_line(line, line_num):
             'renewal_date': parse_date(renewal_date),
             'broker_email': broker_email.strip().lower(),
             'percent_override': percent_override,
+            # Valores crudos para reportar fechas/comisiones no parseables
+            'start_date_raw': clean_field(start_date),
+            'renewal_date_raw': clean_field(renewal_date),
+            'percent_override_raw': clean_field(commission),
         }
     except Exception as e:
-        print(f"❌ Error en línea {line_num}: {str(e)}")
-        print(f"   Campos: {parts}")
+        if report is not None:
+            report.add_error(line_num, 'error_parseo', 'linea', str(e))
+        else:
+            print(f"❌ Error en línea {line_num}: {str(e)}")
+            print(f"   Campos: {parts}")
         return None
 
-def main():
+def main(profiler=None, input_file='DATOS_IMPORT_RAW.txt', output_base='DATOS_IMPORT', shard_by=None,
+         references=None):
+    if profiler is None:
+        profiler = StageProfiler()
+    profiler.output_base = output_base
+    
     print("📖 Leyendo archivo de datos...")
     
-    with open('DATOS_IMPORT_RAW.txt', 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    with profiler.stage('leer') as stage:
+        # Acepta también .gz/.bz2/.xz o un .zip (se concatenan sus .txt, en orden)
+        lines = []
+        for source in iter_sources(input_file, RAW_EXTENSIONS):
+            with source.open_text(encoding='utf-8') as f:
+                lines.extend(f)
+        stage.rows = len(lines)
     
     print(f"📊 Total de líneas: {len(lines)}")
     
-    parsed = []
-    skipped = 0
+    with profiler.stage('parsear') as stage:
+        store = RecordStore(RECORD_FIELDS)
+        raw_columns = {field: [] for field in RAW_FIELDS}
+        line_numbers = []
+        report = ValidationReport()
+        
+        for i, line in enumerate(lines, 1):
+            # Saltar líneas vacías o de encabezado
+            if not line.strip() or 'client_name' in line.lower():
+                continue
+            
+            record = parse_line(line, i, report)
+            if record:
+                store.append(record)
+                for field in RAW_FIELDS:
+                    raw_columns[field].append(record[field])
+                line_numbers.append(i)
+        # Las líneas crudas ya no hacen falta: no conviven con la validación
+        del lines
+        stage.rows = len(store)
     
-    for i, line in enumerate(lines, 1):
-        # Saltar líneas vacías o de encabezado
-        if not line.strip() or 'client_name' in line.lower():
-            continue
+    with profiler.stage('validar') as stage:
+        # Validar por columnas (campos obligatorios, email broker, fechas, comisión)
+        rules = IMPORT_RULES
+        if references is not None:
+            # Remapear variantes conocidas y rechazar referencias inexistentes
+            references.apply(store)
+            rules = IMPORT_RULES + references.rules()
+        # Cada regla decodifica solo sus columnas (no todo el store a la vez)
+        columns = store.column_view(raw_columns)
+        validation = validate(columns, line_numbers, rules)
+        del columns, raw_columns
+        parse_errors = len(report)
+        report.errors.extend(validation.errors)
+        report.rejected = validation.rejected
         
-        record = parse_line(line, i)
-        if record:
-            parsed.append(record)
-        else:
-            skipped += 1
+        parsed = store.drop(validation.rejected)
+        skipped = parse_errors + len(validation.rejected)
+        stage.rows = len(store)
+    
+    report.print_summary()
+    if report.errors:
+        errors_file = report.write(f'{output_base}_ERRORES.csv')
+        print(f"💾 Detalle de observaciones: {errors_file}")
     
     print(f"\n✅ Registros parseados: {len(parsed)}")
     print(f"⚠️  Registros omitidos: {skipped}")
     
-    # Agrupar por broker
-    by_broker = defaultdict(list)
-    for record in parsed:
-        by_broker[record['broker_email']].append(record)
+    # Agrupar por broker, aseguradora y ramo
+    with profiler.stage('agregar') as stage:
+        by_broker = parsed.counts('broker_email')
+        by_insurer = parsed.counts('insurer_name')
+        by_ramo = parsed.counts('ramo')
+        stage.rows = len(parsed)
     
     print(f"\n👥 Brokers únicos: {len(by_broker)}")
-    for email, records in sorted(by_broker.items(), key=lambda x: len(x[1]), reverse=True):
-        print(f"   - {email}: {len(records)} pólizas")
+    for email, count in sorted(by_broker.items(), key=lambda x: x[1], reverse=True):
+        print(f"   - {email}: {count} pólizas")
     
     # Aseguradoras únicas
-    insurers = sorted(set(r['insurer_name'] for r in parsed))
+    insurers = sorted(by_insurer)
     print(f"\n🏢 Aseguradoras únicas ({len(insurers)}):")
     for ins in insurers:
-        count = sum(1 for r in parsed if r['insurer_name'] == ins)
-        print(f"   - {ins}: {count} pólizas")
+        print(f"   - {ins}: {by_insurer[ins]} pólizas")
     
     # Ramos únicos
-    ramos = sorted(set(r['ramo'] for r in parsed if r['ramo']))
+    ramos = sorted(r for r in by_ramo if r)
     print(f"\n📋 Ramos únicos ({len(ramos)}):")
     for ramo in ramos:
-        count = sum(1 for r in parsed if r['ramo'] == ramo)
-        print(f"   - {ramo}: {count} pólizas")
+        print(f"   - {ramo}: {by_ramo[ramo]} pólizas")
     
     # Guardar JSON completo
-    with open('DATOS_IMPORT.json', 'w', encoding='utf-8') as f:
-        json.dump(parsed, f, indent=2, ensure_ascii=False)
-    print(f"\n💾 JSON guardado: DATOS_IMPORT.json")
+    with profiler.stage('escribir') as stage:
+        output_file = f'{output_base}.json'
+        with open(output_file, 'w', encoding='utf-8') as f:
+            parsed.write_json(f, indent=2)
+        # Un JSON por broker/aseguradora para cargas en paralelo
+        index_file = write_shards(parsed, f'{output_base}_SHARDS', shard_by, source=output_file) if shard_by else None
+        stage.rows = len(parsed)
+    print(f"\n💾 JSON guardado: {output_file}")
+    if index_file:
+        print_shards_summary(index_file)
     
     # Estadísticas
     print('\n📊 ESTADÍSTICAS:')
@@ -184,10 +262,37 @@ def main():
     
     print('\n✅ Proceso completado!')
     print('\n🔄 Siguiente paso:')
-    print('   1. Revisa el archivo DATOS_IMPORT.json')
+    print(f'   1. Revisa el archivo {output_file}')
     print('   2. Copia su contenido')
     print('   3. Ejecuta en Supabase SQL Editor:')
     print('      SELECT * FROM bulk_import_clients_policies(\'[... pega el JSON ...]\'::jsonb);')
+    
+    profiler.write()
 
 if __name__ == '__main__':
-    main()
+    profiler = profiler_from_argv(sys.argv)
+    
+    references = None
+    if '--referencias' in sys.argv:
+        i = sys.argv.index('--referencias')
+        from reference_snapshot import DEFAULT_SNAPSHOT, load_references
+        references = load_references(sys.argv[i + 1] if i + 1 < len(sys.argv) else DEFAULT_SNAPSHOT)
+        del sys.argv[i:i + 2]
+    
+    shard_by = None
+    if '--particionar' in sys.argv:
+        i = sys.argv.index('--particionar')
+        shard_by = sys.argv[i + 1] if i + 1 < len(sys.argv) else 'broker'
+        del sys.argv[i:i + 2]
+        if shard_by not in SHARD_KEYS:
+            print(f"❌ ERROR: Partición desconocida: {shard_by}. Disponibles: {list(SHARD_KEYS)}")
+            sys.exit(1)
+    
+    input_file = sys.argv[1] if len(sys.argv) > 1 else 'DATOS_IMPORT_RAW.txt'
+    output_base = sys.argv[2] if len(sys.argv) > 2 else 'DATOS_IMPORT'
+    
+    try:
+        main(profiler, input_file, output_base, shard_by, references)
+    except FileNotFoundError:
+        print(f"❌ ERROR: Archivo no encontrado: {input_file}")
+        sys.exit(1)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Claves canónicas de número de póliza e índice hash para cruzar reportes
+Port de las reglas de src/lib/utils/policy-number.ts (ver FORMATOS_POLIZAS_ASEGURADORAS.md)
+"""
+
+import csv
+import json
+import re
+import sys
+
+# Reglas por aseguradora (slug → regla de búsqueda)
+#   'full'    = se compara el número completo
+#   'partial' = se compara solo el bloque indicado (índice base 0) de un
+#               número con 'blocks' bloques (inputCount en policy-number.ts)
+POLICY_RULES = {
+    'assa': {'insurer': 'ASSA', 'rule': 'full', 'join_with': ''},
+    'ancon': {'insurer': 'ANCON', 'rule': 'partial', 'parts': [1], 'blocks': 3},
+    'internacional': {'insurer': 'INTERNACIONAL', 'rule': 'full', 'strip_zeros': True},
+    'sura': {'insurer': 'SURA', 'rule': 'full'},
+    'banesco': {'insurer': 'BANESCO', 'rule': 'partial', 'parts': [2], 'blocks': 4},
+    'mb': {'insurer': 'MB', 'rule': 'partial', 'parts': [2], 'blocks': 4},
+    'fedpa': {'insurer': 'FEDPA', 'rule': 'partial', 'parts': [2], 'blocks': 4},
+    'regional': {'insurer': 'REGIONAL', 'rule': 'partial', 'parts': [2], 'blocks': 4},
+    'optima': {'insurer': 'OPTIMA', 'rule': 'partial', 'parts': [2], 'blocks': 4},
+    'aliado': {'insurer': 'ALIADO', 'rule': 'partial', 'parts': [2], 'blocks': 4},
+    'palig': {'insurer': 'PALIG', 'rule': 'full'},
+    'acerta': {'insurer': 'ACERTA', 'rule': 'partial', 'parts': [1], 'blocks': 3},
+    'mapfre': {'insurer': 'MAPFRE', 'rule': 'full'},
+    'univivir': {'insurer': 'UNIVIVIR', 'rule': 'partial', 'parts': [2], 'blocks': 3},
+    'assistcard': {'insurer': 'ASSISTCARD', 'rule': 'full'},
+    'vumi': {'insurer': 'VUMI', 'rule': 'full'},
+    'ifs': {'insurer': 'IFS', 'rule': 'full'},
+    'ww-medical': {'insurer': 'WW MEDICAL', 'rule': 'full'},
+    'mercantil': {'insurer': 'MERCANTIL', 'rule': 'full', 'strip_zeros': True},
+    'general': {'insurer': 'GENERAL', 'rule': 'full'},
+}
+
+INSURER_ALIASES = {
+    'WORLDWIDE MEDICAL': 'ww-medical',
+    'WWMEDICAL': 'ww-medical',
+    'ASSIST CARD': 'assistcard',
+}
+
+SCIENTIFIC_NOTATION = re.compile(r'^\d+(\.\d+)?E[+-]?\d+$')
+INTEGRAL_FLOAT = re.compile(r'^(\d+)\.0+$')
+
+_slug_cache = {}
+
+
+def get_insurer_slug(insurer_name):
+    """Detecta el slug de la aseguradora por nombre (mismo criterio que getInsurerSlug)"""
+    if not insurer_name:
+        return None
+
+    normalized = str(insurer_name).strip().upper()
+    if normalized in _slug_cache:
+        return _slug_cache[normalized]
+
+    compact = re.sub(r'[^A-Z0-9]', '', normalized)
+    slug = None
+
+    for alias, alias_slug in INSURER_ALIASES.items():
+        if alias in normalized or re.sub(r'[^A-Z0-9]', '', alias) in compact:
+            slug = alias_slug
+            break
+
+    if slug is None:
+        for candidate, config in POLICY_RULES.items():
+            if config['insurer'] == normalized:
+                slug = candidate
+                break
+
+    if slug is None:
+        for candidate, config in POLICY_RULES.items():
+            name = config['insurer']
+            if name in normalized or re.sub(r'[^A-Z0-9]', '', name) in compact:
+                slug = candidate
+                break
+
+    _slug_cache[normalized] = slug
+    return slug
+
+
+def clean_policy_number(value):
+    """
+    Limpia un número de póliza leído de Excel/CSV.
+    Devuelve None si está vacío o si Excel lo convirtió a notación científica
+    (los dígitos originales ya se perdieron y no se puede recuperar).
+    """
+    if value is None:
+        return None
+    value_str = re.sub(r'\s+', '', str(value)).upper()
+    if not value_str or value_str in ('NAN', 'NONE', 'NULL'):
+        return None
+
+    if SCIENTIFIC_NOTATION.match(value_str):
+        return None
+
+    # 12345.0 → 12345 (celda numérica leída como float)
+    integral = INTEGRAL_FLOAT.match(value_str)
+    if integral:
+        value_str = integral.group(1)
+
+    return value_str
+
+
+def _strip_zeros(part):
+    """Quita ceros a la izquierda de un bloque numérico"""
+    if part.isdigit():
+        return part.lstrip('0') or '0'
+    return part
+
+
+def _longest_numeric_part(parts):
+    """Bloque numérico más largo (sin ceros a la izquierda); None si no hay o es ambiguo"""
+    numeric = [p for p in parts if p.isdigit()]
+    if not numeric:
+        return None
+    longest = max(len(p) for p in numeric)
+    candidates = [p for p in numeric if len(p) == longest]
+    if len(candidates) > 1:
+        return None
+    return _strip_zeros(candidates[0])
+
+
+def canonical_policy_key(policy_number, insurer_name):
+    """
+    Genera la clave canónica (aseguradora, término) para cruzar una póliza.
+    Devuelve None si el número no es utilizable.
+    """
+    cleaned = clean_policy_number(policy_number)
+    if not cleaned:
+        return None
+
+    slug = get_insurer_slug(insurer_name)
+    insurer_key = slug or (str(insurer_name).strip().upper() if insurer_name else '')
+    config = POLICY_RULES.get(slug)
+
+    if not config:
+        return (insurer_key, cleaned)
+
+    if config['rule'] == 'partial':
+        parts = [p for p in re.split(r'[-/]', cleaned) if p != '']
+        if len(parts) == config['blocks']:
+            term = '-'.join(_strip_zeros(parts[i]) for i in config['parts'])
+        elif len(parts) == 1:
+            # El reporte ya trae solo el bloque relevante
+            term = _strip_zeros(parts[0])
+        else:
+            # Número recortado ('123456-4', '01-123456-4') o con bloques de más:
+            # la posición no sirve, el bloque relevante es el numérico más largo
+            term = _longest_numeric_part(parts)
+            if term is None:
+                return None
+        return (insurer_key, term)
+
+    if config.get('join_with') == '':
+        return (insurer_key, re.sub(r'[-/]', '', cleaned))
+
+    if config.get('strip_zeros'):
+        return (insurer_key, '-'.join(_strip_zeros(p) for p in cleaned.split('-')))
+
+    return (insurer_key, cleaned)
+
+
+class PolicyIndex:
+    """Índice hash clave canónica → registro de cartera"""
+
+    def __init__(self, records, policy_field='policy_number', insurer_field='insurer_name'):
+        self.policy_field = policy_field
+        self.insurer_field = insurer_field
+        self._index = {}
+        self.duplicates = []
+        self.invalid = []
+
+        for record in records:
+            key = canonical_policy_key(record.get(policy_field), record.get(insurer_field))
+            if key is None:
+                self.invalid.append(record)
+                continue
+            if key in self._index:
+                self.duplicates.append((key, record))
+                continue
+            self._index[key] = record
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def get(self, policy_number, insurer_name):
+        """Busca un registro por número de póliza y aseguradora"""
+        key = canonical_policy_key(policy_number, insurer_name)
+        if key is None:
+            return None
+        return self._index.get(key)
+
+    def get_by_key(self, key):
+        """Busca un registro por clave canónica ya calculada"""
+        return self._index.get(key)
+
+
+def match_rows(index, rows, policy_field='policy_number', insurer_field='insurer_name', default_insurer=None):
+    """
+    Cruza filas de un reporte contra el índice en una sola pasada.
+    Retorna (matched, unmatched):
+      matched   = [(fila_num, fila, registro)]
+      unmatched = [(fila_num, fila, motivo)]
+    """
+    matched = []
+    unmatched = []
+
+    for row_num, row in rows:
+        insurer = row.get(insurer_field) or default_insurer
+        key = canonical_policy_key(row.get(policy_field), insurer)
+        if key is None:
+            unmatched.append((row_num, row, 'numero_invalido'))
+            continue
+        record = index.get_by_key(key)
+        if record is None:
+            unmatched.append((row_num, row, 'sin_poliza'))
+        else:
+            matched.append((row_num, row, record))
+
+    return matched, unmatched
+
+
+def write_unmatched_report(unmatched, output_file, policy_field='policy_number'):
+    """Guarda las filas no cruzadas en CSV"""
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['fila', 'policy_number', 'motivo', 'datos'])
+        for row_num, row, reason in unmatched:
+            writer.writerow([row_num, row.get(policy_field), reason, json.dumps(row, ensure_ascii=False)])
+
+
+REPORT_POLICY_COLUMNS = ('policy_number', 'poliza', 'póliza', 'numero_poliza', 'no_poliza')
+REPORT_INSURER_COLUMNS = ('insurer_name', 'aseguradora', 'insurer')
+
+
+def read_report_rows(report_file):
+    """Lee un reporte CSV y normaliza las columnas de póliza/aseguradora"""
+    with open(report_file, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        for line_num, row in enumerate(reader, 2):
+            normalized = {(k or '').strip().lower(): v for k, v in row.items()}
+            for col in REPORT_POLICY_COLUMNS:
+                if normalized.get(col):
+                    normalized['policy_number'] = normalized[col]
+                    break
+            for col in REPORT_INSURER_COLUMNS:
+                if normalized.get(col):
+                    normalized['insurer_name'] = normalized[col]
+                    break
+            yield line_num, normalized
+
+
+def main(portfolio_file, report_file, default_insurer=None):
+    print(f"📖 Leyendo cartera: {portfolio_file}")
+    with open(portfolio_file, 'r', encoding='utf-8') as f:
+        portfolio = json.load(f)
+
+    index = PolicyIndex(portfolio)
+    print(f"🔑 Pólizas indexadas: {len(index)}")
+    if index.duplicates:
+        print(f"⚠️  Claves duplicadas en cartera: {len(index.duplicates)}")
+    if index.invalid:
+        print(f"⚠️  Pólizas con número inválido: {len(index.invalid)}")
+
+    print(f"📖 Leyendo reporte: {report_file}")
+    matched, unmatched = match_rows(index, read_report_rows(report_file), default_insurer=default_insurer)
+
+    print(f"\n✅ Filas cruzadas: {len(matched)}")
+    print(f"⚠️  Filas sin cruzar: {len(unmatched)}")
+
+    base = report_file.rsplit('.', 1)[0]
+    matched_file = base + '_MATCHED.json'
+    with open(matched_file, 'w', encoding='utf-8') as f:
+        json.dump([
+            {'fila': row_num, 'reporte': row, 'poliza': record}
+            for row_num, row, record in matched
+        ], f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Cruce guardado: {matched_file}")
+
+    if unmatched:
+        unmatched_file = base + '_UNMATCHED.csv'
+        write_unmatched_report(unmatched, unmatched_file)
+        print(f"💾 Filas sin cruzar: {unmatched_file}")
+
+    return matched, unmatched
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Uso: python policy_keys.py <cartera_IMPORT.json> <reporte.csv> [aseguradora]")
+        sys.exit(1)
+
+    main(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Almacén compacto de registros para los scripts de importación
+Guarda las pólizas por columnas (struct-of-arrays) en lugar de un dict por fila:
+  - campos de baja cardinalidad (aseguradora, ramo, broker) → códigos enteros
+  - fechas YYYY-MM-DD → número de día (date.toordinal)
+  - textos → un solo buffer UTF-8 con offsets
+Cada fila se puede leer como dict mediante RecordView (solo lectura).
+"""
+
+import json
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from datetime import date
+
+# Clasificación por defecto de los campos del bulk import
+CATEGORY_FIELDS = ('insurer_name', 'ramo', 'broker_email')
+DATE_FIELDS = ('start_date', 'renewal_date')
+NUMBER_FIELDS = ('percent_override',)
+
+NO_DATE = 0         # None
+OVERFLOW_DATE = -1  # Texto que no es una fecha válida (se guarda aparte)
+
+
+class CategoryColumn:
+    """Columna codificada por diccionario (código 0 = None)"""
+
+    def __init__(self):
+        self.values = [None]
+        self.codes_by_value = {None: 0}
+        self.codes = array('H')
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _code(self, value):
+        code = self.codes_by_value.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes_by_value[value] = code
+            if code > 0xFFFF and self.codes.typecode == 'H':
+                self.codes = array('I', self.codes)
+        return code
+
+    def append(self, value):
+        # _code puede ensanchar self.codes a 'I': calcularlo antes de tomar el array
+        code = self._code(value)
+        self.codes.append(code)
+
+    def extend(self, other):
+        """Agrega otra CategoryColumn traduciendo sus códigos (sin decodificar fila por fila)"""
+        mapping = [self._code(value) for value in other.values]
+        self.codes.extend(array(self.codes.typecode, (mapping[code] for code in other.codes)))
+
+    def get(self, i):
+        return self.values[self.codes[i]]
+
+    def counts(self):
+        """Conteo por valor sin decodificar fila por fila"""
+        counts = Counter(self.codes)
+        return Counter({self.values[code]: n for code, n in counts.items()})
+
+    def select(self, positions):
+        column = CategoryColumn()
+        column.values = list(self.values)
+        column.codes_by_value = dict(self.codes_by_value)
+        column.codes = array(self.codes.typecode, (self.codes[i] for i in positions))
+        return column
+
+
+class DateColumn:
+    """Fechas ISO guardadas como número de día"""
+
+    def __init__(self):
+        self.days = array('i')
+        self.overflow = {}
+
+    def __len__(self):
+        return len(self.days)
+
+    def append(self, value):
+        if not value:
+            self.days.append(NO_DATE)
+            return
+        try:
+            self.days.append(date.fromisoformat(value).toordinal())
+        except (TypeError, ValueError):
+            self.overflow[len(self.days)] = value
+            self.days.append(OVERFLOW_DATE)
+
+    def extend(self, other):
+        offset = len(self.days)
+        self.days.extend(other.days)
+        self.overflow.update((offset + i, value) for i, value in other.overflow.items())
+
+    def get(self, i):
+        day = self.days[i]
+        if day == NO_DATE:
+            return None
+        if day == OVERFLOW_DATE:
+            return self.overflow[i]
+        return date.fromordinal(day).isoformat()
+
+    def select(self, positions):
+        column = DateColumn()
+        for new_i, i in enumerate(positions):
+            day = self.days[i]
+            column.days.append(day)
+            if day == OVERFLOW_DATE:
+                column.overflow[new_i] = self.overflow[i]
+        return column
+
+
+class NumberColumn:
+    """Números como float (NaN = None)"""
+
+    def __init__(self):
+        self.numbers = array('d')
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def append(self, value):
+        self.numbers.append(float('nan') if value is None else value)
+
+    def extend(self, other):
+        self.numbers.extend(other.numbers)
+
+    def get(self, i):
+        value = self.numbers[i]
+        return None if value != value else value
+
+    def select(self, positions):
+        column = NumberColumn()
+        column.numbers = array('d', (self.numbers[i] for i in positions))
+        return column
+
+
+class TextColumn:
+    """Textos concatenados en un buffer UTF-8 con offsets de fin"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array('Q')
+        self.present = bytearray()
+
+    def __len__(self):
+        return len(self.ends)
+
+    def append(self, value):
+        if value is None:
+            self.present.append(0)
+        else:
+            self.data += value.encode('utf-8')
+            self.present.append(1)
+        self.ends.append(len(self.data))
+
+    def extend(self, other):
+        offset = len(self.data)
+        self.data += other.data
+        self.ends.extend(end + offset for end in other.ends)
+        self.present += other.present
+
+    def get(self, i):
+        if not self.present[i]:
+            return None
+        start = self.ends[i - 1] if i else 0
+        return self.data[start:self.ends[i]].decode('utf-8')
+
+    def select(self, positions):
+        column = TextColumn()
+        for i in positions:
+            column.append(self.get(i))
+        return column
+
+
+class RecordView(Mapping):
+    """Vista dict de solo lectura sobre una fila del RecordStore"""
+
+    __slots__ = ('_store', '_i')
+
+    def __init__(self, store, i):
+        self._store = store
+        self._i = i
+
+    def __getitem__(self, field):
+        column = self._store._columns.get(field)
+        if column is None:
+            raise KeyError(field)
+        return column.get(self._i)
+
+    def __iter__(self):
+        return iter(self._store.fields)
+
+    def __len__(self):
+        return len(self._store.fields)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ColumnsView(Mapping):
+    """
+    {campo: [valores]} para la validación: cada columna del store se decodifica
+    al pedirla y no se guarda, así solo las columnas de la regla en curso
+    existen como listas. `extra` agrega columnas ya materializadas (valores crudos).
+    """
+
+    def __init__(self, store, extra=None):
+        self._store = store
+        self._extra = extra or {}
+
+    def __getitem__(self, field):
+        if field in self._extra:
+            return self._extra[field]
+        if field in self._store._columns:
+            return self._store.column(field)
+        raise KeyError(field)
+
+    def __iter__(self):
+        yield from self._store.fields
+        yield from (field for field in self._extra if field not in self._store._columns)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class RecordStore:
+    """Almacén por columnas con acceso tipo lista de dicts"""
+
+    def __init__(self, fields, category_fields=CATEGORY_FIELDS, date_fields=DATE_FIELDS, number_fields=NUMBER_FIELDS):
+        self.fields = list(fields)
+        self._columns = {}
+        for field in self.fields:
+            if field in category_fields:
+                self._columns[field] = CategoryColumn()
+            elif field in date_fields:
+                self._columns[field] = DateColumn()
+            elif field in number_fields:
+                self._columns[field] = NumberColumn()
+            else:
+                self._columns[field] = TextColumn()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        return RecordView(self, i)
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield RecordView(self, i)
+
+    def append(self, record):
+        for field, column in self._columns.items():
+            column.append(record.get(field))
+        self._size += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def append_store(self, other, fill=None):
+        """
+        Agrega todas las filas de otro store columna por columna (sin pasar por
+        dicts). Los campos que `other` no tiene toman el valor fill.get(campo).
+        """
+        fill = fill or {}
+        for field, column in self._columns.items():
+            source = other._columns.get(field)
+            if source is None:
+                value = fill.get(field)
+                for _ in range(len(other)):
+                    column.append(value)
+            elif type(source) is type(column):
+                column.extend(source)
+            else:
+                for i in range(len(other)):
+                    column.append(source.get(i))
+        self._size += len(other)
+
+    def column(self, field):
+        """Columna completa decodificada como lista"""
+        column = self._columns[field]
+        return [column.get(i) for i in range(self._size)]
+
+    def columns(self, fields=None):
+        """{campo: [valores]} con todas las columnas decodificadas a la vez"""
+        return {field: self.column(field) for field in (fields or self.fields)}
+
+    def column_view(self, extra=None):
+        """Columnas decodificadas de a una, bajo demanda (ver ColumnsView)"""
+        return ColumnsView(self, extra)
+
+    def set_column(self, field, values):
+        """Reemplaza una columna completa (p. ej. valores remapeados), con la misma codificación"""
+        if len(values) != self._size:
+            raise ValueError(f"{field}: {len(values)} valores para {self._size} filas")
+        column = type(self._columns[field])()
+        for value in values:
+            column.append(value)
+        self._columns[field] = column
+
+    def counts(self, field):
+        """Conteo por valor (rápido en campos codificados)"""
+        column = self._columns[field]
+        if isinstance(column, CategoryColumn):
+            return column.counts()
+        return Counter(column.get(i) for i in range(self._size))
+
+    def select(self, positions):
+        """Nuevo store con solo las filas indicadas (en ese orden)"""
+        positions = list(positions)
+        store = RecordStore.__new__(RecordStore)
+        store.fields = list(self.fields)
+        store._columns = {field: column.select(positions) for field, column in self._columns.items()}
+        store._size = len(positions)
+        return store
+
+    def drop(self, positions):
+        """Nuevo store sin las filas indicadas"""
+        excluded = set(positions)
+        return self.select(i for i in range(self._size) if i not in excluded)
+
+    def iter_dicts(self):
+        columns = [(field, self._columns[field]) for field in self.fields]
+        for i in range(self._size):
+            yield {field: column.get(i) for field, column in columns}
+
+    def to_dicts(self):
+        return list(self.iter_dicts())
+
+    def write_json(self, f, indent=None):
+        """
+        Escribe el store como arreglo JSON fila por fila, sin materializar la lista.
+        Con indent produce la misma salida que json.dump(lista, indent=indent).
+        """
+        if not self._size:
+            f.write('[]')
+            return
+
+        if indent is None:
+            f.write('[')
+            for i, record in enumerate(self.iter_dicts()):
+                if i:
+                    f.write(',')
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            f.write(']')
+            return
+
+        pad = ' ' * indent
+        f.write('[\n')
+        for i, record in enumerate(self.iter_dicts()):
+            if i:
+                f.write(',\n')
+            encoded = json.dumps(record, ensure_ascii=False, indent=indent)
+            f.write(pad + encoded.replace('\n', '\n' + pad))
+        f.write('\n]')
+
+
+def _sample_record(i):
+    """Registro sintético para la medición de memoria"""
+    return {
+        'client_name': f'CLIENTE NUMERO {i} APELLIDO',
+        'national_id': f'8-{i % 999}-{i}',
+        'email': f'cliente{i}@correo.com' if i % 3 else None,
+        'phone': f'6{i % 10000000:07d}',
+        'policy_number': f'02-01-{i:06d}-4',
+        'insurer_name': ('ASSA', 'FEDPA', 'ANCON', 'SURA', 'MAPFRE', 'ASSISTCARD')[i % 6],
+        'ramo': ('AUTO', 'VIDA', 'SALUD', 'INCENDIO')[i % 4],
+        'start_date': date.fromordinal(738000 + i % 700).isoformat(),
+        'renewal_date': date.fromordinal(738365 + i % 700).isoformat(),
+        'broker_email': f'broker{i % 80}@lideresenseguros.com',
+        'percent_override': (0.94, 1.0, None)[i % 3],
+    }
+
+
+def measure(rows):
+    """Compara el pico de memoria (tracemalloc) de lista de dicts vs RecordStore"""
+    import tracemalloc
+
+    fields = list(_sample_record(0).keys())
+
+    tracemalloc.start()
+    as_dicts = [_sample_record(i) for i in range(rows)]
+    dicts_bytes = tracemalloc.get_traced_memory()[0]
+    del as_dicts
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = RecordStore(fields)
+    for i in range(rows):
+        store.append(_sample_record(i))
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    del store
+    tracemalloc.stop()
+
+    return dicts_bytes, store_bytes
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"📏 Midiendo memoria con {rows:,} pólizas sintéticas...")
+    dicts_bytes, store_bytes = measure(rows)
+    print(f"   Lista de dicts: {dicts_bytes / 1024 / 1024:,.1f} MB")
+    print(f"   RecordStore:    {store_bytes / 1024 / 1024:,.1f} MB")
+    print(f"   Reducción:      {dicts_bytes / store_bytes:,.1f}x")
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Snapshot local de datos de referencia (brokers, aseguradoras y ramos)
+Exporta las tablas de Supabase (o archivos exportados) a un SQLite compacto
+con sello de versión y checksums. Los scripts de importación lo cargan en
+memoria para validar broker_email / insurer_name / ramo con búsquedas O(1)
+y remapear variantes conocidas (nombre de broker → email, alias de
+aseguradora, ramo sin acentos) antes de generar SQL, en vez de descubrir
+los errores en el servidor a mitad de la transacción.
+
+Uso:
+  python reference_snapshot.py exportar --supabase [--salida referencias.sqlite]
+  python reference_snapshot.py exportar --brokers brokers.csv --aseguradoras insurers.csv [--ramos ramos.txt]
+  python reference_snapshot.py info [referencias.sqlite]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+from import_validation import ERROR, WARNING, Rule
+from name_keys import fold_key, name_key
+from policy_keys import get_insurer_slug
+
+DEFAULT_SNAPSHOT = 'referencias.sqlite'
+# Antigüedad a partir de la cual se avisa que conviene volver a exportar
+MAX_AGE_DAYS = 7
+PAGE_SIZE = 1000
+# Tope de valores distintos de ramo (cada uno es una consulta)
+MAX_DISTINCT = 500
+HTTP_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE brokers (email TEXT PRIMARY KEY, name_key TEXT, name TEXT, id TEXT, active INTEGER);
+CREATE TABLE insurers (name_key TEXT PRIMARY KEY, name TEXT NOT NULL, slug TEXT, id TEXT, active INTEGER);
+CREATE TABLE ramos (ramo_key TEXT PRIMARY KEY, ramo TEXT NOT NULL);
+CREATE INDEX brokers_name_key ON brokers (name_key);
+"""
+
+
+def _active(value):
+    if value in (None, ''):
+        return 1
+    return 0 if str(value).strip().lower() in ('false', '0', 'no', 'f') else 1
+
+
+def _get_json(url, key, headers=None):
+    from urllib.request import Request, urlopen
+
+    req = Request(url, headers={'apikey': key, 'Authorization': f'Bearer {key}', **(headers or {})})
+    with urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+        return json.loads(resp.read().decode('utf-8'))
+
+
+def fetch_table(base_url, key, table, select, page_size=PAGE_SIZE):
+    """Lee una tabla completa por la API REST de Supabase (paginada con Range)"""
+    from urllib.parse import quote
+
+    rows = []
+    url = f"{base_url.rstrip('/')}/rest/v1/{table}?select={quote(select, safe=',')}"
+    while True:
+        page = _get_json(url, key, {
+            'Range-Unit': 'items',
+            'Range': f'{len(rows)}-{len(rows) + page_size - 1}',
+        })
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+def _in_list(values):
+    """Lista para un filtro in.(...) de PostgREST, con cada valor entre comillas"""
+    return ','.join('"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"' for value in values)
+
+
+def fetch_distinct(base_url, key, table, column, max_values=MAX_DISTINCT):
+    """
+    Valores distintos (no vacíos) de una columna sin bajar la tabla: PostgREST
+    no tiene DISTINCT, así que se pide una fila por vez excluyendo los valores
+    ya vistos (una consulta de una fila por valor distinto).
+    """
+    from urllib.parse import quote
+
+    values = []
+    base = f"{base_url.rstrip('/')}/rest/v1/{table}?select={column}&{column}=not.is.null&{column}=neq.&limit=1"
+    while len(values) < max_values:
+        url = base
+        if values:
+            url += f"&{column}=not.in.({quote(_in_list(values), safe=',')})"
+        page = _get_json(url, key)
+        if not page:
+            return values
+        values.append(page[0][column])
+    raise RuntimeError(f"{table}.{column}: más de {max_values} valores distintos")
+
+
+def fetch_supabase():
+    """(brokers, aseguradoras, ramos) desde Supabase con la service role key"""
+    base_url = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
+    key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+    if not base_url or not key:
+        raise RuntimeError('Faltan NEXT_PUBLIC_SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY')
+    brokers = fetch_table(base_url, key, 'brokers', 'id,email,name,active')
+    insurers = fetch_table(base_url, key, 'insurers', 'id,name,active')
+    # policies.ramo es texto libre: el catálogo son los valores ya usados
+    ramos = fetch_distinct(base_url, key, 'policies', 'ramo')
+    return brokers, insurers, [{'ramo': r} for r in sorted(ramos)], f'supabase:{base_url}'
+
+
+def read_rows(path, single_field=None):
+    """Filas de un export: JSON (lista de objetos), CSV con encabezado o TXT (un valor por línea)"""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.endswith('.csv'):
+            return list(csv.DictReader(f))
+        return [{single_field: line.strip()} for line in f if line.strip()]
+
+
+def _table_checksum(rows):
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def write_snapshot(path, brokers, insurers, ramos, source):
+    """Escribe el snapshot (atómico) y devuelve su versión"""
+    broker_rows = sorted({
+        row['email'].strip().lower(): (
+            row['email'].strip().lower(), name_key(row.get('name')), row.get('name'),
+            row.get('id'), _active(row.get('active')),
+        )
+        for row in brokers if row.get('email')
+    }.values())
+    insurer_rows = sorted({
+        fold_key(row['name']): (
+            fold_key(row['name']), row['name'].strip(), get_insurer_slug(row['name']),
+            row.get('id'), _active(row.get('active')),
+        )
+        for row in insurers if row.get('name')
+    }.values())
+    ramo_rows = sorted({fold_key(row['ramo']): (fold_key(row['ramo']), row['ramo'].strip().upper())
+                        for row in ramos if row.get('ramo')}.values())
+
+    checksums = {
+        'brokers': _table_checksum(broker_rows),
+        'insurers': _table_checksum(insurer_rows),
+        'ramos': _table_checksum(ramo_rows),
+    }
+    created_at = datetime.now(timezone.utc)
+    combined = hashlib.sha256(''.join(checksums.values()).encode('ascii')).hexdigest()
+    version = f"{created_at.strftime('%Y%m%dT%H%M%SZ')}-{combined[:8]}"
+
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany('INSERT INTO brokers VALUES (?, ?, ?, ?, ?)', broker_rows)
+        conn.executemany('INSERT INTO insurers VALUES (?, ?, ?, ?, ?)', insurer_rows)
+        conn.executemany('INSERT INTO ramos VALUES (?, ?)', ramo_rows)
+        meta = {
+            'version': version,
+            'created_at': created_at.isoformat(timespec='seconds'),
+            'source': source,
+            'brokers': str(len(broker_rows)),
+            'insurers': str(len(insurer_rows)),
+            'ramos': str(len(ramo_rows)),
+        }
+        meta.update({f'sha256_{table}': digest for table, digest in checksums.items()})
+        conn.executemany('INSERT INTO meta VALUES (?, ?)', sorted(meta.items()))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return version
+
+
+def _remap_values(values, resolve):
+    """Reemplaza in-place los valores con remapeo conocido; devuelve cuántos cambió"""
+    cache, count = {}, 0
+    for i, value in enumerate(values):
+        if value not in cache:
+            cache[value] = resolve(value)
+        if cache[value] != value:
+            values[i] = cache[value]
+            count += 1
+    return count
+
+
+class ReferenceData:
+    """Snapshot cargado en memoria: todas las búsquedas son dicts (O(1))"""
+
+    def __init__(self, brokers, broker_names, insurers, insurer_slugs, ramos, meta, insurer_active=None):
+        self.brokers = brokers              # email → activo
+        self.broker_names = broker_names    # nombre normalizado → email (solo nombres únicos)
+        self.insurers = insurers            # nombre normalizado → nombre canónico
+        self.insurer_slugs = insurer_slugs  # slug → nombre canónico (solo slugs únicos)
+        self.ramos = ramos                  # ramo normalizado → ramo canónico
+        self.meta = meta
+        # nombre canónico → activo (sin dato: todas activas)
+        self.insurer_active = insurer_active if insurer_active is not None else \
+            {name: True for name in insurers.values()}
+
+    @classmethod
+    def load(cls, path=DEFAULT_SNAPSHOT):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        # URI armada por pathlib: rutas con ?, # o % no se confunden con la query
+        conn = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + '?mode=ro', uri=True)
+        try:
+            meta = dict(conn.execute('SELECT key, value FROM meta'))
+            brokers, broker_names, ambiguous = {}, {}, set()
+            for email, stored_key, active in conn.execute('SELECT email, name_key, active FROM brokers'):
+                brokers[email] = bool(active)
+                # Snapshots anteriores guardaban fold_key: se reordena al cargar
+                key = name_key(stored_key)
+                if key:
+                    if key in broker_names:
+                        ambiguous.add(key)
+                    broker_names[key] = email
+            for key in ambiguous:
+                del broker_names[key]
+
+            insurers, insurer_active, insurer_slugs, slug_counts = {}, {}, {}, {}
+            for insurer_key, name, slug, active in conn.execute('SELECT name_key, name, slug, active FROM insurers'):
+                insurers[insurer_key] = name
+                insurer_active[name] = bool(active)
+                if slug:
+                    slug_counts[slug] = slug_counts.get(slug, 0) + 1
+                    insurer_slugs[slug] = name
+            for slug, count in slug_counts.items():
+                if count > 1:
+                    del insurer_slugs[slug]
+
+            ramos = dict(conn.execute('SELECT ramo_key, ramo FROM ramos'))
+        finally:
+            conn.close()
+        return cls(brokers, broker_names, insurers, insurer_slugs, ramos, meta, insurer_active)
+
+    def age_days(self):
+        created = datetime.fromisoformat(self.meta['created_at'])
+        return (datetime.now(timezone.utc) - created).total_seconds() / 86400
+
+    def print_summary(self):
+        print(f"\n📚 Referencias: snapshot {self.meta['version']} "
+              f"({len(self.brokers)} brokers, {len(self.insurers)} aseguradoras, {len(self.ramos)} ramos)")
+        inactive_brokers = sum(1 for active in self.brokers.values() if not active)
+        inactive_insurers = sum(1 for active in self.insurer_active.values() if not active)
+        if inactive_brokers or inactive_insurers:
+            print(f"   Inactivos: {inactive_brokers} brokers, {inactive_insurers} aseguradoras")
+        if self.age_days() > MAX_AGE_DAYS:
+            print(f"⚠️  El snapshot tiene {self.age_days():.0f} días: vuelve a exportarlo")
+
+    def resolve_broker(self, value):
+        if not value:
+            return value
+        email = value.strip().lower()
+        if email in self.brokers:
+            return email
+        if '@' not in email:
+            return self.broker_names.get(name_key(value), value)
+        return value
+
+    def resolve_insurer(self, value):
+        if not value:
+            return value
+        key = fold_key(value)
+        if key in self.insurers:
+            return self.insurers[key]
+        return self.insurer_slugs.get(get_insurer_slug(value), value)
+
+    def resolve_ramo(self, value):
+        if not value:
+            return value
+        return self.ramos.get(fold_key(value), value)
+
+    def resolvers(self):
+        """
+        campo → (función de remapeo, valores activos, valores inactivos, severidad).
+        Solo los activos son válidos; los inactivos se reportan aparte.
+        """
+        checks = {}
+        if self.brokers:
+            checks['broker_email'] = (
+                self.resolve_broker,
+                {email for email, active in self.brokers.items() if active},
+                {email for email, active in self.brokers.items() if not active},
+                ERROR,
+            )
+        if self.insurers:
+            checks['insurer_name'] = (
+                self.resolve_insurer,
+                {name for name, active in self.insurer_active.items() if active},
+                {name for name, active in self.insurer_active.items() if not active},
+                ERROR,
+            )
+        if self.ramos:
+            # ramo es texto libre en policies (sin FK): se reporta pero no se rechaza
+            checks['ramo'] = (self.resolve_ramo, set(self.ramos.values()), set(), WARNING)
+        return checks
+
+    def remap(self, columns):
+        """Remapea en columns (in-place) las variantes conocidas; devuelve {campo: remapeos}"""
+        remapped = {}
+        for field, (resolve, _, _, _) in self.resolvers().items():
+            values = columns.get(field)
+            if values is None:
+                continue
+            count = _remap_values(values, resolve)
+            if count:
+                remapped[field] = count
+        return remapped
+
+    def rules(self):
+        """Reglas de validación: referencia inexistente o inactiva en el snapshot"""
+        rules = []
+        for field, (_, active, inactive, severity) in self.resolvers().items():
+            def unknown(columns, size, field=field, active=active, inactive=inactive):
+                values = columns.get(field) or []
+                return [(i, field, v) for i, v in enumerate(values) if v and v not in active and v not in inactive]
+            rules.append(Rule('referencia_desconocida', (field,), unknown, severity))
+            if inactive:
+                def disabled(columns, size, field=field, inactive=inactive):
+                    values = columns.get(field) or []
+                    return [(i, field, v) for i, v in enumerate(values) if v in inactive]
+                rules.append(Rule('referencia_inactiva', (field,), disabled, severity))
+        return rules
+
+    def apply(self, store):
+        """Remapea las columnas del RecordStore, de a una; devuelve {campo: remapeos}"""
+        remapped = {}
+        for field, (resolve, _, _, _) in self.resolvers().items():
+            if field not in store.fields:
+                continue
+            values = store.column(field)
+            count = _remap_values(values, resolve)
+            if count:
+                store.set_column(field, values)
+                remapped[field] = count
+        if remapped:
+            print("🔁 Remapeos con el snapshot de referencias:")
+            for field, count in remapped.items():
+                print(f"   - {field}: {count}")
+        return remapped
+
+
+def load_references(path):
+    """Carga el snapshot e imprime su versión (None si no se pidió)"""
+    if not path:
+        return None
+    references = ReferenceData.load(path)
+    references.print_summary()
+    return references
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshot local de brokers, aseguradoras y ramos')
+    sub = parser.add_subparsers(dest='accion', required=True)
+
+    p = sub.add_parser('exportar', help='Crear el snapshot desde Supabase o desde archivos exportados')
+    p.add_argument('--supabase', action='store_true',
+                   help='Leer de Supabase (NEXT_PUBLIC_SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)')
+    p.add_argument('--brokers', help='CSV/JSON con email, name[, id, active]')
+    p.add_argument('--aseguradoras', help='CSV/JSON con name[, id, active]')
+    p.add_argument('--ramos', help='CSV/JSON con ramo, o TXT con un ramo por línea')
+    p.add_argument('--salida', default=DEFAULT_SNAPSHOT)
+
+    p = sub.add_parser('info', help='Versión y contenido del snapshot')
+    p.add_argument('archivo', nargs='?', default=DEFAULT_SNAPSHOT)
+
+    args = parser.parse_args()
+
+    if args.accion == 'info':
+        try:
+            references = ReferenceData.load(args.archivo)
+        except FileNotFoundError:
+            print(f"❌ ERROR: Snapshot no encontrado: {args.archivo}")
+            sys.exit(1)
+        print(json.dumps(references.meta, indent=2, ensure_ascii=False))
+        references.print_summary()
+        return
+
+    if args.supabase:
+        brokers, insurers, ramos, source = fetch_supabase()
+    elif args.brokers and args.aseguradoras:
+        brokers = read_rows(args.brokers)
+        insurers = read_rows(args.aseguradoras)
+        ramos = read_rows(args.ramos, 'ramo') if args.ramos else []
+        source = 'archivos:' + ','.join(os.path.basename(p) for p in (args.brokers, args.aseguradoras, args.ramos) if p)
+    else:
+        print("❌ ERROR: Usa --supabase o --brokers + --aseguradoras")
+        sys.exit(1)
+
+    version = write_snapshot(args.salida, brokers, insurers, ramos, source)
+    print(f"💾 Snapshot {version}: {args.salida}")
+    ReferenceData.load(args.salida).print_summary()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,19 @@
 """Test FEDPA crear_poliza_auto_cc_externos step 3 directly"""
-import urllib.request, json, uuid
+import urllib.request, json, uuid, time, os
+from fedpa_breaker import BreakerRegistry, print_metrics
+from fedpa_documents import DocumentPreprocessor, build_multipart, print_report
+
+# FEDPA_BASE_URL points the test at the local stand-in (fedpa_standin.py)
+BASE = os.environ.get('FEDPA_BASE_URL', 'https://wscanales.segfedpa.com/EmisorFedpa.Api/api')
+breakers = BreakerRegistry()
+
+# Documents: preprocess in the background while quoting (steps 1-2)
+docs = DocumentPreprocessor()
+doc_futures = docs.submit_many({
+    'File1': 'test_cedula.pdf',
+    'File2': 'test_licencia.pdf',
+    'File3': 'test_registro.pdf',
+})
 
 # Step 1: get_cotizacion
 cot_body = {
@@ -10,12 +24,7 @@ cot_body = {
     'Telefono': '60001001', 'Email': 'test@test.com',
     'Usuario': 'SLIDERES', 'Clave': 'lider836'
 }
-req = urllib.request.Request(
-    'https://wscanales.segfedpa.com/EmisorFedpa.Api/api/Polizas/get_cotizacion',
-    data=json.dumps(cot_body).encode(), headers={'Content-Type': 'application/json'}, method='POST'
-)
-resp = urllib.request.urlopen(req)
-cot_data = json.loads(resp.read())
+cot_data = breakers.post_json(f'{BASE}/Polizas/get_cotizacion', cot_body)
 item = cot_data[0]
 id_cot = str(item.get('COTIZACION', ''))
 sub_ramo = str(item.get('SUBRAMO', '04'))
@@ -25,12 +34,7 @@ print(f"Step 1 OK: IdCotizacion={id_cot}, SubRamo={sub_ramo}, Ramo={ramo}, Prima
 
 # Step 2: get_nropoliza
 nro_body = {'Usuario': 'SLIDERES', 'Clave': 'lider836'}
-req2 = urllib.request.Request(
-    'https://wscanales.segfedpa.com/EmisorFedpa.Api/api/Polizas/get_nropoliza',
-    data=json.dumps(nro_body).encode(), headers={'Content-Type': 'application/json'}, method='POST'
-)
-resp2 = urllib.request.urlopen(req2)
-nro_data = json.loads(resp2.read())
+nro_data = breakers.post_json(f'{BASE}/Polizas/get_nropoliza', nro_body)
 nro_poliza = str(nro_data[0].get('NUMPOL', ''))
 print(f"Step 2 OK: NroPoliza={nro_poliza}")
 
@@ -85,45 +89,30 @@ emision_data = {
 print(f"\nStep 3: NroPoliza in payload = '{emision_data['NroPoliza']}'")
 print(f"IdCotizacion in payload = '{emision_data['IdCotizacion']}'")
 
-# Build multipart manually
-boundary = uuid.uuid4().hex
-body_parts = []
-
-# Add "data" field (text)
-body_parts.append(f"--{boundary}")
-body_parts.append('Content-Disposition: form-data; name="data"')
-body_parts.append("")
-body_parts.append(json.dumps(emision_data))
-
-# Add dummy File1
-dummy_pdf = b"%PDF-1.4 dummy"
-body_parts.append(f"--{boundary}")
-body_parts.append('Content-Disposition: form-data; name="File1"; filename="cedula.pdf"')
-body_parts.append("Content-Type: application/pdf")
-body_parts.append("")
+# Wait for the documents (usually already done during steps 1-2)
+wait_start = time.perf_counter()
+files = {field: future.result() for field, future in doc_futures.items()}
+docs.close()
+print(f"Documents ready (waited {time.perf_counter() - wait_start:.2f}s)")
+print_report(files, docs.budget, docs.stats)
 
-# Close boundary placeholder — we'll build binary body
-end_boundary = f"\r\n--{boundary}--\r\n"
-
-# Build the body as bytes
-text_before_file = "\r\n".join(body_parts) + "\r\n"
-body_bytes = text_before_file.encode("utf-8") + dummy_pdf + end_boundary.encode("utf-8")
-
-req3 = urllib.request.Request(
-    'https://wscanales.segfedpa.com/EmisorFedpa.Api/api/Polizas/crear_poliza_auto_cc_externos',
-    data=body_bytes,
-    headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
-    method='POST'
-)
+body_bytes, content_type = build_multipart({'data': json.dumps(emision_data)}, files)
+print(f"Upload: {len(body_bytes):,} bytes")
 
 try:
-    resp3 = urllib.request.urlopen(req3)
-    print(f"\nStep 3 Status: {resp3.status}")
-    result = resp3.read().decode()
-    print(f"Response: {result[:800]}")
+    status, result = breakers.request(
+        f'{BASE}/Polizas/crear_poliza_auto_cc_externos',
+        data=body_bytes,
+        headers={'Content-Type': content_type},
+    )
+    print(f"\nStep 3 Status: {status}")
+    print(f"Response: {result.decode()[:800]}")
 except urllib.error.HTTPError as e:
     print(f"\nStep 3 HTTP Error: {e.code}")
     error_body = e.read().decode()
     print(f"Response: {error_body[:800]}")
 except Exception as e:
     print(f"\nStep 3 Error: {e}")
+
+print()
+print_metrics(breakers.metrics())
@@ -0,0 +1,47 @@
+import os
+
+from broker_directory import BrokerDirectory, default_cache_path
+from name_keys import fold_key, name_key
+
+ROSTER = 'name,email,aliases\nELENA NUÑEZ,elena@x.com,LENA NUNEZ|E. NUNEZ\nEDWIN CEDEÑO,edwin@x.com,\nEDWIN  CEDENO,otro@x.com,\n'
+
+
+def write_roster(tmp_path, text=ROSTER):
+    path = tmp_path / 'brokers.csv'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_name_keys():
+    assert fold_key('  Núñez   elena ') == 'NUNEZ ELENA'
+    assert name_key('Núñez   elena') == name_key('ELENA NUNEZ') == 'ELENA NUNEZ'
+    assert fold_key('   ') is None and name_key(None) is None
+
+
+def test_lookup_names_and_aliases(tmp_path):
+    directory = BrokerDirectory.load(write_roster(tmp_path))
+    assert directory.lookup('nunez elena') == 'elena@x.com'
+    assert directory.lookup('Lena Núñez') == 'elena@x.com'
+    assert directory.lookup('Cedeño Edwin') == 'edwin@x.com'
+    assert directory.lookup('NADIE') is None
+    # Misma clave con otro email: se conserva el primero y se reporta
+    assert directory.conflicts == [('EDWIN  CEDENO', 'edwin@x.com', 'otro@x.com')]
+    assert directory.emails == {'elena@x.com', 'edwin@x.com'}
+
+
+def test_cache_reused_and_rebuilt_on_change(tmp_path):
+    roster = write_roster(tmp_path)
+    assert not BrokerDirectory.load(roster).cached
+    assert os.path.exists(default_cache_path(roster))
+    assert BrokerDirectory.load(roster).cached
+
+    # Solo cambia el mtime: mismo SHA-256, sigue saliendo de la caché
+    stat = os.stat(roster)
+    os.utime(roster, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert BrokerDirectory.load(roster).cached
+
+    write_roster(tmp_path, ROSTER + 'ANA RUIZ,ana@x.com,\n')
+    directory = BrokerDirectory.load(roster)
+    assert not directory.cached
+    assert directory.lookup('ruiz ana') == 'ana@x.com'
+    assert not BrokerDirectory.load(roster, rebuild=True).cached
@@ -0,0 +1,32 @@
+import zipfile
+
+import pytest
+
+import bench_synthetic
+import excel_to_bulk_import
+
+
+def test_zip_member_with_missing_columns_does_not_stop_the_others(tmp_path, capsys):
+    good = tmp_path / 'bueno.csv'
+    bench_synthetic.write_insurer_csv(str(good), 20)
+    archive = tmp_path / 'reportes.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.write(good, 'a.csv')
+        zf.writestr('b.csv', 'client_name,policy_number\nANA,123\n')
+        zf.write(good, 'c.csv')
+
+    with pytest.raises(SystemExit) as exit_info:
+        excel_to_bulk_import.process_excel(str(archive))
+    assert exit_info.value.code == 1
+
+    outputs = sorted(p.name for p in tmp_path.glob('*_IMPORT.json'))
+    assert outputs == ['reportes_a_IMPORT.json', 'reportes_c_IMPORT.json']
+    assert "b.csv omitido" in capsys.readouterr().out
+
+
+def test_sheets_option_ignored_for_csv_with_warning(tmp_path, capsys):
+    path = tmp_path / 'cartera.csv'
+    bench_synthetic.write_insurer_csv(str(path), 10)
+    records = excel_to_bulk_import.process_excel(str(path), sheets=['Enero'])
+    assert len(records) > 0
+    assert '--hojas no aplica a CSV' in capsys.readouterr().out
@@ -0,0 +1,128 @@
+import pytest
+
+from fedpa_breaker import CLOSED, HALF_OPEN, OPEN, BreakerConfig, BreakerOpen, CircuitBreaker, LoadShed
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(**overrides):
+    options = dict(window=4, min_calls=4, error_rate=0.5, slow_seconds=1.0, open_seconds=10.0,
+                   half_open_probes=2, max_in_flight=4)
+    options.update(overrides)
+    clock = FakeClock()
+    transitions = []
+    breaker = CircuitBreaker('api/x', BreakerConfig(**options), lambda name, a, b: transitions.append(b), clock)
+    return breaker, clock, transitions
+
+
+def call(breaker, ok=True, seconds=0.1):
+    breaker.release(breaker.acquire(), ok, seconds)
+
+
+def trip(breaker, clock):
+    for _ in range(4):
+        call(breaker, ok=False)
+    assert breaker.state == OPEN
+    clock.now += 10.0
+
+
+def test_opens_on_errors_and_rejects_until_timeout():
+    breaker, clock, _ = make_breaker()
+    call(breaker)
+    call(breaker)
+    call(breaker, ok=False)
+    assert breaker.state == CLOSED
+    call(breaker, ok=False)
+    assert breaker.state == OPEN
+
+    clock.now += 5.0
+    with pytest.raises(BreakerOpen):
+        breaker.acquire()
+    assert breaker.snapshot()['rechazadas_abierto'] == 1
+
+
+def test_half_open_probes_close_or_reopen():
+    breaker, clock, transitions = make_breaker()
+    trip(breaker, clock)
+    first, second = breaker.acquire(), breaker.acquire()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(BreakerOpen):
+        breaker.acquire()
+    breaker.release(first, True, 0.1)
+    breaker.release(second, True, 0.1)
+    assert transitions == [OPEN, HALF_OPEN, CLOSED]
+
+    trip(breaker, clock)
+    call(breaker, seconds=2.0)  # sonda lenta
+    assert breaker.state == OPEN
+
+
+def test_stale_completion_after_state_change_is_ignored():
+    breaker, clock, transitions = make_breaker()
+    trip(breaker, clock)
+    probe_a, probe_b = breaker.acquire(), breaker.acquire()
+    breaker.release(probe_a, False, 0.1)
+    assert breaker.state == OPEN
+
+    # La otra sonda termina bien después de reabrir: no cuenta ni deja _probes negativo
+    breaker.release(probe_b, True, 0.1)
+    assert breaker.state == OPEN and breaker._probes == 0 and breaker.in_flight == 0
+
+    clock.now += 10.0
+    probes = [breaker.acquire(), breaker.acquire()]
+    with pytest.raises(BreakerOpen):
+        breaker.acquire()
+    for token in probes:
+        breaker.release(token, True, 0.1)
+    assert transitions == [OPEN, HALF_OPEN, OPEN, HALF_OPEN, CLOSED]
+
+
+def test_call_admitted_while_closed_does_not_close_half_open():
+    # min_in_flight=2: las fallas achican el cupo y slow_call sigue ocupando uno
+    breaker, clock, _ = make_breaker(half_open_probes=1, min_in_flight=2)
+    slow_call = breaker.acquire()
+    trip(breaker, clock)
+    probe = breaker.acquire()
+    assert breaker.state == HALF_OPEN
+    breaker.release(slow_call, True, 0.1)
+    assert breaker.state == HALF_OPEN
+    breaker.release(probe, True, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_load_shedding_and_aimd():
+    breaker, _, _ = make_breaker(max_in_flight=2, min_calls=100)
+    tokens = [breaker.acquire(), breaker.acquire()]
+    with pytest.raises(LoadShed):
+        breaker.acquire()
+    breaker.release(tokens[0], True, 2.0)
+    assert breaker.limit == 1.0
+    assert breaker.snapshot()['descartadas_carga'] == 1
+    assert breaker.peak_in_flight == 2
+
+
+def test_aimd_limit_halves_on_failure_or_slowness_and_grows_additively():
+    breaker, _, _ = make_breaker(max_in_flight=8, min_in_flight=1, min_calls=100)
+    assert breaker.limit == 8.0
+    call(breaker, ok=False)
+    assert breaker.limit == 4.0
+    call(breaker, seconds=2.0)
+    assert breaker.limit == 2.0
+    call(breaker, ok=False, seconds=2.0)
+    call(breaker, ok=False)
+    assert breaker.limit == 1.0  # nunca baja de min_in_flight
+
+    # Aumento aditivo: +1/limit por respuesta rápida, sin pasar de max_in_flight
+    call(breaker)
+    assert breaker.limit == 2.0
+    call(breaker)
+    assert breaker.limit == 2.5
+    for _ in range(100):
+        call(breaker)
+    assert breaker.limit == 8.0
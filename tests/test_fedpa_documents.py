@@ -0,0 +1,61 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import fedpa_documents
+from fedpa_documents import DocumentPreprocessor, ProcessedDocument, sniff_type, upload_name
+
+JPEG = b'\xff\xd8\xff\xe0' + b'x' * 1000
+PDF = b'%PDF-1.4\n' + b'x' * 1000
+
+
+def test_sniff_type_and_upload_name():
+    assert sniff_type(JPEG) == 'jpeg'
+    assert sniff_type(b'  %PDF-1.7') == 'pdf'
+    assert sniff_type(b'hola') is None
+    assert upload_name('scan.png', 'image/jpeg') == 'scan.jpg'
+    assert upload_name('IMG.JPEG', 'image/jpeg') == 'IMG.JPEG'
+    assert upload_name('cedula.pdf', 'application/pdf') == 'cedula.pdf'
+
+
+def test_missing_codec_fallback_not_persisted(tmp_path, monkeypatch):
+    monkeypatch.setattr(fedpa_documents, 'process_pdf', lambda data, budget: (None, fedpa_documents.NO_PIKEPDF))
+    with DocumentPreprocessor(cache_dir=str(tmp_path)) as docs:
+        doc = docs.process(PDF, 'cedula.pdf')
+    assert (doc.method, doc.note, doc.data) == ('original', 'sin pikepdf', PDF)
+    assert os.listdir(tmp_path) == []
+
+
+def test_processed_result_cached_on_disk_with_jpg_name(tmp_path, monkeypatch):
+    small = b'\xff\xd8\xff' + b'y' * 10
+    png = b'\x89PNG\r\n\x1a\n' + b'z' * 1000
+    monkeypatch.setattr(fedpa_documents, 'process_image', lambda data, budget: (small, '10x10 q80'))
+    with DocumentPreprocessor(cache_dir=str(tmp_path)) as docs:
+        first = docs.process(png, 'registro.png')
+        again = docs.process(png, 'licencia.png')
+    assert (first.name, first.content_type, first.method) == ('registro.jpg', 'image/jpeg', 'imagen')
+    assert (again.name, again.cached) == ('licencia.jpg', 'memoria')
+
+    # Otro proceso: sale del disco sin volver a procesar y con el nombre .jpg
+    monkeypatch.setattr(fedpa_documents, 'process_image', None)
+    with DocumentPreprocessor(cache_dir=str(tmp_path)) as docs:
+        cached = docs.process(png, 'cedula.png')
+    assert (cached.name, cached.cached, cached.data) == ('cedula.jpg', 'disco', small)
+    assert docs.stats == {'procesados': 0, 'cache_memoria': 0, 'cache_disco': 1}
+
+
+def test_stale_fallback_entry_on_disk_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(fedpa_documents, 'process_pdf', lambda data, budget: (b'%PDF-small', 'comprimido'))
+    with DocumentPreprocessor(cache_dir=str(tmp_path)) as docs:
+        key = docs._cache_key(hashlib.sha256(PDF).hexdigest())
+        docs._write_disk(key, ProcessedDocument('c.pdf', 'application/pdf', PDF, len(PDF), 'x', 'original', 'sin pikepdf'))
+        doc = docs.process(PDF, 'c.pdf')
+    assert (doc.method, doc.data, doc.cached) == ('pdf', b'%PDF-small', None)
+
+
+def test_concurrent_requests_process_once(monkeypatch):
+    monkeypatch.setattr(fedpa_documents, 'process_pdf', lambda data, budget: (b'%PDF-small', 'comprimido'))
+    with DocumentPreprocessor(cache_dir=None) as docs, ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda i: docs.process(PDF, f'{i}.pdf'), range(40)))
+    assert {doc.data for doc in results} == {b'%PDF-small'}
+    assert docs.stats == {'procesados': 1, 'cache_memoria': 39, 'cache_disco': 0}
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import generate_sql
+from reference_snapshot import ReferenceData, write_snapshot
+
+RECORDS = [{'broker_email': 'ANA@x.com', 'insurer_name': 'assa', 'ramo': 'auto'}]
+
+
+@pytest.fixture
+def references(tmp_path):
+    path = str(tmp_path / 'referencias.sqlite')
+    write_snapshot(path, [{'email': 'ana@x.com', 'name': 'ANA'}], [{'name': 'ASSA'}], [{'ramo': 'AUTO'}], 'test')
+    return ReferenceData.load(path)
+
+
+def test_sql_with_references_is_remapped_and_says_so(tmp_path, references):
+    source = tmp_path / 'import.json'
+    source.write_text(json.dumps(RECORDS), encoding='utf-8')
+    output = tmp_path / 'import.sql'
+    generate_sql.main(None, str(source), str(output), references)
+
+    sql = output.read_text(encoding='utf-8')
+    assert f"verificados contra el snapshot {references.meta['version']}" in sql
+    assert 'Verifica que los brokers existen' not in sql
+    assert '"broker_email": "ana@x.com"' in sql and '"insurer_name": "ASSA"' in sql
+
+
+def test_sql_without_references_keeps_manual_check(tmp_path):
+    source = tmp_path / 'import.json'
+    source.write_text(json.dumps(RECORDS), encoding='utf-8')
+    output = tmp_path / 'import.sql'
+    generate_sql.main(None, str(source), str(output))
+    assert '--referencias' in output.read_text(encoding='utf-8')
+
+
+def test_unknown_reference_aborts(tmp_path, references):
+    source = tmp_path / 'import.json'
+    source.write_text(json.dumps([dict(RECORDS[0], broker_email='otro@x.com')]), encoding='utf-8')
+    with pytest.raises(SystemExit):
+        generate_sql.main(None, str(source), str(tmp_path / 'import.sql'), references)
+    assert not (tmp_path / 'import.sql').exists()
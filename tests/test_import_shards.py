@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from import_shards import INDEX_FILE, shard_filename, verify_shards, write_shards
+from record_store import RecordStore
+
+FIELDS = ['policy_number', 'broker_email', 'insurer_name']
+
+
+def make_store(rows):
+    store = RecordStore(FIELDS)
+    store.extend({'policy_number': p, 'broker_email': b, 'insurer_name': i} for p, b, i in rows)
+    return store
+
+
+def test_write_and_verify(tmp_path):
+    store = make_store([('1', 'ana@x.com', 'ASSA'), ('2', 'luis@x.com', 'FEDPA'), ('3', 'ana@x.com', None)])
+    index_path = write_shards(store, str(tmp_path), 'broker')
+
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+    assert index['total_records'] == 3
+    assert [(s['key'], s['records']) for s in index['shards']] == [('ana@x.com', 2), ('luis@x.com', 1)]
+    assert verify_shards(str(tmp_path)) == []
+
+    with open(tmp_path / 'ana@x.com.json', encoding='utf-8') as f:
+        assert [r['policy_number'] for r in json.load(f)] == ['1', '3']
+
+
+def test_verify_detects_tampering(tmp_path):
+    write_shards(make_store([('1', 'ana@x.com', 'ASSA'), ('2', 'luis@x.com', 'FEDPA')]), str(tmp_path))
+    (tmp_path / 'ana@x.com.json').write_text('[]', encoding='utf-8')
+    os.remove(tmp_path / 'luis@x.com.json')
+
+    problems = dict(verify_shards(str(tmp_path)))
+    assert problems['luis@x.com.json'] == 'no existe'
+    assert problems['ana@x.com.json'].startswith('tamaño')
+
+
+def test_rewrite_removes_stale_shards(tmp_path):
+    write_shards(make_store([('1', 'ana@x.com', 'ASSA'), ('2', 'luis@x.com', 'FEDPA')]), str(tmp_path))
+    write_shards(make_store([('1', 'ana@x.com', 'ASSA')]), str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == ['ana@x.com.json', INDEX_FILE]
+    assert verify_shards(str(tmp_path)) == []
+
+
+def test_rewrite_keeps_foreign_files(tmp_path):
+    (tmp_path / 'cartera_IMPORT.json').write_text('[]', encoding='utf-8')
+    (tmp_path / 'otro.json').write_text('{}', encoding='utf-8')
+    write_shards(make_store([('1', 'ana@x.com', 'ASSA'), ('2', 'luis@x.com', 'FEDPA')]), str(tmp_path))
+    write_shards(make_store([('1', 'ana@x.com', 'ASSA')]), str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == ['ana@x.com.json', 'cartera_IMPORT.json', INDEX_FILE, 'otro.json']
+
+
+def test_value_named_index_does_not_overwrite_index(tmp_path):
+    write_shards(make_store([('1', 'index', 'ASSA')]), str(tmp_path))
+    assert verify_shards(str(tmp_path)) == []
+    assert sorted(os.listdir(tmp_path)) == ['index.json', 'index_2.json']
+
+
+def test_unknown_partition_and_filenames(tmp_path):
+    with pytest.raises(ValueError):
+        write_shards(make_store([]), str(tmp_path), 'ramo')
+    used = set()
+    assert shard_filename('ASSA / Vida', used) == 'assa_vida.json'
+    assert shard_filename('assa vida', used) == 'assa_vida_2.json'
+    assert shard_filename(None, used) == '_sin_valor.json'
@@ -0,0 +1,82 @@
+from import_validation import (
+    ERROR, IMPORT_RULES, WARNING, after, date_range, email, number_range, parsed, required, row_sort_key, to_columns,
+    validate,
+)
+from record_store import RecordStore
+
+
+def violations(rule, records):
+    return rule.evaluate(to_columns(records), len(records))
+
+
+def test_required():
+    rule = required('client_name', 'broker_email')
+    records = [{'client_name': 'A', 'broker_email': ''}, {'client_name': None, 'broker_email': 'x@y.com'}]
+    assert violations(rule, records) == [(1, 'client_name', None), (0, 'broker_email', '')]
+    assert rule.severity == ERROR
+
+
+def test_email_and_ranges():
+    assert violations(email('broker_email'), [{'broker_email': 'mal'}, {'broker_email': 'a@b.com'}]) == [
+        (0, 'broker_email', 'mal')]
+    assert violations(number_range('p', 0, 1), [{'p': 1.5}, {'p': 0.9}, {'p': None}]) == [(0, 'p', 1.5)]
+    assert violations(date_range('d'), [{'d': '1900-01-01'}, {'d': '2025-01-01'}]) == [(0, 'd', '1900-01-01')]
+
+
+def test_parsed_reports_raw_value():
+    rule = parsed('start_date', 'start_date_raw')
+    records = [{'start_date': None, 'start_date_raw': '31/02/2025'}, {'start_date': None, 'start_date_raw': None}]
+    assert violations(rule, records) == [(0, 'start_date', '31/02/2025')]
+    assert rule.severity == WARNING
+
+
+def test_after():
+    rule = after('renewal_date', 'start_date')
+    records = [
+        {'start_date': '2025-01-01', 'renewal_date': '2024-01-01'},
+        {'start_date': '2025-01-01', 'renewal_date': '2026-01-01'},
+    ]
+    assert violations(rule, records) == [(0, 'renewal_date', '2024-01-01')]
+
+
+def _record(**overrides):
+    record = {
+        'client_name': 'ANA', 'policy_number': '1', 'insurer_name': 'ASSA', 'broker_email': 'b@x.com',
+        'start_date': '2025-01-01', 'renewal_date': '2026-01-01', 'percent_override': 0.9,
+    }
+    record.update(overrides)
+    return record
+
+
+def test_validate_rejects_errors_only_and_keeps_row_numbers():
+    records = [_record(), _record(broker_email='sin-arroba'), _record(percent_override=7.0)]
+    report = validate(to_columns(records), [10, 11, 12])
+    assert report.rejected == {1}
+    assert {(row, rule) for row, rule, _, _, _ in report.errors} == {(11, 'email_invalido'), (12, 'fuera_de_rango')}
+
+
+def test_validate_on_column_view_matches_decoded_columns():
+    records = [_record(), _record(client_name=None), _record(renewal_date='2020-01-01')]
+    raw = {'start_date_raw': [None] * 3, 'renewal_date_raw': [None] * 3, 'percent_override_raw': [None] * 3}
+    store = RecordStore(list(records[0]))
+    store.extend(records)
+
+    columns = store.columns()
+    columns.update(raw)
+    expected = validate(columns, [2, 3, 4], IMPORT_RULES)
+    actual = validate(store.column_view(raw), [2, 3, 4], IMPORT_RULES)
+    assert actual.errors == expected.errors
+    assert actual.rejected == expected.rejected == {1}
+
+
+def test_report_write_csv(tmp_path):
+    report = validate(to_columns([_record(client_name='')]), ['Hoja!2'])
+    path = report.write(str(tmp_path / 'errores.csv'))
+    assert open(path, encoding='utf-8').read().splitlines()[1].startswith('Hoja!2,requerido,client_name')
+
+
+def test_report_rows_sorted_naturally():
+    rows = ['Enero!10', 'Enero!2', 'Febrero!1']
+    report = validate(to_columns([_record(client_name='')] * 3), rows)
+    assert [e[0] for e in sorted(report.errors, key=lambda e: row_sort_key(e[0]))] == ['Enero!2', 'Enero!10', 'Febrero!1']
+    assert sorted([12, 3], key=row_sort_key) == [3, 12]
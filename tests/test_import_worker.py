@@ -0,0 +1,60 @@
+import json
+import os
+import time
+
+import broker_directory
+import import_worker
+
+
+def _job(dirs, folder, name, age=0):
+    path = os.path.join(dirs[folder], name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'id': name[:-5], 'argv': []}, f)
+    if age:
+        past = time.time() - age
+        os.utime(path, (past, past))
+    return path
+
+
+def test_requeue_only_stale_jobs(tmp_path):
+    dirs = import_worker._spool_dirs(str(tmp_path))
+    _job(dirs, import_worker.RUNNING, 'vivo.json')
+    _job(dirs, import_worker.RUNNING, 'huerfano.json', age=120)
+
+    assert import_worker.requeue_interrupted(dirs, stale_after=60) == 1
+    assert os.listdir(dirs[import_worker.RUNNING]) == ['vivo.json']
+    assert os.listdir(dirs[import_worker.PENDING]) == ['huerfano.json']
+
+
+def test_claim_refreshes_mtime_of_old_pending_job(tmp_path):
+    dirs = import_worker._spool_dirs(str(tmp_path))
+    _job(dirs, import_worker.PENDING, 'viejo.json', age=3600)
+
+    running_path, job = import_worker.claim_next(dirs)
+    assert job['id'] == 'viejo'
+    # Otro worker que arranca no lo devuelve a la cola
+    assert import_worker.requeue_interrupted(dirs, stale_after=60) == 0
+    assert os.path.exists(running_path)
+
+
+def test_heartbeat_keeps_job_fresh(tmp_path):
+    dirs = import_worker._spool_dirs(str(tmp_path))
+    path = _job(dirs, import_worker.RUNNING, 'largo.json', age=120)
+    with import_worker.heartbeat(path, interval=0.01):
+        time.sleep(0.1)
+    assert import_worker.requeue_interrupted(dirs, stale_after=60) == 0
+
+
+def test_get_directory_reused_until_roster_changes(tmp_path):
+    roster = tmp_path / 'roster.csv'
+    roster.write_text('name,email,aliases\nELENA NUNEZ,elena@x.com,\n', encoding='utf-8')
+
+    first = broker_directory.get_directory(str(roster))
+    assert broker_directory.get_directory(str(roster)) is first
+
+    roster.write_text('name,email,aliases\nELENA NUNEZ,elena@y.com,\n', encoding='utf-8')
+    stat = os.stat(roster)
+    os.utime(roster, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    reloaded = broker_directory.get_directory(str(roster))
+    assert reloaded is not first
+    assert reloaded.lookup('Nuñez Elena') == 'elena@y.com'
@@ -0,0 +1,37 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+import bench_synthetic
+import parse_bulk_data
+
+SCRIPT = parse_bulk_data.__file__
+
+
+def run(cwd, *args):
+    return subprocess.run([sys.executable, SCRIPT, *args], cwd=cwd, capture_output=True, text=True)
+
+
+def test_main_reads_compressed_dump_and_shards(tmp_path):
+    raw = tmp_path / 'raw.txt'
+    bench_synthetic.write_raw_dump(str(raw), 50)
+    with open(raw, 'rb') as f, gzip.open(tmp_path / 'raw.txt.gz', 'wb') as out:
+        out.write(f.read())
+
+    plain = run(tmp_path, 'raw.txt', 'plano')
+    packed = run(tmp_path, 'raw.txt.gz', 'comprimido', '--particionar', 'aseguradora')
+    assert plain.returncode == packed.returncode == 0, packed.stdout + packed.stderr
+
+    assert (tmp_path / 'plano.json').read_bytes() == (tmp_path / 'comprimido.json').read_bytes()
+    with open(tmp_path / 'comprimido_SHARDS' / 'index.json', encoding='utf-8') as f:
+        index = json.load(f)
+    assert index['shard_by'] == 'insurer_name'
+    assert index['total_records'] == len(json.loads((tmp_path / 'plano.json').read_text(encoding='utf-8')))
+
+
+def test_main_rejects_bad_options(tmp_path):
+    assert 'no encontrado' in run(tmp_path, 'nope.txt').stdout
+    result = run(tmp_path, 'nope.txt', '--particionar', 'ramo')
+    assert result.returncode == 1 and 'Partición desconocida' in result.stdout
@@ -0,0 +1,67 @@
+from policy_keys import PolicyIndex, canonical_policy_key, clean_policy_number, get_insurer_slug, match_rows
+
+
+def test_clean_policy_number():
+    assert clean_policy_number(' 02-01 -123 ') == '02-01-123'
+    assert clean_policy_number('12345.0') == '12345'
+    assert clean_policy_number('1.23E+11') is None
+    assert clean_policy_number('nan') is None
+    assert clean_policy_number(None) is None
+
+
+def test_insurer_slug():
+    assert get_insurer_slug('Aseguradora Ancon') == 'ancon'
+    assert get_insurer_slug('WORLDWIDE MEDICAL') == 'ww-medical'
+    assert get_insurer_slug('Desconocida SA') is None
+
+
+def test_full_rules():
+    assert canonical_policy_key('02B-12345', 'ASSA') == ('assa', '02B12345')
+    assert canonical_policy_key('1-30-000123', 'INTERNACIONAL') == ('internacional', '1-30-123')
+    assert canonical_policy_key('ABC-1', 'Otra') == ('OTRA', 'ABC-1')
+
+
+def test_partial_rule_full_number():
+    assert canonical_policy_key('02-01-0123456-4', 'FEDPA') == ('fedpa', '123456')
+    assert canonical_policy_key('0120-00123-01', 'ANCON') == ('ancon', '123')
+
+
+def test_partial_rule_block_only():
+    assert canonical_policy_key('0123456', 'FEDPA') == ('fedpa', '123456')
+
+
+def test_partial_rule_truncated_number_matches_portfolio():
+    assert canonical_policy_key('123456-4', 'FEDPA') == canonical_policy_key('02-01-123456-4', 'FEDPA')
+
+
+def test_partial_rule_three_block_truncation_does_not_key_by_position():
+    full = canonical_policy_key('02-01-123456-4', 'FEDPA')
+    assert canonical_policy_key('01-123456-4', 'FEDPA') == full == ('fedpa', '123456')
+    assert canonical_policy_key('02-01-123456', 'BANESCO') == ('banesco', '123456')
+    assert canonical_policy_key('00678-01', 'ANCON') == canonical_policy_key('0220-00678-01', 'ANCON')
+    # Bloques de más: tampoco se toma por posición
+    assert canonical_policy_key('0220-00678-01-9', 'ANCON') == ('ancon', '678')
+
+
+def test_partial_rule_ambiguous_or_non_numeric_is_unusable():
+    assert canonical_policy_key('1234-5678', 'FEDPA') is None
+    assert canonical_policy_key('01-1234-5678', 'FEDPA') is None
+    assert canonical_policy_key('AB-CD', 'FEDPA') is None
+
+
+def test_match_rows():
+    index = PolicyIndex([
+        {'policy_number': '02-01-123456-4', 'insurer_name': 'FEDPA'},
+        {'policy_number': '02-01-123456-4', 'insurer_name': 'FEDPA'},
+        {'policy_number': '1E+10', 'insurer_name': 'FEDPA'},
+    ])
+    assert len(index) == 1 and len(index.duplicates) == 1 and len(index.invalid) == 1
+
+    rows = [
+        (2, {'policy_number': '123456-4'}),
+        (3, {'policy_number': '999'}),
+        (4, {'policy_number': ''}),
+    ]
+    matched, unmatched = match_rows(index, rows, default_insurer='FEDPA')
+    assert [m[0] for m in matched] == [2]
+    assert [(u[0], u[2]) for u in unmatched] == [(3, 'sin_poliza'), (4, 'numero_invalido')]
@@ -0,0 +1,97 @@
+import io
+import json
+import pickle
+
+import pytest
+
+from record_store import ColumnsView, RecordStore
+
+FIELDS = ['client_name', 'insurer_name', 'start_date', 'percent_override']
+
+RECORDS = [
+    {'client_name': 'ANA PÉREZ', 'insurer_name': 'ASSA', 'start_date': '2025-01-31', 'percent_override': 0.94},
+    {'client_name': None, 'insurer_name': None, 'start_date': None, 'percent_override': None},
+    {'client_name': '', 'insurer_name': 'FEDPA', 'start_date': '31/01/2025', 'percent_override': 1.0},
+]
+
+
+def make_store(records=RECORDS):
+    store = RecordStore(FIELDS)
+    store.extend(records)
+    return store
+
+
+def test_round_trip_keeps_values_and_types():
+    store = make_store()
+    assert store.to_dicts() == RECORDS
+    assert len(store) == 3
+    assert dict(store[-1]) == RECORDS[-1]
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_write_json_matches_json_dump():
+    store = make_store()
+    for indent in (None, 2):
+        buffer = io.StringIO()
+        store.write_json(buffer, indent=indent)
+        separators = (',', ':') if indent is None else None
+        assert buffer.getvalue() == json.dumps(RECORDS, ensure_ascii=False, indent=indent, separators=separators)
+
+
+def test_select_drop_and_counts():
+    store = make_store()
+    assert store.select([2, 0]).column('insurer_name') == ['FEDPA', 'ASSA']
+    dropped = store.drop({1})
+    assert dropped.column('start_date') == ['2025-01-31', '31/01/2025']
+    assert store.counts('insurer_name') == {'ASSA': 1, None: 1, 'FEDPA': 1}
+
+
+def test_set_column_reencodes_and_checks_length():
+    store = make_store()
+    store.set_column('insurer_name', ['ASSA', 'ASSA', 'ANCON'])
+    assert store.counts('insurer_name') == {'ASSA': 2, 'ANCON': 1}
+    with pytest.raises(ValueError):
+        store.set_column('insurer_name', ['ASSA'])
+
+
+def test_store_is_picklable():
+    store = make_store()
+    assert pickle.loads(pickle.dumps(store)).to_dicts() == RECORDS
+
+
+def test_column_view_decodes_on_demand():
+    store = make_store()
+    view = store.column_view({'start_date_raw': [None, None, '31/01/2025']})
+    assert isinstance(view, ColumnsView)
+    assert view['insurer_name'] == ['ASSA', None, 'FEDPA']
+    assert view['start_date_raw'][2] == '31/01/2025'
+    assert view.get('missing') is None
+    assert list(view) == FIELDS + ['start_date_raw']
+    # Cada acceso decodifica una lista nueva: mutarla no toca el store
+    view['client_name'][0] = 'X'
+    assert store.column('client_name')[0] == 'ANA PÉREZ'
+
+
+def test_append_store_merges_column_wise():
+    merged = RecordStore(FIELDS + ['source_sheet'], category_fields=('insurer_name', 'source_sheet'))
+    merged.append_store(make_store(), fill={'source_sheet': 'Enero'})
+    merged.append_store(make_store(RECORDS[::-1]), fill={'source_sheet': 'Febrero'})
+
+    expected = [dict(r, source_sheet='Enero') for r in RECORDS] + \
+        [dict(r, source_sheet='Febrero') for r in RECORDS[::-1]]
+    assert merged.to_dicts() == expected
+    assert merged.counts('source_sheet') == {'Enero': 3, 'Febrero': 3}
+
+
+def test_category_column_widens_past_65535_values():
+    store = RecordStore(['broker_email'])
+    store.extend({'broker_email': f'b{i}@x.com'} for i in range(70_000))
+    assert store[69_999]['broker_email'] == 'b69999@x.com'
+    assert store._columns['broker_email'].codes.typecode == 'I'
+
+    merged = RecordStore(['broker_email'])
+    merged.append({'broker_email': 'primero@x.com'})
+    merged.append_store(store)
+    assert len(merged.counts('broker_email')) == 70_001
+    assert merged[-1]['broker_email'] == 'b69999@x.com'
@@ -0,0 +1,106 @@
+import pytest
+
+from import_validation import to_columns, validate
+from record_store import RecordStore
+from reference_snapshot import ReferenceData, write_snapshot
+
+BROKERS = [
+    {'email': 'Ana@Lideres.com', 'name': 'Ana Núñez'},
+    {'email': 'luis@lideres.com', 'name': 'LUIS QUIROS', 'active': 'false'},
+]
+INSURERS = [
+    {'name': 'ASSA COMPAÑIA DE SEGUROS'},
+    {'name': 'FEDPA', 'active': '0'},
+]
+RAMOS = [{'ramo': 'AUTO'}, {'ramo': 'Vida'}]
+
+
+@pytest.fixture
+def references(tmp_path):
+    # Carpeta con caracteres que romperían una URI armada a mano
+    folder = tmp_path / 'ref?#%'
+    folder.mkdir()
+    path = str(folder / 'referencias.sqlite')
+    write_snapshot(path, BROKERS, INSURERS, RAMOS, 'test')
+    return ReferenceData.load(path)
+
+
+def test_load_snapshot(references):
+    assert references.brokers == {'ana@lideres.com': True, 'luis@lideres.com': False}
+    assert references.insurer_active == {'ASSA COMPAÑIA DE SEGUROS': True, 'FEDPA': False}
+    assert references.meta['brokers'] == '2'
+
+
+def test_remap_known_variants(references):
+    store = RecordStore(['broker_email', 'insurer_name', 'ramo'])
+    store.extend([
+        {'broker_email': 'ANA@lideres.com', 'insurer_name': 'assa compania de seguros', 'ramo': 'vida'},
+        {'broker_email': 'ana nunez', 'insurer_name': 'ASSA', 'ramo': 'auto'},
+        # Mismo normalizador que broker_directory: el orden de las palabras no importa
+        {'broker_email': 'Núñez  Ana', 'insurer_name': None, 'ramo': None},
+    ])
+    assert references.apply(store) == {'broker_email': 3, 'insurer_name': 2, 'ramo': 2}
+    assert store.column('broker_email') == ['ana@lideres.com'] * 3
+    assert store.column('insurer_name') == ['ASSA COMPAÑIA DE SEGUROS'] * 2 + [None]
+    assert store.column('ramo') == ['VIDA', 'AUTO', None]
+
+
+def test_rules_reject_unknown_and_inactive_separately(references):
+    columns = to_columns([
+        {'broker_email': 'ana@lideres.com', 'insurer_name': 'ASSA COMPAÑIA DE SEGUROS', 'ramo': 'AUTO'},
+        {'broker_email': 'luis@lideres.com', 'insurer_name': 'FEDPA', 'ramo': 'AUTO'},
+        {'broker_email': 'otro@x.com', 'insurer_name': 'ASSA COMPAÑIA DE SEGUROS', 'ramo': 'HOGAR'},
+    ])
+    report = validate(columns, [2, 3, 4], references.rules())
+    assert sorted((row, rule, field) for row, rule, field, _, _ in report.errors) == [
+        (3, 'referencia_inactiva', 'broker_email'),
+        (3, 'referencia_inactiva', 'insurer_name'),
+        (4, 'referencia_desconocida', 'broker_email'),
+        (4, 'referencia_desconocida', 'ramo'),
+    ]
+    # ramo desconocido es advertencia: solo se rechazan las filas 3 y 4 por broker/aseguradora
+    assert report.rejected == {1, 2}
+
+
+def _parse_in_list(text):
+    values, current, escaped, quoted = [], '', False, False
+    for ch in text:
+        if escaped:
+            current, escaped = current + ch, False
+        elif ch == '\\':
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif ch == ',' and not quoted:
+            values.append(current)
+            current = ''
+        else:
+            current += ch
+    return values + [current]
+
+
+def test_fetch_distinct_asks_one_row_per_value(monkeypatch):
+    import io
+    import json
+    import urllib.request
+    from urllib.parse import parse_qsl, urlsplit
+
+    import reference_snapshot
+
+    policies = ['AUTO'] * 500 + ['VIDA, INDIVIDUAL'] * 300 + ['SALUD "PLUS"'] * 10 + [None, '']
+    requests = []
+
+    def fake_urlopen(req, timeout=None):
+        requests.append(req.full_url)
+        excluded = set()
+        for name, value in parse_qsl(urlsplit(req.full_url).query, keep_blank_values=True):
+            if name == 'ramo' and value.startswith('not.in.('):
+                excluded.update(_parse_in_list(value[len('not.in.('):-1]))
+        rows = [{'ramo': r} for r in policies if r and r not in excluded][:1]
+        return io.BytesIO(json.dumps(rows).encode())
+
+    monkeypatch.setattr(urllib.request, 'urlopen', fake_urlopen)
+    ramos = reference_snapshot.fetch_distinct('https://x.supabase.co', 'key', 'policies', 'ramo')
+    assert ramos == ['AUTO', 'VIDA, INDIVIDUAL', 'SALUD "PLUS"']
+    assert len(requests) == 4
+    assert all('limit=1' in url and 'select=ramo' in url for url in requests)